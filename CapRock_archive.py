@@ -0,0 +1,420 @@
+"""
+CapRock_archive.py - Append-only columnar archive of pours dropped from user history, with usage queries
+
+@author: Brian Kachala - ECE 4900 Team 8
+@Last Edited: 10/18/2026
+"""
+import array
+import bisect
+import logging
+import os
+import sys
+import threading
+from urllib.parse import quote, unquote
+import CapRock_backend_util as util
+import CapRock_drink as drink
+
+try:
+    import numpy as np
+except ImportError: # Queries fall back to plain python
+    np = None
+
+log = logging.getLogger(__name__)
+
+ARCHIVE_PATH = "backend/archive"
+SEGMENT_POURS = 1 << 20 # Pours in a segment before the next one is started
+FLUSH_POURS = 4096 # Buffered pours that are written without waiting for flush()
+NAMES_FILE = "names.txt"
+COLUMN_EXTENSION = ".col"
+HOUR = 60*60
+
+# Column files of a segment, name:(array typecode, little endian numpy dtype)
+# Pour time is stored as the difference to the pour before it in the segment
+POUR_COLUMNS = {"time":("q", "<i8"), "user":("i", "<i4"), "drink":("i", "<i4"), "grams":("f", "<f4")}
+# One row per liquid of a pour, pour is the row of the pour in its segment
+LINE_COLUMNS = {"pour":("i", "<i4"), "liquid":("i", "<i4"), "oz":("f", "<f4")}
+KEYS = {"user":"users", "drink":"drinks", "liquid":"liquids"} # Group by key:names kind
+
+class PourArchive():
+    """
+    Keeps every pour that User history drops after SESSION_TIME. Pours are
+    buffered and appended to column files of numbered segment folders. Users,
+    drinks and liquids are stored by their stable get_id() IDs, so renames keep
+    one history. names.txt only records the last name seen of each ID, queries
+    turn IDs into names when they return. Queries memory map the columns and
+    group them with NumPy bincount.
+
+    A crash between flush() and the storage save that follows it can archive
+    the pours of that flush again on the next start.
+
+    Params:
+    path (string) - Folder holding names file and segments
+    """
+
+    def __init__(self, path=ARCHIVE_PATH):
+        """
+        Constructor for pour archive.
+        self._names (dict) - {kind:{id:last name seen}}, kind is "users", "drinks" or "liquids"
+        self._buffer (list) - (epoch seconds, user id, drink id, grams, ((liquid id, oz), ...)) not written yet
+        self._segment (int) - Number of segment pours are appended to
+        self._rows (int) - Pours in that segment
+        self._last_time (int) - Epoch seconds of last pour in that segment, base of the next time delta
+        """
+        self._path = path
+        self._lock = threading.Lock()
+        self._names = {kind:{} for kind in KEYS.values()}
+        self._new_names = [] # (kind, id, name) not written yet
+        self._buffer = []
+        if not os.path.exists(path):
+            os.makedirs(path)
+        self._read_names()
+        segments = self._segment_numbers()
+        self._segment = segments[-1] if segments else 0
+        self._rows, self._last_time = self._repair(self._segment_path(self._segment))
+
+    # Adding pours
+    def add_pours(self, person, pours):
+        """
+        Buffers pours of person, user.set_expired_sink calls it with pours leaving history
+        @param pours (list): user.Pour tuples, liquids are taken from the drink recipe now
+        """
+        with self._lock:
+            user_id = self._note("users", person)
+            for pour in pours:
+                lines = tuple((self._note("liquids", liq[drink.LIQUID_POS]), liq[drink.VOLUME_POS])
+                              for liq in pour.drink.get_liquids_obj())
+                self._buffer.append((int(pour.time), user_id, self._note("drinks", pour.drink), pour.grams, lines))
+            if len(self._buffer) >= FLUSH_POURS:
+                self._flush_locked()
+
+    def flush(self):
+        """ Writes buffered pours to the segment files """
+        with self._lock:
+            self._flush_locked()
+
+    def close(self):
+        """ Writes buffered pours, archive can still be used after """
+        self.flush()
+
+    def pour_count(self):
+        """ Returns number of pours archived, buffered ones included """
+        with self._lock:
+            total = len(self._buffer)
+            for number in self._segment_numbers():
+                folder = self._segment_path(number)
+                total = total + _column_length(folder, "time", POUR_COLUMNS["time"][0])
+            return total
+
+    # Queries
+    def totals(self, by, measure="pours", start=None, end=None, names=None):
+        """
+        Returns {key:total} of pours from start up to end
+        @param by (string): "user", "drink" or "liquid" gives names as keys, "hour" gives epoch seconds of hour start
+        @param measure (string): "pours" counted, "grams" of alcohol or "oz" of liquid poured
+        @param start, end (float): Epoch seconds, None is unbounded
+        @param names (dict): {id:current name} of by, e.g. from the registry, over the last names archived.
+            None gives {id:total}
+        """
+        if by not in KEYS and by != "hour":
+            raise util.CapRockError("Cannot group pours by %s" % by)
+        if measure not in ("pours", "grams", "oz"):
+            raise util.CapRockError("Unknown measure %s" % measure)
+        if by == "liquid" and measure == "grams":
+            raise util.CapRockError("Grams of alcohol are kept per pour, not per liquid")
+        on_lines = by == "liquid" or measure == "oz"
+
+        result = {}
+        for cols in self._scan(on_lines):
+            if np is None:
+                _group_python(result, cols, by, measure, on_lines, start, end)
+            else:
+                _group_numpy(result, cols, by, measure, on_lines, start, end)
+        if by == "hour" or names is None:
+            return dict(sorted(result.items()))
+        labels = self._labels(KEYS[by], result, names)
+        return {labels[key]:total for key, total in result.items()}
+
+    def hourly_usage(self, start=None, end=None, names=None):
+        """
+        Returns {liquid:{epoch seconds of hour start:oz poured}} from start up to end
+        @param names (dict): {liquid id:current name}, see totals(), None keys liquids by id
+        """
+        result = {}
+        for cols in self._scan(True):
+            if np is None:
+                _group_python(result, cols, ("liquid", "hour"), "oz", True, start, end)
+            else:
+                _group_numpy(result, cols, ("liquid", "hour"), "oz", True, start, end)
+        labels = None if names is None else self._labels("liquids", {key[0]:None for key in result}, names)
+        usage = {}
+        for (liquid_id, hour), oz in sorted(result.items(), key=lambda item: item[0][1]):
+            usage.setdefault(liquid_id if labels is None else labels[liquid_id], {})[hour] = oz
+        return usage
+
+    def name(self, kind, obj_id):
+        """ Returns last name archived of ID of kind ("users", "drinks" or "liquids"), None if never archived """
+        return self._names[kind].get(obj_id)
+
+    # Helpers
+    def _note(self, kind, obj):
+        """ Returns ID of liquid, drink or user obj, its name is recorded if it is new or was renamed """
+        obj_id = obj.get_id()
+        name = obj.get_name()
+        if self._names[kind].get(obj_id) != name:
+            self._names[kind][obj_id] = name
+            self._new_names.append((kind, obj_id, name))
+        return obj_id
+
+    def _labels(self, kind, ids, names):
+        """
+        Returns {id:name} of ids, current names over archived ones. Names
+        shared by several IDs, like a deleted profile and a new one with its name, get ' #id'
+        """
+        labels = {obj_id:names.get(obj_id) or self._names[kind].get(obj_id) or util.format_ref(obj_id) for obj_id in ids}
+        counts = {}
+        for label in labels.values():
+            counts[label] = counts.get(label, 0) + 1
+        return {obj_id:(label if counts[label] == 1 else "%s %s" % (label, util.format_ref(obj_id)))
+                for obj_id, label in labels.items()}
+
+    def _read_names(self):
+        """ Loads last name of each ID, a torn last line is dropped """
+        path = os.path.join(self._path, NAMES_FILE)
+        if not os.path.exists(path):
+            return
+        with open(path, "r") as f:
+            text = f.read()
+        lines = text.split("\n")
+        if lines[-1]:
+            log.warning("Dropped torn last line of %s", path)
+        keep = 0
+        for line in lines[:-1]:
+            keep = keep + len(line) + 1
+            kind, obj_id, name = line.split("\t")
+            self._names[kind][int(obj_id)] = unquote(name)
+        if keep != len(text):
+            with open(path, "r+") as f:
+                f.truncate(keep)
+
+    def _flush_locked(self):
+        if not self._buffer:
+            return
+        try:
+            if self._new_names: # Names before the columns that use their ids
+                with open(os.path.join(self._path, NAMES_FILE), "a") as f:
+                    f.write("".join("%s\t%d\t%s\n" % (kind, obj_id, quote(name, safe="")) for kind, obj_id, name in self._new_names))
+                    f.flush()
+                    os.fsync(f.fileno())
+                self._new_names = []
+            while self._buffer:
+                if self._rows >= SEGMENT_POURS:
+                    self._segment = self._segment + 1
+                    self._rows, self._last_time = 0, 0
+                batch = self._buffer[:SEGMENT_POURS - self._rows]
+                self._append(batch)
+                self._buffer = self._buffer[len(batch):] # Written batches are not retried
+                log.info("Archived %d pours", len(batch))
+        except OSError as e:
+            log.error("%s : Failed to write pour archive!", str(e))
+            raise util.CapRockError("Pour archive failed to save!")
+
+    def _append(self, batch):
+        """ Appends batch of buffered pours to current segment, lines first so a torn pour has no row """
+        folder = self._segment_path(self._segment)
+        if not os.path.exists(folder):
+            os.mkdir(folder)
+        lines = {"pour":[], "liquid":[], "oz":[]}
+        pours = {"time":[], "user":[], "drink":[], "grams":[]}
+        last = self._last_time
+        for row, (time, user_id, drink_id, grams, parts) in enumerate(batch, self._rows):
+            for liquid_id, oz in parts:
+                lines["pour"].append(row)
+                lines["liquid"].append(liquid_id)
+                lines["oz"].append(oz)
+            pours["time"].append(time - last)
+            pours["user"].append(user_id)
+            pours["drink"].append(drink_id)
+            pours["grams"].append(grams)
+            last = time
+        for columns, values in ((LINE_COLUMNS, lines), (POUR_COLUMNS, pours)):
+            for name, (code, _) in columns.items():
+                _append_column(folder, name, code, values[name])
+        self._rows = self._rows + len(batch)
+        self._last_time = last
+
+    def _repair(self, folder):
+        """
+        Cuts columns of segment to the last complete pour, like a crash during
+        _append never happened. Returns (pours, epoch seconds of last pour)
+        """
+        if not os.path.exists(folder):
+            return 0, 0
+        rows = min(_column_length(folder, name, code) for name, (code, _) in POUR_COLUMNS.items())
+        line_pours = _read_column(folder, "pour", LINE_COLUMNS["pour"][0], None)
+        lines = min([_column_length(folder, name, code) for name, (code, _) in LINE_COLUMNS.items()])
+        while lines and line_pours[lines - 1] >= rows:
+            lines = lines - 1
+        for columns, count in ((POUR_COLUMNS, rows), (LINE_COLUMNS, lines)):
+            for name, (code, _) in columns.items():
+                path = os.path.join(folder, name + COLUMN_EXTENSION)
+                size = count * array.array(code).itemsize
+                if os.path.exists(path) and os.path.getsize(path) != size:
+                    log.warning("Cut %s to %d rows after a torn write", path, count)
+                    with open(path, "r+b") as f:
+                        f.truncate(size)
+        deltas = _read_column(folder, "time", POUR_COLUMNS["time"][0], None)
+        return rows, int(sum(deltas))
+
+    def _scan(self, on_lines):
+        """
+        Yields {column:values} of every segment after writing the buffer,
+        numpy memmaps when numpy is installed. Pour time is decoded to epoch seconds,
+        on_lines adds line columns with the time and user of their pour.
+        """
+        with self._lock:
+            self._flush_locked()
+            segments = [(self._segment_path(number), number == self._segment, self._rows) for number in self._segment_numbers()]
+        for folder, current, rows in segments:
+            cols = {}
+            for name, (code, dtype) in POUR_COLUMNS.items():
+                cols[name] = _read_column(folder, name, code, dtype, rows if current else None)
+            if np is None:
+                total = 0
+                times = []
+                for delta in cols["time"]:
+                    total = total + delta
+                    times.append(total)
+                cols["time"] = times
+            else:
+                cols["time"] = np.cumsum(cols["time"], dtype=np.int64)
+            if on_lines:
+                for name, (code, dtype) in LINE_COLUMNS.items():
+                    cols["line_" + name] = _read_column(folder, name, code, dtype)
+                if current: # Lines of pours appended after rows were counted
+                    lines = bisect.bisect_left(cols["line_pour"], rows)
+                    for name in LINE_COLUMNS:
+                        cols["line_" + name] = cols["line_" + name][:lines]
+                if np is None:
+                    cols["line_time"] = [cols["time"][row] for row in cols["line_pour"]]
+                    cols["line_user"] = [cols["user"][row] for row in cols["line_pour"]]
+                else:
+                    cols["line_time"] = cols["time"][cols["line_pour"]]
+                    cols["line_user"] = cols["user"][cols["line_pour"]]
+            yield cols
+
+    def _segment_numbers(self):
+        """ Returns sorted numbers of segment folders """
+        return sorted(int(fn[len("segment_"):]) for fn in os.listdir(self._path) if fn.startswith("segment_"))
+
+    def _segment_path(self, number):
+        return os.path.join(self._path, "segment_%06d" % number)
+
+def _group_numpy(result, cols, by, measure, on_lines, start, end):
+    """ Adds totals of one segment to result with bincount, by may be a (key, "hour") pair """
+    prefix = "line_" if on_lines else ""
+    times = cols[prefix + "time"]
+    keep = np.ones(len(times), dtype=bool)
+    if start is not None:
+        keep &= times >= start
+    if end is not None:
+        keep &= times < end
+    if not keep.any():
+        return
+    if measure == "pours":
+        weights = None
+    elif measure == "oz":
+        weights = np.asarray(cols["line_oz"], dtype=np.float64)[keep]
+    else:
+        weights = np.asarray(cols["grams"], dtype=np.float64)[keep]
+
+    # One int code per group, each key shifted to start at 0
+    pair = by if isinstance(by, tuple) else (by,)
+    parts = []
+    for key in pair:
+        if key == "hour":
+            values = times[keep] // HOUR
+        elif key == "user":
+            values = cols[prefix + "user"][keep]
+        elif key == "liquid":
+            values = cols["line_liquid"][keep]
+        else: # Drink of each pour, or of the pour of each line
+            values = (cols["drink"][cols["line_pour"]] if on_lines else cols["drink"])[keep]
+        values = np.asarray(values, dtype=np.int64)
+        low = int(values.min())
+        parts.append((values - low, low, int(values.max()) - low + 1))
+    code = parts[0][0]
+    groups = parts[0][2]
+    for values, _, size in parts[1:]:
+        code = code * size + values
+        groups = groups * size
+
+    if groups <= max(1 << 20, 4 * len(code)): # Dense enough to count every possible code
+        present = np.nonzero(np.bincount(code, minlength=groups))[0]
+        sums = np.bincount(code, weights=weights, minlength=groups)[present]
+    else: # Sparse, like hours over years of liquids
+        present, inverse = np.unique(code, return_inverse=True)
+        sums = np.bincount(inverse.reshape(-1), weights=weights, minlength=len(present))
+
+    for code, total in zip(present.tolist(), sums.tolist()):
+        group = []
+        for _, low, size in reversed(parts):
+            group.append(code % size + low)
+            code = code // size
+        group = [value * HOUR if key == "hour" else value for key, value in zip(pair, reversed(group))]
+        group = tuple(group) if len(pair) > 1 else group[0]
+        result[group] = result.get(group, 0) + total
+
+def _group_python(result, cols, by, measure, on_lines, start, end):
+    """ Fallback of _group_numpy when numpy is not installed """
+    prefix = "line_" if on_lines else ""
+    pair = by if isinstance(by, tuple) else (by,)
+    for i, time in enumerate(cols[prefix + "time"]):
+        if (start is not None and time < start) or (end is not None and time >= end):
+            continue
+        row = cols["line_pour"][i] if on_lines else i
+        group = []
+        for key in pair:
+            if key == "hour":
+                group.append(int(time) // HOUR * HOUR)
+            elif key == "liquid":
+                group.append(cols["line_liquid"][i])
+            else:
+                group.append(cols[key][row])
+        group = tuple(group) if len(pair) > 1 else group[0]
+        value = 1 if measure == "pours" else cols["line_oz"][i] if measure == "oz" else cols["grams"][row]
+        result[group] = result.get(group, 0) + value
+
+def _column_length(folder, name, code):
+    """ Returns number of values in column file, 0 if missing """
+    path = os.path.join(folder, name + COLUMN_EXTENSION)
+    return os.path.getsize(path) // array.array(code).itemsize if os.path.exists(path) else 0
+
+def _read_column(folder, name, code, dtype, count=None):
+    """
+    Returns values of column file, read only numpy memmap if dtype is given and
+    numpy is installed, else an array. count limits values read
+    """
+    path = os.path.join(folder, name + COLUMN_EXTENSION)
+    length = _column_length(folder, name, code)
+    count = length if count is None else min(count, length)
+    if np is not None and dtype is not None:
+        if count == 0:
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode="r", shape=(count,))
+    values = array.array(code)
+    if count:
+        with open(path, "rb") as f:
+            values.fromfile(f, count)
+        if sys.byteorder == "big": # Files are little endian
+            values.byteswap()
+    return values
+
+def _append_column(folder, name, code, values):
+    """ Appends values to column file and fsyncs it """
+    data = array.array(code, values)
+    if sys.byteorder == "big":
+        data.byteswap()
+    with open(os.path.join(folder, name + COLUMN_EXTENSION), "ab") as f:
+        data.tofile(f)
+        f.flush()
+        os.fsync(f.fileno())
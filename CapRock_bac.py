@@ -0,0 +1,103 @@
+"""
+CapRock_bac.py - Batched BAC calculation for every user profile at once
+
+@author: Brian Kachala - ECE 4900 Team 8
+@Last Edited: 10/18/2026
+"""
+import CapRock_backend_util as util
+import CapRock_clock as clock
+import CapRock_instrument as instrument
+import CapRock_user as user
+
+try:
+    import numpy as np
+except ImportError: # Kiosk still runs without numpy, just slower
+    np = None
+
+class BACEngine():
+    """
+    Holds every pour of a set of users in flat arrays (pour time, grams of
+    alcohol, owning user) next to per user Widmark coefficients, so the BAC
+    of all users is one vectorized evaluation of User._bac_equation.
+
+    Params:
+    users (list) - User objects to track
+    """
+
+    def __init__(self, users=()):
+        """
+        Constructor for BAC engine.
+        self._pour_user (array) - Index into self._users of each pour
+        self._pour_time (array) - Epoch seconds of each pour
+        self._pour_grams (array) - Grams of alcohol in each pour
+        self._water (array) - Body water of each user in mL
+        self._rate (array) - BAC eliminated per hour of each user
+        """
+        self._users = []
+        self._signature = None
+        self.update(users)
+
+    def update(self, users):
+        """ Rebuilds arrays if the users, their profiles or their pours changed """
+        users = list(users)
+        signature = tuple(self._user_signature(person) for person in users)
+        if signature == self._signature:
+            return
+        self._signature = signature
+        self._users = users
+
+        pour_user = []
+        pour_time = []
+        pour_grams = []
+        for i, person in enumerate(users):
+            for d in person.get_current_drinks():
+                pour_user.append(i)
+                pour_time.append(d[user.TIME_POS])
+                pour_grams.append(d.grams)
+        water = [person.get_body_water() for person in users]
+        rate = [person.get_elimination_rate() for person in users]
+
+        if np is None:
+            self._pour_user, self._pour_time, self._pour_grams = pour_user, pour_time, pour_grams
+            self._water, self._rate = water, rate
+        else:
+            self._pour_user = np.array(pour_user, dtype=np.intp)
+            self._pour_time = np.array(pour_time, dtype=np.float64)
+            self._pour_grams = np.array(pour_grams, dtype=np.float64)
+            self._water = np.array(water, dtype=np.float64)
+            self._rate = np.array(rate, dtype=np.float64)
+
+    @instrument.timed("bac.bac_all")
+    def bac_all(self, now=None):
+        """
+        Returns current BAC of every user, in the order given to update()
+        @param now (float): Epoch seconds to evaluate at, defaults to current time
+        """
+        now = clock.now() if now is None else now
+        if np is None:
+            return self._bac_all_python(now)
+
+        hours = (now - self._pour_time) / (60*60)
+        init_bac = self._pour_grams / self._water[self._pour_user] * util.BLOOD_WATER_FRACTION * 100
+        bac = init_bac - self._rate[self._pour_user] * hours
+        bac[bac <= 0] = 0 # Fully eliminated drinks add nothing
+        return np.bincount(self._pour_user, weights=bac, minlength=len(self._users)).tolist()
+
+    def bac_by_name(self, now=None):
+        """ Returns {user_name:current BAC} """
+        return dict(zip([person.get_name() for person in self._users], self.bac_all(now)))
+
+    def _bac_all_python(self, now):
+        """ Fallback of bac_all when numpy is not installed """
+        result = [0.0] * len(self._users)
+        for i, t, grams in zip(self._pour_user, self._pour_time, self._pour_grams):
+            bac = grams / self._water[i] * util.BLOOD_WATER_FRACTION * 100 - self._rate[i] * ((now - t) / (60*60))
+            if bac > 0:
+                result[i] = result[i] + bac
+        return result
+
+    @staticmethod
+    def _user_signature(person):
+        drinks = person.get_current_drinks()
+        last = (drinks[-1][user.TIME_POS], id(drinks[-1][user.DRINK_POS])) if drinks else None
+        return (id(person), person.get_weight(), person.get_sex(), person.get_experience(), len(drinks), last)
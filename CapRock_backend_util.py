@@ -1,13 +1,23 @@
 """
 CapRock_backed_utility  - List of all constants, enums, functions and Exceptions used in CapRock Software
 @author: Brian Kachala - ECE 4900 Team 8
-@Last Edited: 4/10/2020
+@Last Edited: 10/18/2026
 """
 from enum import Enum
+import copy
+import gzip
+import json
 import logging
+import logging.handlers
 import os
+import queue
+import shutil
+import threading
 from datetime import datetime
 import sys
+import CapRock_instrument as instrument
+
+log = logging.getLogger(__name__)
 
 MAX_LIQ_PER_DRINK = 4
 MAX_LIQUIDS_STORED = 64
@@ -18,8 +28,28 @@ NAME_MAX_LEN = 12
 DRINK_MAX_LEN = 24
 LIQUID_MAX_LEN = 24
 SESSION_TIME = 8 # Number of hours to store drinks
+LEGAL_BAC_LIMIT = 0.08 # BAC percent shown as the limit on profile screen
+TIME_FORMAT = "%m-%d-%y %H:%M:%S" # Stored pour times
 MALE_WATER_CONST = .58
 FEMALE__WATER_CONST = .49
+LBS_PER_KG = 2.2046
+ML_PER_OZ = 29.57
+ETHANOL_DENSITY = .79 # g/mL
+BLOOD_WATER_FRACTION = .806
+STORAGE_BACKEND = "sharded" # Key of CapRock_storage.BACKENDS: "sharded", "text" or "sqlite"
+SERVER_HOST = "127.0.0.1" # Ordering server only takes local orders by default
+SERVER_PORT = 8080
+SCALE_MODE = "kiosk" # Key of SCALE_MODES, changed with configure_scale
+NEXT_IDS_PATH = "backend/next_ids.txt" # Next free ID of each kind for the text backends
+JOURNAL_SEQ_PATH = "backend/journal_seq.txt" # Last pour journal record in the text backends' catalog
+LOG_PATH = "logs/caprock.jsonl"
+LOG_MAX_BYTES = 1 << 20 # Log is rotated and gzipped once it grows past this
+LOG_BACKUPS = 10 # Rotated logs kept, oldest is deleted
+LOG_LEVELS = {"":logging.INFO} # {logger name:level}, "" is every module without its own level
+
+# Catalog limits and storage backend of each scale mode
+SCALE_MODES = {"kiosk":{"MAX_LIQUIDS_STORED":64, "MAX_DRINKS_STORED":16, "MAX_USERS":8, "STORAGE_BACKEND":"sharded"},
+               "venue":{"MAX_LIQUIDS_STORED":1024, "MAX_DRINKS_STORED":20000, "MAX_USERS":20000, "STORAGE_BACKEND":"sqlite"}}
 
 class Sex(Enum):
     Male = "Male"
@@ -41,40 +71,261 @@ class Container(Enum):
 class CapRockError(Exception):
     pass
 
-def init_logging():
-    """ Initialized logging module """
-    if not os.path.exists('logs'):
-        os.mkdir('logs')
-    start_time = datetime.now().strftime("%d_%m_%Y_%H_%M_%S")
-    logging.basicConfig(filename='logs/%s.log' % start_time,level=logging.DEBUG)
+_next_ids = {"liquids":1, "drinks":1, "users":1} # IDs are never handed out twice, 0 means no object
+_ids_lock = threading.Lock()
+
+def claim_id(kind, obj_id=None):
+    """
+    Returns obj_id of a stored object and makes sure no new object gets it,
+    a new ID if obj_id is None
+    @param kind (string): "liquids", "drinks" or "users"
+    """
+    with _ids_lock:
+        if obj_id is None:
+            obj_id = _next_ids[kind]
+        elif not isinstance(obj_id, int) or obj_id < 1:
+            raise CapRockError("Invalid ID %r" % (obj_id,))
+        _next_ids[kind] = max(_next_ids[kind], obj_id + 1)
+        return obj_id
+
+def next_ids():
+    """ Returns {kind:next free ID}, stored so IDs of removed objects are not reused after a restart """
+    with _ids_lock:
+        return dict(_next_ids)
+
+def reserve_ids(stored):
+    """ Skips IDs below stored {kind:next free ID} read back from storage """
+    with _ids_lock:
+        for kind, next_id in stored.items():
+            if kind in _next_ids:
+                _next_ids[kind] = max(_next_ids[kind], next_id)
+
+def format_ref(obj_id):
+    """ Returns stored reference to an object ID, e.g. '#12' """
+    return "#%d" % obj_id
+
+def parse_ref(text):
+    """ Returns ID of a stored reference, or text itself for names stored before IDs existed """
+    if text[:1] == "#" and text[1:].isdecimal():
+        return int(text[1:])
+    return text
+
+class RefIndex():
+    """
+    Finds loaded objects by stored reference. ID references index a list,
+    name references of files saved before IDs existed use a dict built the
+    first time one is seen.
+
+    Params:
+    objs (list) - Loaded liquid, drink or user objects with unique IDs
+    """
+
+    def __init__(self, objs):
+        self._objs = objs
+        self._by_id = [None] * (max((obj.get_id() for obj in objs), default=0) + 1)
+        for obj in objs:
+            self._by_id[obj.get_id()] = obj
+        self._by_name = None
+
+    def get(self, ref):
+        """ Returns object of ID or name ref, None if it is not loaded """
+        if isinstance(ref, int):
+            return self._by_id[ref] if 0 <= ref < len(self._by_id) else None
+        if self._by_name is None:
+            self._by_name = {obj.get_name():obj for obj in self._objs}
+        return self._by_name.get(ref)
+
+def unique_ids(objs, kind):
+    """ Returns objs without the ones repeating an earlier ID, e.g. from a hand edited file """
+    seen = set()
+    result = []
+    for obj in objs:
+        if obj.get_id() in seen:
+            log.error("%s %s repeats ID %d, skipping", kind, obj.get_name(), obj.get_id())
+            continue
+        seen.add(obj.get_id())
+        result.append(obj)
+    return result
+
+def load_next_ids(path=NEXT_IDS_PATH):
+    """ Reserves IDs stored in path by save_next_ids and returns them, a missing file gives {} """
+    stored = {}
+    try:
+        with open(path, "r") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 2 and parts[1].isdecimal():
+                    stored[parts[0]] = int(parts[1])
+    except OSError:
+        return stored
+    reserve_ids(stored)
+    return stored
+
+def save_next_ids(stored, path=NEXT_IDS_PATH):
+    """ Stores {kind:next free ID} from next_ids() in path """
+    write_atomic(path, "".join("%s %d\n" % item for item in stored.items()))
+
+def load_journal_seq(path=JOURNAL_SEQ_PATH):
+    """ Returns sequence number stored in path by save_journal_seq, None if there is none """
+    try:
+        with open(path, "r") as f:
+            text = f.read().strip()
+    except OSError:
+        return None
+    return int(text) if text.isdecimal() else None
+
+def save_journal_seq(seq, path=JOURNAL_SEQ_PATH):
+    """ Stores last pour journal sequence number held by the saved catalog in path """
+    write_atomic(path, "%d\n" % seq)
 
-def load_storage():
+def write_atomic(path, text, sync_folder=True):
+    """
+    Writes text to a temp file, fsyncs it and renames it over path. Storage
+    files are on disk before the journal sequence or checkpoint that relies on them
+    @param sync_folder (bool): Fsync folder of path so the rename survives power loss, see sync_dir
+    """
+    temp = path + ".tmp"
+    with open(temp, "w") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp, path)
+    if sync_folder:
+        sync_dir(os.path.dirname(path))
+
+def sync_dir(folder):
+    """ Fsyncs folder so renames and removals in it are on disk, skipped where folders cannot be opened (Windows) """
+    try:
+        fd = os.open(folder or ".", os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def configure_scale(mode):
+    """
+    Sets catalog limits and storage backend of scale mode, call before load_storage
+    @param mode (string): Key of SCALE_MODES, "kiosk" for one machine or "venue" for thousands of profiles and drinks
+    """
+    global SCALE_MODE
+    if mode not in SCALE_MODES:
+        raise CapRockError("Unknown scale mode %s" % mode)
+    globals().update(SCALE_MODES[mode])
+    SCALE_MODE = mode
+
+class JSONFormatter(logging.Formatter):
+    """ Formats a record as one JSON object per line """
+
+    def format(self, record):
+        entry = {"time":record.created, "level":record.levelname, "module":record.name,
+                 "thread":record.threadName, "msg":record.getMessage()}
+        if record.exc_info:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry)
+
+class _RecordQueueHandler(logging.handlers.QueueHandler):
+    """ Queues records with their message merged but the traceback kept apart, for JSONFormatter """
+
+    def prepare(self, record):
+        record = copy.copy(record) # Other handlers may still use the original
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None # Tracebacks hold frames, do not send them to another thread
+        return record
+
+def _gzip_rotate(source, dest):
+    """ Rotator of the log file, compresses rotated log to dest """
+    with open(source, "rb") as f_in, gzip.open(dest, "wb") as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    os.remove(source)
+
+_log_listener = None
+
+def init_logging(levels=None, path=LOG_PATH):
+    """
+    Initialized logging module. Threads only put records on a queue, a
+    listener thread writes them to path as JSON lines, rotated to path.1.gz
+    ... once it passes LOG_MAX_BYTES. Call stop_logging() before exit.
+    @param levels (dict): {module name:level name or number}, merged over LOG_LEVELS.
+        A module below its level skips the record before the message is formatted
+    """
+    global _log_listener
+    stop_logging()
+    folder = os.path.dirname(path)
+    if folder and not os.path.exists(folder):
+        os.makedirs(folder)
+    file_handler = logging.handlers.RotatingFileHandler(path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUPS)
+    file_handler.namer = lambda name: name + ".gz"
+    file_handler.rotator = _gzip_rotate
+    file_handler.setFormatter(JSONFormatter())
+
+    records = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_RecordQueueHandler(records))
+    merged = dict(LOG_LEVELS)
+    merged.update(levels or {})
+    for name, level in merged.items():
+        logging.getLogger(name or None).setLevel(level.upper() if isinstance(level, str) else level)
+    _log_listener = logging.handlers.QueueListener(records, file_handler)
+    _log_listener.start()
+
+def stop_logging():
+    """ Writes queued records and closes log file, no-op if logging was not initialized """
+    global _log_listener
+    if _log_listener is None:
+        return
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        if isinstance(handler, logging.handlers.QueueHandler):
+            root.removeHandler(handler)
+    _log_listener.stop()
+    for handler in _log_listener.handlers:
+        handler.close()
+    _log_listener = None
+
+def load_storage(backend=None):
     """
     Returns tuple of previus stored data
     (Users, Drinks, Liquids)
+    @param backend (string): Key of CapRock_storage.BACKENDS, defaults to STORAGE_BACKEND
     """
-    if not os.path.exists('backend'):
-        raise FileNotFoundError("Backend directory not available")
-
-    liquids = load_liquid_info()
-    drinks = load_drink_info(liquids)
-    users = load_user_info(drinks)
-    return users, drinks, liquids
+    import CapRock_storage as storage
+    with instrument.timer("storage.load"):
+        return storage.get_backend(backend).load()
 
-def save_storage(users, drinks, liquids):
-    """ Saves information to storage """
+def stored_journal_seq(backend=None):
+    """ Returns last pour journal sequence number in the loaded catalog, None if it was saved without one """
+    import CapRock_storage as storage
+    return storage.get_backend(backend).journal_seq
 
-    if not os.path.exists('backend'):
-        os.mkdir('backend')
+def save_storage(users, drinks, liquids, backend=None, changed=None, journal_seq=None):
+    """
+    Saves information to storage. Returns True if everything was saved
+    @param changed (dict): {kind:set of objs changed since the last save or None}, see StorageBackend.save
+    @param journal_seq (int): Last pour journal sequence number the catalog holds, see StorageBackend.save
+    """
+    import CapRock_storage as storage
     try:
-        save_user_info(users)
-        save_drink_info(drinks)
-        save_liquid_info(liquids)
+        with instrument.timer("storage.save"):
+            storage.get_backend(backend).save(users, drinks, liquids, changed, journal_seq)
+        return True
     except Exception as e:
-        logging.error("%s : Failed to save user info!" % str(e))
+        log.error("%s : Failed to save user info!", str(e))
+        return False
 
 def findId(obj, name):
-    """ Finds index of liquid, drink, or user profile based on name """
+    """
+    Finds index of liquid, drink, or user profile based on name
+    NOTE: Linear scan, use CapRock_registry.Registry lookups for anything repeated
+    """
     i = 0
     for d in obj:
         if name == d.get_name():
@@ -83,134 +334,170 @@ def findId(obj, name):
     # If this hits the object doesnt exist
     return -1
 
-def load_user_info(drinks):
-    """ Loads previous user info from storage """
-    import CapRock_user as user
-    user_list = []
-    try:
-        with open("backend/user_storage.txt", "r") as f:
-            content = f.read()
-            users = content.split("\n-----\n")
-            while "" in users: # Remove ending whitespaces
-                    users.remove("")
-            user_num = 0
-            for person in users:
-                temp = person.split('\n')
-                while "" in temp: # Remove ending whitespaces
-                    temp.remove("")
-                user_list.append(user.User(temp[0], Sex[temp[1]], float(temp[2]), Experience[temp[3]]))
-                j = 0
-                while j < int(temp[4]): # All remaining liquids
-                    num = findId(drinks, temp[6+j*2])
-                    if (num >= 0): # If drink was deleted dont add
-                        user_list[user_num].add_drink(drinks[num], time=temp[5+j*2])
-                    j = j + 1
-                user_num = user_num + 1
-        return user_list
+def parse_pour_time(text):
+    """ Returns epoch seconds of a pour time stored as TIME_FORMAT """
+    return datetime.strptime(text, TIME_FORMAT).timestamp()
 
-    except Exception as e:
-        logging.error("%s : Failed to load user storage!" % str(e))
-        return []
+def format_pour_time(epoch):
+    """ Returns epoch seconds of a pour as TIME_FORMAT text for storage """
+    return datetime.fromtimestamp(epoch).strftime(TIME_FORMAT)
 
-def load_drink_info(liquids):
-    """ Loads previous drink info from storage """
-    import CapRock_drink as drink
-    drink_list = []
-    try:
-        with open("backend/drink_storage.txt", "r") as f:
-            content = f.read()
-            drinks = content.split("-----\n")
-            while "" in drinks: # Remove ending whitespaces
-                    drinks.remove("")
-            drink_num = 0
-            for single in drinks:
-                temp = single.split('\n')
-                while "" in temp: # Remove ending whitespaces
-                    temp.remove("")
-                num = findId(liquids, temp[2])
-                if num >= 0: # If deleted before dont worry about it
-                    drink_list.append(drink.Drink(temp[0], (liquids[num], float(temp[3])))) # First Liquid
-                j = 0
-                while j < (int(temp[1]) - 1)  and int(temp[1]) > 0: # All remaining liquids
-                    num = findId(liquids, temp[4+j*2])
-                    if num >= 0: # If deleted before dont worry about it
-                        drink_list[drink_num].add_liquid((liquids[num], float(temp[5+j*2])))
-                    j = j + 1
-                drink_num = drink_num + 1
-        return drink_list
+def user_from_record(rec, drink_refs):
+    """
+    Creates user obj from a CapRock_record_reader.UserRecord
+    @param drink_refs (RefIndex): Loaded drinks
+    """
+    import CapRock_user as user
+    person = user.User(rec.name, rec.sex, rec.weight, rec.experience, obj_id=rec.id)
+    for time, ref in rec.drinks:
+        dr = drink_refs.get(ref)
+        if dr is not None: # If drink was deleted dont add
+            try:
+                person.add_drink(dr, time=parse_pour_time(time))
+            except ValueError:
+                log.error("Bad pour time %r of %s, skipping pour", time, rec.name)
+    return person
 
-    except Exception as e:
-        logging.error("%s : Failed to load drink storage!" % str(e))
-        return []
+def drink_from_record(rec, liquid_refs):
+    """
+    Creates drink obj from a CapRock_record_reader.DrinkRecord
+    Returns None if none of its liquids are stored anymore
+    @param liquid_refs (RefIndex): Loaded liquids
+    """
+    import CapRock_drink as drink
+    lines = []
+    for ref, oz in rec.liquids:
+        liq = liquid_refs.get(ref)
+        if liq is not None: # If deleted before dont worry about it
+            lines.append((liq, oz))
+    return drink.Drink(rec.name, *lines, obj_id=rec.id) if lines else None
 
-def load_liquid_info():
-    """ Loads previous liquid info from storage """
+def liquid_from_record(rec):
+    """ Creates liquid obj from a CapRock_record_reader.LiquidRecord """
     import CapRock_liquid as liquid
-    liquid_list = []
-    try:
-        with open("backend/liquid_storage.txt", "r") as f:
-            content = f.read()
-            liquids = content.split("\n-----\n")
-            while "" in liquids: # Remove ending whitespaces
-                liquids.remove("")
-            for liq in liquids:
-                temp = liq.split("\n")
-                while "" in temp: # Remove ending whitespaces
-                    temp.remove("")
-                liquid_list.append(liquid.Liquid(temp[0], float(temp[1]), float(temp[2]), float(temp[3]), Container[temp[4]]))
-        return liquid_list
+    return liquid.Liquid(rec.name, rec.abv, rec.density, rec.volume, rec.container, obj_id=rec.id)
 
-    except Exception as e:
-        logging.error("%s : Failed to load drink storage!" % str(e))
+def reserve_record_ids(records, kind):
+    """ Reserves IDs of records before any is created, so records without one get IDs none of them has """
+    reserve_ids({kind:max((rec.id + 1 for rec in records if rec.id is not None), default=1)})
+
+def format_user_record(person):
+    """ Returns stored text of one user obj, without separator. Pours reference drinks by ID """
+    text = "%s\n%s\n%s\n%f\n%s\n%d" % (format_ref(person.get_id()), person.get_name(), person.get_sex(),
+                                       person.get_weight(), person.get_experience(), len(person.get_current_drinks()))
+    for d in person.get_current_drinks():
+        text = text + "\n%s\n%s" % (format_pour_time(d[0]), format_ref(d[1].get_id()))
+    return text
+
+def format_drink_record(dr):
+    """ Returns stored text of one drink obj, without separator. Liquids are referenced by ID """
+    text = "%s\n%s\n%d" % (format_ref(dr.get_id()), dr.get_name(), len(dr.get_liquids_obj()))
+    for liq in dr.get_liquids_obj():
+        text = text + "\n%s\n%f" % (format_ref(liq[0].get_id()), liq[1])
+    return text
+
+def format_liquid_record(liq):
+    """ Returns stored text of one liquid obj, without separator """
+    return "%s\n%s\n%f\n%f\n%f\n%s" % (format_ref(liq.get_id()), liq.get_name(), liq.get_abv(), liq.get_density(),
+                                        liq.get_volume_left(), liq.get_container())
+
+def read_storage_file(path, kind):
+    """
+    Returns parsed records of kind from path in one pass. Malformed records are
+    logged with their line number and skipped, a missing file gives []
+    """
+    import CapRock_record_reader as reader
+    errors = []
+    try:
+        records = list(reader.read_records(path, kind, errors))
+    except OSError as e:
+        log.error("%s : Failed to load %s storage!", str(e), kind)
         return []
+    for e in errors:
+        log.error("%s : Skipped malformed record!", str(e))
+    return records
+
+def load_user_info(drinks, legacy=None):
+    """
+    Loads previous user info from storage
+    @param legacy (set): Users read from records without an ID are added, their file must be rewritten
+    """
+    drink_refs = RefIndex(drinks)
+    records = read_storage_file("backend/user_storage.txt", "users")
+    reserve_record_ids(records, "users")
+    user_list = []
+    for rec in records:
+        try:
+            user_list.append(user_from_record(rec, drink_refs))
+            if rec.id is None and legacy is not None:
+                legacy.add(user_list[-1])
+        except CapRockError as e:
+            log.error("%s : Failed to load user %s!", str(e), rec.name)
+    return unique_ids(user_list, "users")
+
+def load_drink_info(liquids, legacy=None):
+    """
+    Loads previous drink info from storage
+    @param legacy (set): Drinks read from records without an ID are added, their file must be rewritten
+    """
+    liquid_refs = RefIndex(liquids)
+    records = read_storage_file("backend/drink_storage.txt", "drinks")
+    reserve_record_ids(records, "drinks")
+    drink_list = []
+    for rec in records:
+        try:
+            dr = drink_from_record(rec, liquid_refs)
+        except CapRockError as e:
+            log.error("%s : Failed to load drink %s!", str(e), rec.name)
+            continue
+        if dr is not None:
+            drink_list.append(dr)
+            if rec.id is None and legacy is not None:
+                legacy.add(dr)
+    return unique_ids(drink_list, "drinks")
+
+def load_liquid_info(legacy=None):
+    """
+    Loads previous liquid info from storage
+    @param legacy (set): Liquids read from records without an ID are added, their file must be rewritten
+    """
+    records = read_storage_file("backend/liquid_storage.txt", "liquids")
+    reserve_record_ids(records, "liquids")
+    liquid_list = []
+    for rec in records:
+        try:
+            liquid_list.append(liquid_from_record(rec))
+            if rec.id is None and legacy is not None:
+                legacy.add(liquid_list[-1])
+        except CapRockError as e:
+            log.error("%s : Failed to load liquid %s!", str(e), rec.name)
+    return unique_ids(liquid_list, "liquids")
 
 def save_user_info(users):
     """ Saves user information to 'backend/user_storage.txt' """
     try:
-        with open("backend/user_storage.txt", "w") as f:
-            for person in users:
-                f.write("%s\n" % person.get_name())
-                f.write("%s\n" % person.get_sex())
-                f.write("%f\n" % person.get_weight())
-                f.write("%s\n" % person.get_experience())
-                f.write("%d" % len(person.get_current_drinks()))
-                for d in person.get_current_drinks():
-                    f.write("\n%s\n%s" % (d[0], d[1].get_name()))
-                f.write("\n-----\n")
-            logging.info("Saved current drink storage!")
+        write_atomic("backend/user_storage.txt", "".join(format_user_record(person) + "\n-----\n" for person in users))
+        log.info("Saved current drink storage!")
     except Exception as e:
-        logging.error("%s : Failed to save drink storage!" % str(e))
+        log.error("%s : Failed to save drink storage!", str(e))
         raise CapRockError("drink_storage.txt failed to save!")
 
 def save_drink_info(drinks):
     """ Saves drink information to 'backend/drink_storage.txt' """
     try:
-        with open("backend/drink_storage.txt", "w") as f:
-            for d in drinks:
-                f.write("%s\n" % d.get_name())
-                f.write("%d\n" % len(d.get_liquids_name()))
-                for liq in d.get_liquids_name():
-                    f.write("%s\n%f\n" % (liq[0], liq[1]))
-                f.write("-----\n")
-            logging.info("Saved current drink storage!")
+        write_atomic("backend/drink_storage.txt", "".join(format_drink_record(d) + "\n-----\n" for d in drinks))
+        log.info("Saved current drink storage!")
     except Exception as e:
-        logging.error("%s : Failed to save drink storage!" % str(e))
+        log.error("%s : Failed to save drink storage!", str(e))
         raise CapRockError("drink_storage.txt failed to save!")
 
 def save_liquid_info(liquids):
     """ Saves liquid information to 'backend/liquid_storage.txt' """
     try:
-        with open("backend/liquid_storage.txt", "w") as f:
-            for liq in liquids:
-                f.write("%s\n" % liq.get_name())
-                f.write("%f\n" % liq.get_abv())
-                f.write("%f\n" % liq.get_density())
-                f.write("%f\n" % liq.get_volume_left())
-                f.write("%s" % liq.get_container())
-                f.write("\n-----\n")
-            logging.info("Saved current liquid storage!")
+        write_atomic("backend/liquid_storage.txt", "".join(format_liquid_record(liq) + "\n-----\n" for liq in liquids))
+        log.info("Saved current liquid storage!")
     except Exception as e:
-        logging.error("%s : Failed to save liquid storage!" % str(e))
+        log.error("%s : Failed to save liquid storage!", str(e))
         raise CapRockError("liquid_storage.txt failed to save!")
 
 def current_liquids(liquids):
@@ -0,0 +1,556 @@
+"""
+CapRock_benchmark.py - Benchmarks of CapRock backend code, runs without the GUI
+
+Usage: python CapRock_benchmark.py parser [--pours N]
+       python CapRock_benchmark.py models [--drinks N]
+       python CapRock_benchmark.py scale [--counts N,N,...] [--backend NAME]
+       python CapRock_benchmark.py archive [--pours N]
+       python CapRock_benchmark.py suite [--sizes N,N,...] [--json PATH] [--compare BASELINE] [--threshold F]
+       python CapRock_benchmark.py startup [--runs N] [--scale NAME] [--count N]
+
+@author: Brian Kachala - ECE 4900 Team 8
+@Last Edited: 10/18/2026
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+import tracemalloc
+from datetime import datetime, timedelta
+import CapRock_archive as archive
+import CapRock_backend_util as util
+import CapRock_drink as drink
+import CapRock_liquid as liquid
+import CapRock_record_reader as reader
+import CapRock_user as user
+import CapRock_service as service
+import CapRock_storage as storage
+import CapRock_widgets as widgets
+
+def write_synthetic_text_storage(folder, liquids=64, drinks=util.MAX_DRINKS_STORED, users=util.MAX_USERS, pours=100000, seed=0):
+    """ Writes legacy format liquid, drink and user files with pours spread over users """
+    rng = random.Random(seed)
+    liquid_names = ["Liquid %d" % i for i in range(liquids)]
+    drink_names = ["Drink %d" % i for i in range(drinks)]
+    containers = [c.name for c in util.Container]
+    with open(os.path.join(folder, "liquid_storage.txt"), "w") as f:
+        for name in liquid_names:
+            f.write("%s\n%f\n%f\n%f\n%s\n-----\n" % (name, rng.random() * .5, 1.0, rng.randint(0, 32) / 2, rng.choice(containers)))
+    with open(os.path.join(folder, "drink_storage.txt"), "w") as f:
+        for name in drink_names:
+            parts = rng.sample(liquid_names, rng.randint(1, util.MAX_LIQ_PER_DRINK))
+            f.write("%s\n%d\n" % (name, len(parts)))
+            for liq in parts:
+                f.write("%s\n%f\n" % (liq, rng.randint(1, 8) / 2))
+            f.write("-----\n")
+    start = datetime.now() - timedelta(hours=util.SESSION_TIME)
+    with open(os.path.join(folder, "user_storage.txt"), "w") as f:
+        for i in range(users):
+            count = pours // users + (1 if i < pours % users else 0)
+            f.write("User %d\n%s\n%f\n%s\n%d" % (i, rng.choice(list(util.Sex)).name, 100 + rng.random() * 150,
+                                                   rng.choice(list(util.Experience)).name, count))
+            for _ in range(count):
+                pour_time = start + timedelta(seconds=rng.randint(0, util.SESSION_TIME * 3600))
+                f.write("\n%s\n%s" % (pour_time.strftime(util.TIME_FORMAT), rng.choice(drink_names)))
+            f.write("\n-----\n")
+
+def _legacy_split_read(path, separator):
+    """ Original read, split, remove-blanks and offset addressing kept for comparison """
+    with open(path, "r") as f:
+        content = f.read()
+    records = content.split(separator)
+    while "" in records:
+        records.remove("")
+    result = []
+    for rec in records:
+        temp = rec.split("\n")
+        while "" in temp:
+            temp.remove("")
+        drinks = []
+        j = 0
+        while j < int(temp[4]):
+            drinks.append((temp[5+j*2], temp[6+j*2]))
+            j = j + 1
+        result.append((temp[0], temp[1], float(temp[2]), temp[3], drinks))
+    return result
+
+class _LegacyDrink():
+    """ Original dict backed drink with a recipe list copied on every get, kept for comparison """
+
+    def __init__(self, name, *liquid_info):
+        self._liquids = []
+        self._name = name
+        self._total_volume = 0
+        self._dirty = True
+        self._observer = None
+        for liq in liquid_info:
+            self._liquids.append(liq)
+        abv_sum = 0
+        for liq in self._liquids:
+            abv_sum = abv_sum + (liq[0].get_abv()*liq[1])
+            self._total_volume = self._total_volume + liq[1]
+        self._abv = abv_sum/self._total_volume
+
+    def get_liquids_obj(self):
+        liquid_list = []
+        for liq in self._liquids:
+            liquid_list.append((liq[0], liq[1]))
+        return liquid_list
+
+    def get_liquids_name(self):
+        liquid_list = []
+        for liq in self._liquids:
+            liquid_list.append((liq[0].get_name(), liq[1]))
+        return liquid_list
+
+def _traced(func):
+    """ Returns (result of func(), bytes still allocated by it) """
+    tracemalloc.start()
+    result = func()
+    current = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, current
+
+def _measure(func, repeat=3):
+    """ Returns (best seconds, peak traced bytes) of func(), memory is traced in a separate run """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak
+
+def bench_parser(pours=100000):
+    """ Compares legacy split parsing with the streaming reader on a user file with pours """
+    with tempfile.TemporaryDirectory() as folder:
+        write_synthetic_text_storage(folder, pours=pours)
+        path = os.path.join(folder, "user_storage.txt")
+        size = os.path.getsize(path)
+        results = {"legacy split":_measure(lambda: _legacy_split_read(path, "\n-----\n")),
+                   "streaming records":_measure(lambda: list(reader.read_records(path, "users"))),
+                   "streaming, no keep":_measure(lambda: sum(len(rec.drinks) for rec in reader.read_records(path, "users")))}
+
+    print("user_storage.txt with %d pours (%.1f MB)" % (pours, size / 1e6))
+    print("%-20s %10s %14s" % ("parser", "time [s]", "peak mem [MB]"))
+    for name, res in results.items():
+        print("%-20s %10.3f %14.2f" % (name, res[0], res[1] / 1e6))
+    return results
+
+def bench_models(drinks=100000, seed=0):
+    """ Compares memory of dict backed and __slots__ drinks and what reading their recipes allocates """
+    rng = random.Random(seed)
+    liquids = [liquid.Liquid("Liquid %d" % i, rng.random() * .5, 1.0, 8) for i in range(64)]
+    recipes = [[(liq, rng.randint(1, 8) / 2) for liq in rng.sample(liquids, rng.randint(1, util.MAX_LIQ_PER_DRINK))]
+               for _ in range(drinks)]
+    names = ["Drink %d" % i for i in range(drinks)]
+
+    results = {}
+    for label, cls in (("dict + list", _LegacyDrink), ("__slots__ + tuple", drink.Drink)):
+        made, size = _traced(lambda: [cls(name, *recipe) for name, recipe in zip(names, recipes)])
+        for dr in made: # First read fills caches
+            dr.get_liquids_name()
+        views, view_size = _traced(lambda: [(dr.get_liquids_obj(), dr.get_liquids_name()) for dr in made])
+        start = time.perf_counter()
+        for _ in range(5): # Like a refresh loop reading every recipe
+            for dr in made:
+                dr.get_liquids_obj()
+                dr.get_liquids_name()
+        results[label] = (size, view_size, (time.perf_counter() - start) / 5)
+        del made, views
+
+    print("%d drinks over %d liquids" % (drinks, len(liquids)))
+    print("%-18s %14s %16s %16s" % ("model", "drinks [MB]", "one read [MB]", "one read [ms]"))
+    for name, res in results.items():
+        print("%-18s %14.2f %16.2f %16.1f" % (name, res[0] / 1e6, res[1] / 1e6, res[2] * 1e3))
+    return results
+
+def _set_scale(mode, backend=None):
+    """
+    Switches util to scale mode and backend with no shared backend instances open.
+    Returns previous state for _restore_scale
+    """
+    previous = (util.SCALE_MODE, util.STORAGE_BACKEND, dict(storage._instances))
+    util.configure_scale(mode) # Unknown mode raises before anything changed
+    storage._instances.clear()
+    if backend is not None:
+        util.STORAGE_BACKEND = backend
+    return previous
+
+def _restore_scale(previous):
+    """ Closes backends opened since _set_scale and puts back its previous state """
+    mode, backend, instances = previous
+    for store in storage._instances.values():
+        store.close()
+    storage._instances.clear()
+    storage._instances.update(instances)
+    util.configure_scale(mode)
+    util.STORAGE_BACKEND = backend
+
+def bench_scale(counts=(1000, 4000, 16000), backend="sqlite", pours=200, seed=0):
+    """
+    Venue scale load test, for each count a catalog of that many drinks and
+    profiles (5 pours each) is stored with backend, then startup (load, service
+    and name indexes), one pour and one save after a pour are timed. Startup
+    should grow linearly with the catalog, pour and save should stay flat.
+    """
+    previous = _set_scale("venue", backend)
+    try:
+        results = _bench_scale(counts, backend, pours, seed)
+    finally:
+        _restore_scale(previous)
+
+    print("%s storage, drinks and profiles per catalog, %d pours each" % (backend, pours))
+    print("%8s %12s %16s %14s %14s %14s" % ("count", "startup [s]", "startup/obj [us]", "pour p50 [ms]", "pour p99 [ms]", "save p50 [ms]"))
+    for count, res in results.items():
+        print("%8d %12.3f %16.1f %14.3f %14.3f %14.3f" % (count, res[0], res[0] / (2 * count) * 1e6, res[1] * 1e3, res[2] * 1e3, res[3] * 1e3))
+    return results
+
+def _bench_scale(counts, backend, pours, seed):
+    """ Returns {count:(startup, pour p50, pour p99, save p50)} of bench_scale, util already in venue mode """
+    rng = random.Random(seed)
+    results = {}
+    cwd = os.getcwd()
+    for count in counts:
+        with tempfile.TemporaryDirectory() as folder:
+            os.chdir(folder) # Backends store in 'backend/' of working directory
+            try:
+                os.mkdir("backend")
+                write_synthetic_text_storage("backend", drinks=count, users=count, pours=count * 5, seed=seed)
+                if backend == "sqlite":
+                    storage.migrate_text_to_sqlite(source="text")
+                elif backend != "text":
+                    storage.BACKENDS[backend]().save(*storage.TextStorage().load())
+
+                store = storage.get_backend(backend)
+                store.close() # Reopens in this folder
+                start = time.perf_counter()
+                users, drinks, liquids = store.load()
+                core = service.CapRockService(users, drinks, liquids)
+                for kind in ("liquids", "drinks", "users"): # Name search the GUI builds
+                    widgets.SearchIndex(getattr(core.registry, kind), key=lambda obj: obj.get_name())
+                startup = time.perf_counter() - start
+                core.subscribe(lambda *event: None) # Events go out like they do to the GUI
+
+                loaded = [liq for liq in core.stored_liquids.values() if liq is not None]
+                for liq in core.registry.liquids: # Synthetic liquids can share a container, only one is in it
+                    if liq not in loaded and liq.get_container() != util.Container.NA.name:
+                        liq.remove_container()
+                if not core.feasibility.makeable_drinks():
+                    core.add(drink.Drink("Bench Pour", (loaded[0], 1.0)))
+                pour_times = []
+                save_times = []
+                for i in range(pours):
+                    for liq in loaded: # Refill, not timed
+                        liq.change_volume_left(util.MAX_VOLUME_OZ)
+                    dr = rng.choice(core.feasibility.makeable_drinks()[:50])
+                    person = rng.choice(core.registry.users)
+                    start = time.perf_counter()
+                    core.pour(dr, person)
+                    pour_times.append(time.perf_counter() - start)
+                    if i % 10 == 0:
+                        start = time.perf_counter()
+                        core.snapshot()
+                        save_times.append(time.perf_counter() - start)
+                store.close()
+            finally:
+                os.chdir(cwd)
+        pour_times.sort()
+        save_times.sort()
+        results[count] = (startup, pour_times[len(pour_times) // 2], pour_times[int(len(pour_times) * .99)],
+                          save_times[len(save_times) // 2])
+    return results
+
+def bench_startup(runs=5, scale="kiosk", count=None, seed=0):
+    """
+    Cold start of CapRock_main with --startup-timing. Every run is a new
+    process started in a folder with a fresh copy of a stored catalog of count
+    drinks and profiles (catalog limits of scale by default). Process time is
+    from spawning it to the timing line it prints once the first frame is
+    drawn, so interpreter start is included. Needs a display.
+    """
+    previous = _set_scale(scale) # Only the template catalog is stored in this process
+    drinks = count or util.MAX_DRINKS_STORED
+    users = count or util.MAX_USERS
+    main_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "CapRock_main.py")
+    timings = []
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as folder:
+        template = os.path.join(folder, "template")
+        os.mkdir(template)
+        os.chdir(template) # Backends store in 'backend/' of working directory
+        try:
+            os.mkdir("backend")
+            write_synthetic_text_storage("backend", drinks=drinks, users=users, pours=users * 5, seed=seed)
+            if util.STORAGE_BACKEND == "sqlite":
+                storage.migrate_text_to_sqlite(source="text")
+            elif util.STORAGE_BACKEND != "text":
+                storage.BACKENDS[util.STORAGE_BACKEND]().save(*storage.TextStorage().load())
+        finally:
+            os.chdir(cwd)
+            _restore_scale(previous)
+
+        for i in range(runs):
+            run_dir = os.path.join(folder, "run%d" % i)
+            shutil.copytree(template, run_dir) # Startup saves, every run starts from the same catalog
+            start = time.perf_counter()
+            proc = subprocess.Popen([sys.executable, main_path, "--scale", scale, "--startup-timing"], cwd=run_dir,
+                                    stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+            line = proc.stdout.readline()
+            process = time.perf_counter() - start
+            _, err = proc.communicate()
+            if not line:
+                raise util.CapRockError("CapRock_main did not start: %s" % (err.strip().splitlines() or ["no output"])[-1])
+            timing = json.loads(line)
+            timing["process"] = process
+            timings.append(timing)
+
+    phases = list(timings[0])
+    print("%s scale, %d drinks, %d profiles, median of %d runs" % (scale, drinks, users, runs))
+    print("%-12s %12s %12s" % ("phase", "median [ms]", "max [ms]"))
+    result = {}
+    for phase in phases:
+        values = [timing[phase] for timing in timings]
+        result[phase] = statistics.median(values)
+        print("%-12s %12.1f %12.1f" % (phase, result[phase] * 1e3, max(values) * 1e3))
+    return result
+
+class _BenchUser():
+    """ Stands in for a profile, the archive only reads its ID and name """
+
+    def __init__(self, obj_id, name):
+        self._id = obj_id
+        self._name = name
+
+    def get_id(self):
+        return self._id
+
+    def get_name(self):
+        return self._name
+
+def bench_archive(pours=1000000, seed=0):
+    """
+    Archives pours spread over 30 days of 500 profiles and 2000 drinks, then
+    times the analytics queries with NumPy and with the pure Python fallback
+    """
+    rng = random.Random(seed)
+    liquids = [liquid.Liquid("Liquid %d" % i, rng.random() * .5, 1.0) for i in range(64)]
+    drinks = [drink.Drink("Drink %d" % i, *[(liq, rng.randint(1, 8) / 2) for liq in rng.sample(liquids, rng.randint(1, util.MAX_LIQ_PER_DRINK))])
+              for i in range(2000)]
+    people = [_BenchUser(i + 1, "Profile %d" % i) for i in range(500)]
+    queries = {"pours by drink":lambda store: store.totals("drink"),
+               "grams by user":lambda store: store.totals("user", "grams"),
+               "oz by liquid":lambda store: store.totals("liquid", "oz"),
+               "pours by hour, 1 day":lambda store: store.totals("hour", start=start_time + 10*24*60*60, end=start_time + 11*24*60*60),
+               "hourly liquid usage":lambda store: store.hourly_usage()}
+
+    with tempfile.TemporaryDirectory() as folder:
+        store = archive.PourArchive(os.path.join(folder, "archive"))
+        start_time = float(int(datetime(2026, 1, 1).timestamp()))
+        times = sorted(rng.randrange(30*24*60*60) for _ in range(pours))
+        start = time.perf_counter()
+        for offset in times: # Expiry hands over one profile's oldest pours at a time
+            dr = rng.choice(drinks)
+            store.add_pours(rng.choice(people), [user.Pour(start_time + offset, dr, dr.get_alcohol_grams())])
+        store.flush()
+        written = time.perf_counter() - start
+        size = sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(folder) for name in names)
+
+        results = {}
+        numpy = archive.np
+        for name, query in queries.items():
+            fast = _measure(lambda: query(store), repeat=3)[0] if numpy is not None else None
+            archive.np = None
+            try:
+                slow = _measure(lambda: query(store), repeat=1)[0]
+            finally:
+                archive.np = numpy
+            results[name] = (fast, slow)
+
+    print("%d pours archived in %.2f s, %.1f MB on disk (%.1f bytes/pour)" % (pours, written, size / 1e6, size / pours))
+    print("%-22s %12s %12s" % ("query", "numpy [ms]", "python [ms]"))
+    for name, res in results.items():
+        print("%-22s %12s %12.1f" % (name, "-" if res[0] is None else "%.1f" % (res[0] * 1e3), res[1] * 1e3))
+    return results
+
+def _time_case(func, repeat=5):
+    """ Returns {"min", "median"} seconds of one func() call, timeit picks how many calls a run takes """
+    timer = timeit.Timer(func)
+    number = timer.autorange()[0]
+    runs = [total / number for total in timer.repeat(repeat, number)]
+    return {"min":min(runs), "median":statistics.median(runs), "number":number}
+
+def _suite_catalog(size, seed=0):
+    """ Returns (users, drinks, liquids) of size drinks and profiles over size // 4 liquids, 5 pours per profile """
+    rng = random.Random(seed)
+    containers = list(util.Container)
+    liquids = [liquid.Liquid("Liquid %d" % i, rng.random() * .5, 1.0, rng.randint(0, 32) / 2, containers[i] if i < 4 else util.Container.NA)
+               for i in range(max(size // 4, util.MAX_LIQ_PER_DRINK))]
+    drinks = [drink.Drink("Drink %d" % i, *[(liq, rng.randint(1, 8) / 2) for liq in rng.sample(liquids, rng.randint(1, util.MAX_LIQ_PER_DRINK))])
+              for i in range(size)]
+    now = float(int(datetime.now().timestamp()))
+    users = []
+    for i in range(size):
+        person = user.User("User %d" % i, rng.choice(list(util.Sex)), 100 + rng.random() * 150, rng.choice(list(util.Experience)))
+        for _ in range(5):
+            person.add_drink(rng.choice(drinks), time=now - rng.randint(0, 3600))
+        users.append(person)
+    return users, drinks, liquids
+
+def bench_suite(sizes=(16, 256, 2048), backends=("text", "sharded", "sqlite"), repeat=5, seed=0):
+    """
+    Micro-benchmarks of the model and storage hot paths on synthetic catalogs
+    of each size. Returns {case name:{"min", "median", "number"}}, seconds per call
+    """
+    previous = _set_scale("venue") # Sizes past the kiosk limits
+    try:
+        return _bench_suite(sizes, backends, repeat, seed)
+    finally:
+        _restore_scale(previous)
+
+def _bench_suite(sizes, backends, repeat, seed):
+    """ Returns results of bench_suite, util already in venue mode """
+    rng = random.Random(seed)
+    results = {}
+    cwd = os.getcwd()
+    for size in sizes:
+        users, drinks, liquids = _suite_catalog(size, seed)
+        names = [dr.get_name() for dr in drinks]
+        results["findId/%d" % size] = _time_case(lambda: util.findId(drinks, names[-1]), repeat)
+        results["current_liquids/%d" % size] = _time_case(lambda: util.current_liquids(liquids), repeat)
+
+        for backend in backends:
+            with tempfile.TemporaryDirectory() as folder:
+                os.chdir(folder) # Backends store in 'backend/' of working directory
+                try:
+                    storage._instances.clear()
+                    store = storage.get_backend(backend)
+                    results["save_storage full/%s/%d" % (backend, size)] = _time_case(
+                        lambda: storage.BACKENDS[backend]().save(users, drinks, liquids), repeat)
+                    store.save(users, drinks, liquids)
+                    results["load_storage/%s/%d" % (backend, size)] = _time_case(lambda: util.load_storage(backend), repeat)
+                    store.save(users, drinks, liquids) # Loads above took over the persisted state
+                    results["save_storage idle/%s/%d" % (backend, size)] = _time_case(
+                        lambda: util.save_storage(users, drinks, liquids, backend), repeat)
+
+                    def save_one():
+                        liq = rng.choice(liquids)
+                        liq.change_volume_left(rng.randint(0, 32) / 2)
+                        util.save_storage(users, drinks, liquids, backend,
+                                          changed={"liquids":{liq}, "drinks":set(), "users":set()})
+                    results["save_storage one change/%s/%d" % (backend, size)] = _time_case(save_one, repeat)
+                    store.close()
+                finally:
+                    storage._instances.clear()
+                    os.chdir(cwd)
+
+    parts = [(liquids[i], 1.5) for i in range(util.MAX_LIQ_PER_DRINK)]
+    results["Drink construction"] = _time_case(lambda: drink.Drink("Bench", *parts), repeat)
+    edited = drink.Drink("Bench", *parts[:-1])
+    extra = parts[-1]
+
+    def edit_recipe():
+        edited.add_liquid(extra)
+        edited.remove_liquid(extra[0].get_name())
+    results["Drink recipe edit"] = _time_case(edit_recipe, repeat)
+
+    now = float(int(datetime.now().timestamp()))
+    for pours in (10, 100, 1000):
+        person = user.User("Bench", util.Sex.Male, 180.0, util.Experience.Regular)
+        for i in range(pours):
+            person.add_drink(drinks[i % len(drinks)], time=now - 3600 + i * 3600 / pours)
+        results["User.get_bac/%d pours" % pours] = _time_case(person.get_bac, repeat)
+    return results
+
+def write_results(results, path):
+    """ Writes suite results with the machine they ran on to a JSON file """
+    doc = {"python":sys.version.split()[0], "platform":platform.platform(), "numpy":archive.np is not None,
+           "date":datetime.now().isoformat(timespec="seconds"), "results":results}
+    with open(path, "w") as f:
+        json.dump(doc, f, indent=2, sort_keys=True)
+
+def compare_results(results, baseline_path, threshold=0.25):
+    """
+    Prints each case next to a baseline written by write_results. Returns list of
+    case names whose median got more than threshold (0.25 is 25%) slower
+    """
+    with open(baseline_path, "r") as f:
+        baseline = json.load(f)["results"]
+    regressions = []
+    print("%-44s %14s %14s %8s" % ("case", "baseline [us]", "now [us]", "ratio"))
+    for name, res in results.items():
+        if name not in baseline:
+            print("%-44s %14s %14.2f %8s" % (name, "-", res["median"] * 1e6, "new"))
+            continue
+        ratio = res["median"] / baseline[name]["median"] if baseline[name]["median"] else float("inf")
+        flag = ""
+        if ratio > 1 + threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print("%-44s %14.2f %14.2f %8.2f%s" % (name, baseline[name]["median"] * 1e6, res["median"] * 1e6, ratio, flag))
+    return regressions
+
+def print_results(results):
+    """ Prints suite results as a table """
+    print("%-44s %12s %12s %8s" % ("case", "median [us]", "min [us]", "calls"))
+    for name, res in results.items():
+        print("%-44s %12.2f %12.2f %8d" % (name, res["median"] * 1e6, res["min"] * 1e6, res["number"]))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="CapRock backend benchmarks")
+    sub = parser.add_subparsers(dest="bench", required=True)
+    parse_cmd = sub.add_parser("parser", help="Legacy vs streaming storage parsing")
+    parse_cmd.add_argument("--pours", type=int, default=100000)
+    models_cmd = sub.add_parser("models", help="Memory and recipe reads of model objects")
+    models_cmd.add_argument("--drinks", type=int, default=100000)
+    scale_cmd = sub.add_parser("scale", help="Startup, pour and save latency as the catalog grows")
+    scale_cmd.add_argument("--counts", default="1000,4000,16000", help="Comma separated drink and profile counts")
+    scale_cmd.add_argument("--backend", choices=sorted(storage.BACKENDS), default="sqlite")
+    archive_cmd = sub.add_parser("archive", help="Pour archive write rate, size and analytics queries")
+    archive_cmd.add_argument("--pours", type=int, default=1000000)
+    suite_cmd = sub.add_parser("suite", help="Micro-benchmarks of model and storage hot paths, JSON output and regression check")
+    suite_cmd.add_argument("--sizes", default="16,256,2048", help="Comma separated drink and profile counts")
+    suite_cmd.add_argument("--backends", default="text,sharded,sqlite", help="Comma separated storage backends")
+    suite_cmd.add_argument("--repeat", type=int, default=5)
+    suite_cmd.add_argument("--json", help="Write results to this file, e.g. to keep as a baseline")
+    suite_cmd.add_argument("--compare", help="Baseline JSON to check results against, exits 1 on a regression")
+    suite_cmd.add_argument("--threshold", type=float, default=0.25, help="Slowdown of the median that is a regression")
+    startup_cmd = sub.add_parser("startup", help="Cold start of CapRock_main to first frame drawn, needs a display")
+    startup_cmd.add_argument("--runs", type=int, default=5)
+    startup_cmd.add_argument("--scale", choices=sorted(util.SCALE_MODES), default="kiosk")
+    startup_cmd.add_argument("--count", type=int, help="Drinks and profiles stored, defaults to the limits of scale")
+    args = parser.parse_args()
+
+    if args.bench == "parser":
+        bench_parser(args.pours)
+    elif args.bench == "models":
+        bench_models(args.drinks)
+    elif args.bench == "scale":
+        bench_scale([int(count) for count in args.counts.split(",")], args.backend)
+    elif args.bench == "archive":
+        bench_archive(args.pours)
+    elif args.bench == "startup":
+        bench_startup(args.runs, args.scale, args.count)
+    elif args.bench == "suite":
+        suite = bench_suite([int(size) for size in args.sizes.split(",")], args.backends.split(","), args.repeat)
+        if args.json:
+            write_results(suite, args.json)
+        if args.compare:
+            slower = compare_results(suite, args.compare, args.threshold)
+            if slower:
+                print("%d regression(s) over %d%%" % (len(slower), args.threshold * 100))
+                sys.exit(1)
+        else:
+            print_results(suite)
@@ -0,0 +1,65 @@
+"""
+CapRock_clock.py - Clock the model layer reads the time from, a virtual one lets simulations skip ahead
+
+@author: Brian Kachala - ECE 4900 Team 8
+@Last Edited: 10/18/2026
+"""
+import threading
+import time
+import CapRock_backend_util as util
+
+class SystemClock():
+    """ Wall clock, epoch seconds from time.time() """
+
+    def now(self):
+        """ Returns current epoch seconds """
+        return time.time()
+
+class VirtualClock():
+    """
+    Clock that only moves when told to, so hours of pours and BAC decay can be
+    simulated in seconds. Never goes backwards.
+
+    Params:
+    start (float) - Epoch seconds the clock starts at
+    """
+
+    def __init__(self, start=0.0):
+        self._lock = threading.Lock()
+        self._now = float(start)
+
+    def now(self):
+        """ Returns current virtual epoch seconds """
+        with self._lock:
+            return self._now
+
+    def advance(self, seconds):
+        """ Moves clock forward by seconds """
+        if seconds < 0:
+            raise util.CapRockError("Clock cannot go backwards")
+        with self._lock:
+            self._now = self._now + seconds
+
+    def set(self, epoch):
+        """ Moves clock forward to epoch seconds """
+        with self._lock:
+            if epoch < self._now:
+                raise util.CapRockError("Clock cannot go backwards")
+            self._now = float(epoch)
+
+_clock = SystemClock()
+
+def now():
+    """ Returns epoch seconds of the clock in use """
+    return _clock.now()
+
+def get_clock():
+    """ Returns clock in use """
+    return _clock
+
+def set_clock(clock):
+    """ Makes the model layer read time from clock, None goes back to the system clock. Returns previous clock """
+    global _clock
+    previous = _clock
+    _clock = SystemClock() if clock is None else clock
+    return previous
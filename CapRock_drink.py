@@ -2,8 +2,9 @@
 CapRock_drink.py - Class to hold information of a drink
 
 @author: Brian Kachala - ECE 4900 Team 8
-@Last Edited: 4/10/2020
+@Last Edited: 10/18/2026
 """
+from fractions import Fraction
 import CapRock_backend_util as util
 import CapRock_liquid as liquid
 
@@ -17,11 +18,20 @@ class Drink():
     Params:
     name (string) - Name of liquid
     1-4 liquid_info (liquid_obj, float) - Liquid tuple (liquid, volume in oz)
+    obj_id (int) - Stable ID stored references use, None gives a new one
     """
+    __slots__ = ("_id", "_liquids", "_name", "_volume_sum", "_alcohol_sum", "_total_volume", "_abv", "_grams", "_stats_at",
+                 "_names", "_names_at", "_dirty", "_observer")
 
-    def __init__(self, name, *liquid_info):
+    def __init__(self, name, *liquid_info, obj_id=None):
         """
         Constructor for drink class.
+        self._liquids (tuple) - Recipe ((liquid_obj, oz), ...), replaced not edited so callers may keep it
+        self._names (tuple) - ((liquid name, oz), ...) cached by get_liquids_name, None until asked for
+        self._names_at (int) - liquid.Liquid.renames when self._names was built
+        self._volume_sum, self._alcohol_sum (Fraction) - Exact oz of drink and of alcohol, None until the recipe is edited
+        self._total_volume, self._abv, self._grams (float) - Cached from the exact sums
+        self._stats_at (int) - liquid.Liquid.abv_changes when the cached ABV and grams were computed
         """
         if len(liquid_info) > util.MAX_LIQ_PER_DRINK:
             raise util.CapRockError("Max %d liquids in a drink!" % util.MAX_LIQ_PER_DRINK)
@@ -29,18 +39,27 @@ class Drink():
             raise util.CapRockError("Must include at least one liquid!")
         if len(name) > util.DRINK_MAX_LEN:
             raise util.CapRockError("Name greater than %d characters" % util.DRINK_MAX_LEN)
-        self._liquids = []
+        self._id = util.claim_id("drinks", obj_id)
         self._name = name
-        self._total_volume = 0
+        self._dirty = True # Not saved yet
+        self._observer = None # Called with self after every change, set by Registry
 
-        # Add each liquid to drink
+        # Check each liquid of drink
         for liq in liquid_info:
             if len(liq) != 2 or not isinstance(liq[LIQUID_POS], liquid.Liquid):
                 raise util.CapRockError("Liquid must be tuple (liquid_obj, volume)")
 
-            self._liquids.append(liq) # Add to drink list
+        if not all(type(liq) is tuple for liq in liquid_info): # Lists are copied, tuples kept as given
+            liquid_info = tuple((liq[LIQUID_POS], liq[VOLUME_POS]) for liq in liquid_info)
+        self._liquids = liquid_info
+        self._names = None
+        self._names_at = 0
+        self._volume_sum = self._alcohol_sum = None
+        self._compute_stats()
 
-        self._update_drink_info()
+    def get_id(self):
+        """ Returns stable ID of the drink, kept across renames """
+        return self._id
 
     def get_name(self):
         """ Returns the Name of the drink """
@@ -52,48 +71,77 @@ class Drink():
             raise util.CapRockError("Name greater than %d characters" % util.DRINK_MAX_LEN)
 
         self._name = new_name
+        self._mark_dirty()
 
     def get_liquids_obj(self):
-        """ Returns all the liquids as a list of tuples (liquid_obj, volume) """
-        liquid_list = []
-        for liq in self._liquids:
-            liquid_list.append((liq[LIQUID_POS], liq[VOLUME_POS]))
-        return liquid_list
+        """ Returns all the liquids as a tuple of tuples (liquid_obj, volume), not copied """
+        return self._liquids
 
     def get_liquids_name(self):
-        """ Returns all the liquids as a list of tuples (liquid_str_name, volume) """
-        liquid_list = []
-        for liq in self._liquids:
-            liquid_list.append((liq[LIQUID_POS].get_name(), liq[VOLUME_POS]))
-        return liquid_list
+        """ Returns all the liquids as a tuple of tuples (liquid_str_name, volume), rebuilt only after a liquid is renamed """
+        if self._names is None or self._names_at != liquid.Liquid.renames:
+            self._names = tuple((liq[LIQUID_POS].get_name(), liq[VOLUME_POS]) for liq in self._liquids)
+            self._names_at = liquid.Liquid.renames
+        return self._names
 
     def get_abv(self):
         """ Returns the abv of the drink """
+        if self._stats_at != liquid.Liquid.abv_changes:
+            self._compute_stats()
         return self._abv
 
     def get_volume(self):
         """ Returns the volume of the drink """
         return self._total_volume
 
-    def _update_drink_info(self):
-        """ Updates the ABV and volume based on current liquids in drink """
-        abv_sum = 0
-        for liq in self._liquids:
-            abv_sum = abv_sum + (liq[LIQUID_POS].get_abv()*liq[VOLUME_POS])
-            self._total_volume = self._total_volume + liq[VOLUME_POS]
+    def get_alcohol_grams(self):
+        """ Returns grams of ethanol in the drink """
+        if self._stats_at != liquid.Liquid.abv_changes:
+            self._compute_stats()
+        return self._grams
 
-        self._abv = abv_sum/self._total_volume
+    def _compute_stats(self, keep=False):
+        """
+        Sums volume and alcohol of the recipe exactly as fractions, every float is
+        one, so edits and ABV changes never leave rounding behind. The sums are
+        kept once the recipe is edited (keep), reads use the cached floats.
+        """
+        volume_sum = Fraction(0)
+        alcohol_sum = Fraction(0)
+        for liq in self._liquids:
+            volume_sum = volume_sum + Fraction(liq[VOLUME_POS])
+            alcohol_sum = alcohol_sum + Fraction(liq[LIQUID_POS].get_abv()) * Fraction(liq[VOLUME_POS])
+        if keep or self._volume_sum is not None:
+            self._volume_sum, self._alcohol_sum = volume_sum, alcohol_sum
+        self._update_stats(volume_sum, alcohol_sum)
+
+    def _update_stats(self, volume_sum, alcohol_sum):
+        """ Updates the cached volume, ABV and grams of alcohol from exact sums """
+        self._total_volume = float(volume_sum)
+        self._abv = float(alcohol_sum / volume_sum) if volume_sum else 0.0 # Recipe of only 0 oz parts
+        self._grams = util.ML_PER_OZ * float(alcohol_sum) * util.ETHANOL_DENSITY # ml/oz for one oz alc * g/mL (density)
+        self._stats_at = liquid.Liquid.abv_changes
+
+    def _change_part(self, liq, oz, sign):
+        """ Adds (sign 1) or takes out (sign -1) oz of liq from the exact sums, O(1) """
+        if self._volume_sum is None or self._stats_at != liquid.Liquid.abv_changes:
+            self._compute_stats(keep=True)
+        self._volume_sum = self._volume_sum + sign * Fraction(oz)
+        self._alcohol_sum = self._alcohol_sum + sign * Fraction(liq.get_abv()) * Fraction(oz)
+        self._update_stats(self._volume_sum, self._alcohol_sum)
 
     def add_liquid(self, liquid_info):
         """ Adds liquid info (liquid_obj, oz) to a drink """
-        if len(liquid_info) == util.MAX_LIQ_PER_DRINK:
+        if len(self._liquids) == util.MAX_LIQ_PER_DRINK:
             raise util.CapRockError("Max %d liquids in a drink!" % util.MAX_LIQ_PER_DRINK)
 
         if len(liquid_info) != 2 or not isinstance(liquid_info[LIQUID_POS], liquid.Liquid):
             raise util.CapRockError("Liquid must be tuple (liquid_obj, volume)")
 
-        self._liquids.append(liquid_info)
-        self._update_drink_info()
+        self._change_part(liquid_info[LIQUID_POS], liquid_info[VOLUME_POS], 1)
+        self._liquids = self._liquids + ((liquid_info[LIQUID_POS], liquid_info[VOLUME_POS]),)
+        self._names = None
+        self._mark_dirty()
 
     def remove_liquid(self, liquid):
         """
@@ -101,10 +149,14 @@ class Drink():
         @param liquid (string): name of liquid to remove
         """
 
-        for liq in self._liquids:
+        for i, liq in enumerate(self._liquids):
             if liquid.lower() == liq[LIQUID_POS].get_name().lower():
-                self._liquids.remove(liq)
-                self._update_drink_info()
+                if len(self._liquids) == 1:
+                    raise util.CapRockError("Must include at least one liquid!")
+                self._change_part(liq[LIQUID_POS], liq[VOLUME_POS], -1)
+                self._liquids = self._liquids[:i] + self._liquids[i+1:]
+                self._names = None
+                self._mark_dirty()
                 return
         raise util.CapRockError("Liquid not currently in drink!")
 
@@ -114,4 +166,22 @@ class Drink():
         (name, abv, liquids, total_volume)
         """
         return {"name":self.get_name(), "abv":self.get_abv(), "liquids":self.get_liquids_name(),
-                "total_volume":self.get_volume()}
\ No newline at end of file
+                "total_volume":self.get_volume()}
+
+    def is_dirty(self):
+        """ Returns True if drink changed since it was last saved """
+        return self._dirty
+
+    def clear_dirty(self):
+        """ Marks drink as saved """
+        self._dirty = False
+
+    def set_observer(self, callback):
+        """ Sets function called with this drink after every change, None to stop """
+        self._observer = callback
+
+    def _mark_dirty(self):
+        """ Flags drink to be written on the next save and tells observer """
+        self._dirty = True
+        if self._observer is not None:
+            self._observer(self)
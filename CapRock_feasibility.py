@@ -0,0 +1,191 @@
+"""
+CapRock_feasibility.py - Index of which drinks can be made from the loaded containers
+
+@author: Brian Kachala - ECE 4900 Team 8
+@Last Edited: 10/18/2026
+"""
+import bisect
+import CapRock_backend_util as util
+
+class FeasibilityIndex():
+    """
+    Keeps makeable drinks up to date from Registry change events. Every liquid
+    owns one bit (kiosk MAX_LIQUIDS_STORED fits one 64 bit word, venue masks
+    are just longer ints), a drink needs all
+    bits of its mask loaded and no liquid below its required volume. Required
+    volumes are kept sorted per liquid, so a volume change only touches the
+    drinks whose threshold it crossed.
+
+    Params:
+    reg (CapRock_registry.Registry) - Catalog to index, changes are followed
+    """
+
+    def __init__(self, reg):
+        """
+        Constructor for feasibility index.
+        self._loaded_mask (int) - Bits of liquids in a container
+        self._thresholds (dict) - {liquid_obj:sorted [(oz required, id(drink_obj))]}
+        self._short (dict) - {drink_obj:number of its liquids with less than required left}
+        self._makeable (set) - Drinks that can be poured now
+        self._subscribers (list) - Functions called as callback("makeable", action, index, drink_obj)
+        """
+        self._registry = reg
+        self._bits = {} # {liquid_obj:bit number}
+        self._free_bits = []
+        self._next_bit = 0
+        self._loaded_mask = 0
+        self._volume = {} # {liquid_obj:volume left when last seen}
+        self._thresholds = {}
+        self._drink_ids = {} # {id(drink_obj):drink_obj}
+        self._mask = {} # {drink_obj:bits of its liquids}
+        self._recipes = {} # {drink_obj:((liquid_obj, oz), ...) it was indexed with}
+        self._short = {}
+        self._makeable = set()
+        self._subscribers = []
+
+        for liq in reg.liquids:
+            self._add_liquid(liq)
+        for dr in reg.drinks:
+            self._add_drink(dr)
+        reg.subscribe(self._on_change)
+
+    def is_makeable(self, dr):
+        """ Returns True if drink obj can be poured with what is loaded now """
+        return dr in self._makeable
+
+    def makeable_drinks(self):
+        """ Returns makeable drink objects in catalog order """
+        return [dr for dr in self._registry.drinks if dr in self._makeable]
+
+    def subscribe(self, callback):
+        """
+        Calls callback("makeable", action, index, drink_obj) when a stored drink
+        becomes "available" or "unavailable", index is its position in the drink list.
+        New drinks send no event, check is_makeable() on their add event.
+        """
+        self._subscribers.append(callback)
+
+    def _on_change(self, kind, action, index, obj):
+        """ Follows one Registry event """
+        if kind == "liquids":
+            if action == "add":
+                self._add_liquid(obj)
+            elif action == "remove":
+                self._remove_liquid(obj)
+            else:
+                self._liquid_changed(obj)
+        elif kind == "drinks":
+            if action == "add":
+                self._add_drink(obj)
+            elif action == "remove":
+                self._remove_drink(obj)
+            else: # Recipe may have changed
+                was = obj in self._makeable
+                self._remove_drink(obj)
+                self._add_drink(obj)
+                if (obj in self._makeable) != was:
+                    self._emit([obj])
+
+    # Liquids
+    def _add_liquid(self, liq):
+        if liq in self._bits:
+            return
+        if self._free_bits:
+            bit = self._free_bits.pop()
+        else:
+            bit = self._next_bit
+            self._next_bit = self._next_bit + 1
+        self._bits[liq] = bit
+        self._volume[liq] = liq.get_volume_left()
+        self._thresholds.setdefault(liq, [])
+        if liq.get_container() != util.Container.NA.name:
+            self._loaded_mask = self._loaded_mask | (1 << bit)
+
+    def _remove_liquid(self, liq):
+        """ Registry only removes liquids no drink uses """
+        bit = self._bits.pop(liq, None)
+        if bit is None:
+            return
+        self._loaded_mask = self._loaded_mask & ~(1 << bit)
+        self._free_bits.append(bit)
+        del self._volume[liq]
+        del self._thresholds[liq]
+
+    def _liquid_changed(self, liq):
+        """ Updates drinks whose threshold the new volume crossed, or all users of liq if it was (un)loaded """
+        bit = 1 << self._bits[liq]
+        was_loaded = bool(self._loaded_mask & bit)
+        loaded = liq.get_container() != util.Container.NA.name
+        old_volume, new_volume = self._volume[liq], liq.get_volume_left()
+        thresholds = self._thresholds[liq]
+        touched = []
+
+        if new_volume != old_volume:
+            self._volume[liq] = new_volume
+            # A drink is short of liq while its required oz > volume left
+            low = bisect.bisect_right(thresholds, (min(old_volume, new_volume), float("inf")))
+            high = bisect.bisect_right(thresholds, (max(old_volume, new_volume), float("inf")))
+            step = 1 if new_volume < old_volume else -1
+            for _, dr_id in thresholds[low:high]:
+                dr = self._drink_ids[dr_id]
+                self._short[dr] = self._short[dr] + step
+                touched.append(dr)
+
+        if loaded != was_loaded:
+            self._loaded_mask = self._loaded_mask | bit if loaded else self._loaded_mask & ~bit
+            touched = [self._drink_ids[dr_id] for _, dr_id in thresholds]
+
+        changed = [dr for dr in touched if self._update(dr)]
+        if changed:
+            self._emit(changed)
+
+    # Drinks
+    def _add_drink(self, dr):
+        mask = 0
+        short = 0
+        recipe = dr.get_liquids_obj() # Immutable, drink replaces it on edits
+        for liq, oz in recipe:
+            self._add_liquid(liq) # Drink may use a liquid outside the catalog
+            mask = mask | (1 << self._bits[liq])
+            if oz > self._volume[liq]:
+                short = short + 1
+            bisect.insort(self._thresholds[liq], (oz, id(dr)))
+        self._drink_ids[id(dr)] = dr
+        self._mask[dr] = mask
+        self._recipes[dr] = recipe
+        self._short[dr] = short
+        self._update(dr)
+
+    def _remove_drink(self, dr):
+        for liq, oz in self._recipes.pop(dr, ()):
+            thresholds = self._thresholds.get(liq)
+            if thresholds is not None:
+                pos = bisect.bisect_left(thresholds, (oz, id(dr)))
+                if pos < len(thresholds) and thresholds[pos] == (oz, id(dr)):
+                    del thresholds[pos]
+        self._drink_ids.pop(id(dr), None)
+        self._mask.pop(dr, None)
+        self._short.pop(dr, None)
+        self._makeable.discard(dr)
+
+    def _update(self, dr):
+        """ Recomputes makeable state of dr, returns True if it flipped """
+        ok = (self._mask[dr] & ~self._loaded_mask) == 0 and self._short[dr] == 0
+        if ok == (dr in self._makeable):
+            return False
+        if ok:
+            self._makeable.add(dr)
+        else:
+            self._makeable.discard(dr)
+        return True
+
+    def _emit(self, changed):
+        """ Sends state of changed drinks to subscribers """
+        if not self._subscribers:
+            return
+        for dr in changed:
+            index = self._registry.position("drinks", dr)
+            if index is not None:
+                action = "available" if dr in self._makeable else "unavailable"
+                for callback in list(self._subscribers):
+                    callback("makeable", action, index, dr)
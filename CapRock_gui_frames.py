@@ -2,8 +2,10 @@
 CapRock_gui_frames.py - Class to hold all the GUI frames
 
 @author: Brian Kachala - ECE 4900 Team 8
-@Last Edited: 4/10/2020
+@Last Edited: 10/18/2026
 """
+import queue
+import threading
 import tkinter as tk
 from tkinter import font  as tkfont
 from datetime import datetime
@@ -11,25 +13,40 @@ import CapRock_backend_util as util
 import CapRock_user as user
 import CapRock_liquid as liquid
 import CapRock_drink as drink
+import CapRock_service as service
+import CapRock_bac as bac
+import CapRock_instrument as instrument
+import CapRock_widgets as widgets
 
 DARK_GRAY = "#A9A9A9"
 LIME = "#00FF00"
 ORANGE = "#FFA500"
 CYAN = "#00FFFF"
 GUEST = 9
+PROFILES_PER_PAGE = 8 # Profile buttons on one page of ChangeProfile
+NO_LIQUID = "No Liquid" # Last row of liquid choice, empties a container
 
 class CapRockGUI(tk.Tk):
     """
-    Runs the CapRock GUI
+    Runs the CapRock GUI as one client of a CapRockService
+
+    Params:
+    core (CapRock_service.CapRockService) - Service holding the catalog and taking pours
     """
 
-    def __init__(self, profiles, drinks, liquids):
+    def __init__(self, core):
         tk.Tk.__init__(self)
-        self.profiles = profiles
-        self.drinks = drinks
-        self.liquids = liquids
-        self._active_profile = user.User("Guest", util.Sex.Male, 160, util.Experience.Regular) if (not profiles) else profiles[0]
-        self._stored_liquids = util.current_liquids(self.liquids) # {container_code_str:liquid_obj}
+        self.service = core
+        self.registry = core.registry
+        self.profiles = self.registry.users
+        self.drinks = self.registry.drinks
+        self.liquids = self.registry.liquids
+        self._active_profile = user.User("Guest", util.Sex.Male, 160, util.Experience.Regular) if (not self.profiles) else self.profiles[0]
+        self._events = queue.Queue() # Catalog events from other threads, handled on Tk thread
+        self.indexes = {kind:widgets.SearchIndex(getattr(self.registry, kind), key=lambda obj: obj.get_name())
+                        for kind in ("liquids", "drinks", "users")} # Name search shared by every list frame
+        self._subscribers = []
+        core.subscribe(self._on_service_event)
         self._display_message = tk.StringVar()
         self._prev_frame = "MainMenu"
         self._delete_list = []
@@ -54,49 +71,83 @@ class CapRockGUI(tk.Tk):
         container.grid_rowconfigure(0, weight=1)
         container.grid_columnconfigure(0, weight=1)
 
-        self.frames = {}
-
-        self.frames["MainMenu"] = MainMenu(parent=container, controller=self)
-        self.frames["PourDrink"] = PourDrink(parent=container, controller=self)
-        self.frames["ChangeProfile"] = ChangeProfile(parent=container, controller=self)
-        self.frames["NewProfile"] = NewProfile(parent=container, controller=self)
-        self.frames["EditProfile"] = EditProfile(parent=container, controller=self)
-        self.frames["EditLiquids"] = EditLiquids(parent=container, controller=self)
-        self.frames["NewLiquid"] = NewLiquid(parent=container, controller=self)
-        self.frames["EditDrinks"] = EditDrinks(parent=container, controller=self)
-        self.frames["NewDrink"] = NewDrink(parent=container, controller=self)
-        self.frames["DeleteOption"] = DeleteOption(parent=container, controller=self)
-        self.frames["DisplayInfo"] = DisplayInfo(parent=container, controller=self)
-
-        # put all of the pages in the same location;
-        # the one on the top of the stacking order
-        # will be the one that is visible.
-        self.frames["MainMenu"].grid(row=0, column=0, sticky="nsew")
-        self.frames["PourDrink"].grid(row=0, column=0, sticky="nsew")
-        self.frames["ChangeProfile"].grid(row=0, column=0, sticky="nsew")
-        self.frames["NewProfile"].grid(row=0, column=0, sticky="nsew")
-        self.frames["EditProfile"].grid(row=0, column=0, sticky="nsew")
-        self.frames["EditLiquids"].grid(row=0, column=0, sticky="nsew")
-        self.frames["NewLiquid"].grid(row=0, column=0, sticky="nsew")
-        self.frames["EditDrinks"].grid(row=0, column=0, sticky="nsew")
-        self.frames["NewDrink"].grid(row=0, column=0, sticky="nsew")
-        self.frames["DeleteOption"].grid(row=0, column=0, sticky="nsew")
-        self.frames["DisplayInfo"].grid(row=0, column=0, sticky="nsew")
-
+        self._container = container
+        self.frames = {} # {page name:frame}, built on first show_frame or get_frame
+        self._shown = None
         self.show_frame("MainMenu")
 
         self.after(60000, self.save_state)
+        self.after(100, self._pump_events)
+
+    @property
+    def _stored_liquids(self):
+        """ {container_code_str:liquid_obj} currently loaded """
+        return self.service.stored_liquids
+
+    def subscribe(self, callback):
+        """ Calls callback(kind, action, index, obj) on the Tk thread after every catalog change """
+        self._subscribers.append(callback)
+
+    def _on_service_event(self, *event):
+        """ Runs catalog event now on Tk thread, else queues it so Tk is only touched by its own thread """
+        if threading.current_thread() is threading.main_thread() and self._events.empty():
+            self._dispatch(event)
+        else:
+            self._events.put(event)
+
+    @instrument.timed("gui.pump_events")
+    def _pump_events(self):
+        """ Hands queued catalog events to frames in order """
+        while not self._events.empty():
+            self._dispatch(self._events.get())
+        self.after(100, self._pump_events)
+
+    def _dispatch(self, event):
+        """ Updates name search of the list that changed, then tells frames """
+        kind, action, index, obj = event
+        if kind in self.indexes:
+            if action == "add":
+                self.indexes[kind].add(obj)
+            elif action == "remove":
+                self.indexes[kind].remove(obj)
+            else:
+                self.indexes[kind].update(obj)
+        for callback in self._subscribers:
+            callback(*event)
+
+    def get_frame(self, page_name):
+        """ Returns frame of page name, built the first time it is asked for """
+        frame = self.frames.get(page_name)
+        if frame is None:
+            with instrument.timer("gui.build." + page_name):
+                frame = FRAMES[page_name](parent=self._container, controller=self)
+                # put all of the pages in the same location;
+                # the one on the top of the stacking order
+                # will be the one that is visible.
+                frame.grid(row=0, column=0, sticky="nsew")
+            self.frames[page_name] = frame
+        return frame
 
     def show_frame(self, page_name):
         '''Show a frame for the given page name'''
-        frame = self.frames[page_name]
+        frame = self.get_frame(page_name)
+        if self._shown is not None and self._shown is not frame and hasattr(self._shown, "on_hide"):
+            self._shown.on_hide()
         frame.tkraise()
+        if self._shown is not frame and hasattr(frame, "on_show"):
+            frame.on_show() # Starts refresh loops of frame, they stop in on_hide
+        self._shown = frame
 
+    @instrument.timed("gui.save_state")
     def save_state(self):
-        """ Saves all profile, drink, and liquid information to storage every minute """
-        util.save_storage(self.profiles, self.drinks, self.liquids)
+        """ Saves changed profile, drink, and liquid information to storage every minute """
+        self.snapshot()
         self.after(60000, self.save_state)
 
+    def snapshot(self):
+        """ Saves storage and compacts pour journal once the save succeeded """
+        self.service.snapshot()
+
 class TaskBar(tk.Frame):
     """ Set of widgets in taskbar that is shown on every frame """
     def __init__(self, controller):
@@ -106,7 +157,7 @@ class TaskBar(tk.Frame):
 
         # Define Widgets
         self.profileName = tk.Label(self, text=controller._active_profile.get_name(), font=controller.task_font, width=util.NAME_MAX_LEN+1, bd=1, relief="raised")
-        self.profileBAC = tk.Label(self, text="BAC: %.2f%%" % controller._active_profile.get_bac(), font=controller.task_font, width=11, bd=1, relief="raised")
+        self.profileBAC = tk.Label(self, text="BAC: %.2f%%" % controller.service.bac(controller._active_profile), font=controller.task_font, width=11, bd=1, relief="raised")
         changeProfile = tk.Button(self, text="Change Profile", command=lambda: controller.show_frame("ChangeProfile"), font=controller.task_font, bd=1, highlightthickness=0)
         editDrinks = tk.Button(self, text="Edit Drinks", command=lambda: controller.show_frame("EditDrinks"), font=controller.task_font, bd=1, highlightthickness=0)
         editLiquids = tk.Button(self, text="Edit Liquids", command=lambda: controller.show_frame("EditLiquids"), font=controller.task_font, bd=1, highlightthickness=0)
@@ -123,10 +174,11 @@ class TaskBar(tk.Frame):
         self.after(1000, self.refresh)
 
 
+    @instrument.timed("gui.taskbar.refresh")
     def refresh(self):
         """ Redraws Task Bar every second """
         self.profileName.configure(text=self.controller._active_profile.get_name())
-        self.profileBAC.configure(text="BAC: %.2f%%" % self.controller._active_profile.get_bac())
+        self.profileBAC.configure(text="BAC: %.2f%%" % self.controller.service.bac(self.controller._active_profile))
         self.displayTime.configure(text=datetime.now().strftime("%I:%M %p"))
         self.after(1000, self.refresh)
 
@@ -153,7 +205,7 @@ class MainMenu(tk.Frame):
 
     def power_off(self):
         """ Save sate and exit GUI """
-        util.save_storage(self.controller.profiles, self.controller.drinks, self.controller.liquids)
+        self.controller.snapshot()
         self.controller.destroy()
 
 class PourDrink(tk.Frame):
@@ -165,15 +217,11 @@ class PourDrink(tk.Frame):
 
         # Define Widgets
         drinkLabel = tk.Label(self, text="Select a Drink: ", font=controller.label_font)
-        """ Scroll Box of Drinks """
-        drinkScroll = tk.Scrollbar(self)
-        self.drinkChoice = tk.Listbox(self, yscrollcommand=drinkScroll.set, selectmode=tk.SINGLE)
-        for dr in self.controller.drinks:
-            self.drinkChoice.insert(tk.END, dr.get_name())
-        drinkScroll.config(command=self.drinkChoice.yview)
-        self.drinkChoice.config(font=controller.scroll_font)
-
-        selectButton = tk.Button(self, text="Select Drink", command=lambda: self.select_drink(self.drinkChoice.curselection()), bg=LIME, activebackground=LIME, font=controller.label_font, bd=1, pady=10)
+        """ Searchable Scroll Box of Drinks """
+        self.drinkChoice = widgets.VirtualList(self, lambda: self.controller.drinks, self.drink_text, controller.indexes["drinks"],
+                                               color=self.row_color, font=controller.scroll_font, width=30)
+
+        selectButton = tk.Button(self, text="Select Drink", command=lambda: self.select_drink(self.drinkChoice.selected()), bg=LIME, activebackground=LIME, font=controller.label_font, bd=1, pady=10)
         pad = tk.Label(self)
 
         # Layout Widgets
@@ -185,61 +233,53 @@ class PourDrink(tk.Frame):
         pad.grid(row=0)
         drinkLabel.grid(row=1, column=0, sticky="e")
         self.drinkChoice.grid(row=1, column=1, sticky="ew")
-        drinkScroll.grid(row=1, column=2, sticky="wns")
         selectButton.grid(row=2, column=1, pady=5)
 
-        self.after(500, self.refresh)
-
-    def refresh(self):
-        """ Checks for drinks update every half second """
-        update = False
-
-        for dr in self.controller.drinks:
-            if dr.get_name() not in self.drinkChoice.get(0, tk.END):
-                update = True
-                break
-
-        for dr in self.drinkChoice.get(0,tk.END):
-            if dr not in [temp.get_name() for temp in self.controller.drinks]:
-                update = True
-                break
-
-        # Delete and add back valid choices
-        if update:
-            self.drinkChoice.delete(0, tk.END)
-            for dr in self.controller.drinks:
-                self.drinkChoice.insert(tk.END,dr.get_name())
-
-        self.after(500, self.refresh)
-
-    def select_drink(self, choice):
-        if choice: # If no option then ignore click
-            idx = choice[0]
-            liq_id = -1
-            errorMsg = ""
-
-            # Check to make sure all liquids are currently in drink and enough volume available
-            for liq in self.controller.drinks[idx].get_liquids_obj():
-                name = liq[drink.LIQUID_POS].get_name()
-                volume = liq[drink.VOLUME_POS]
-                if name not in [("" if key is None else key.get_name()) for key in self.controller._stored_liquids.values()]:
-                    errorMsg = "Unable to make %s! %s is not in storage." % (self.controller.drinks[idx].get_name(), name)
-
-                else:
-                    liq_id = util.findId(self.controller.liquids, name)
-                    if volume > self.controller.liquids[liq_id].get_volume_left():
-                        errorMsg = "Unable to make %s! %s requires %s oz of liquid but only %s oz remaining" % (self.controller.drinks[idx].get_name(), name, volume, self.controller.liquids[liq_id].get_volume_left())
-
-            if not errorMsg:
-                # Drink is ready to make so update backend
-                for liq in self.controller.drinks[idx].get_liquids_obj(): #Update volume of liquiuds used to make drink
-                    liq_id = util.findId(self.controller.liquids, liq[drink.LIQUID_POS].get_name())
-                    self.controller.liquids[liq_id].change_volume_left(self.controller.liquids[liq_id].get_volume_left()-liq[drink.VOLUME_POS])
-
-                self.controller._display_message.set("Pouring your %s. Enjoy!" % self.controller.drinks[idx].get_name())
-                self.controller._active_profile.add_drink(self.controller.drinks[idx])
-            else:
-                self.controller._display_message.set(errorMsg)
+        self._redraw_queued = False
+        self._shown = False
+        self._stale = False # Servings or availability changed while hidden
+        controller.subscribe(self.on_change)
+
+    def on_show(self):
+        """ Redraws rows that changed while another frame was raised """
+        self._shown = True
+        if self._stale:
+            self._stale = False
+            self.drinkChoice.render()
+
+    def on_hide(self):
+        self._shown = False
+
+    def on_change(self, kind, action, index, obj):
+        """ Redraws drink rows on screen, with servings left, drinks that cannot be made are greyed out """
+        if kind == "drinks":
+            self.drinkChoice.apply_event(action, index, obj)
+        elif kind in ("servings", "makeable") and not self._shown:
+            self._stale = True # Redrawn once in on_show
+        elif kind in ("servings", "makeable") and not self._redraw_queued:
+            self._redraw_queued = True # One redraw for every event of a pour
+            self.after_idle(self._redraw)
+
+    def _redraw(self):
+        self._redraw_queued = False
+        self.drinkChoice.render()
+
+    def drink_text(self, dr):
+        """ Returns row text of drink obj with how many are left """
+        return "%s - %d left" % (dr.get_name(), self.controller.service.planner.servings_left(dr))
+
+    def row_color(self, dr):
+        """ Returns row color of drink obj, grey if it cannot be made now """
+        return "black" if self.controller.service.feasibility.is_makeable(dr) else DARK_GRAY
+
+    @instrument.timed("gui.select_drink")
+    def select_drink(self, dr):
+        if dr is not None: # If no option then ignore click
+            try:
+                self.controller.service.pour(dr, self.controller._active_profile)
+                self.controller._display_message.set("Pouring your %s. Enjoy!" % dr.get_name())
+            except util.CapRockError as e:
+                self.controller._display_message.set(str(e))
 
             # Send to display screen - Wait for update
             self.controller._prev_frame = "PourDrink"
@@ -252,66 +292,127 @@ class ChangeProfile(tk.Frame):
         self.controller = controller
 
         self.choice = tk.IntVar()
+        self.page = 0
+        self._query = ""
+        self._matches = None # Profiles matching search, None shows every profile
+        self.bac_engine = bac.BACEngine() # Only profiles on the page shown
         # Define Widgits:
         profilesLabel = tk.Label(self, text="Select a Profile:", font=controller.label_font)
-        i = 0
-        self.buttons = [] # [radiobutton, prof_name_str]
-
-        for i in range(8):
-            prof = None
-            if i < len(self.controller.profiles):
-                prof = self.controller.profiles[i]
-            else:
-                prof = user.User("Default %d" % i, util.Sex.Male, 0, util.Experience.Light)
-            self.buttons.append([tk.Radiobutton(self, text=prof.get_name(), variable=self.choice, value = i, font=self.controller.scroll_font, state=(tk.DISABLED if ("Default %d" % i in prof.get_name()) else tk.NORMAL)), prof.get_name()])
-            i = i+1
-
-        self.buttons.append([tk.Radiobutton(self, text="Guest", variable=self.choice, value=GUEST, font=self.controller.scroll_font), "Guest"])
+        self.searchText = tk.StringVar()
+        self.searchText.trace_add("write", lambda *args: self.search(self.searchText.get()))
+        searchEntry = tk.Entry(self, textvariable=self.searchText, font=controller.scroll_font)
+        self.buttons = [] # [radiobutton, prof_obj or None]
+
+        for i in range(PROFILES_PER_PAGE):
+            self.buttons.append([tk.Radiobutton(self, text="", variable=self.choice, value=i, font=self.controller.scroll_font, state=tk.DISABLED), None])
+
+        self.buttons.append([tk.Radiobutton(self, text="Guest", variable=self.choice, value=GUEST, font=self.controller.scroll_font), None])
+        pageBar = tk.Frame(self)
+        prevPage = tk.Button(pageBar, text="< Prev", command=lambda: self.show_page(self.page - 1), font=controller.scroll_font, bd=1)
+        self.pageLabel = tk.Label(pageBar, text="", font=controller.scroll_font, width=14)
+        nextPage = tk.Button(pageBar, text="Next >", command=lambda: self.show_page(self.page + 1), font=controller.scroll_font, bd=1)
         deleteProfile = tk.Button(self, text="Delete a Profile", command=lambda: self.toDelete(), bg='red', activebackground='red', font=controller.label_font, bd=1, pady=10)
         createNewProfile = tk.Button(self, text="Create New Profile", command=lambda: self.newProfile(), bg=LIME, activebackground=LIME, font=controller.label_font, bd=1, pady=10)
         switchToProfile = tk.Button(self, text="Set as Active Profile", command=lambda: self.changeCurrentProfile(self.choice), bg=CYAN, activebackground=CYAN, font=controller.label_font, bd=1, pady=10)
         editProfile = tk.Button(self, text="Edit Active Profile", command=lambda: self.editActiveProfile(), bg=ORANGE, activebackground=ORANGE, font=controller.label_font, bd=1, pady=10)
+        self.soberLabel = tk.Label(self, text="", font=controller.scroll_font)
 
         # Layout Widgets
         self.grid_columnconfigure(0, minsize=400)
         profilesLabel.grid(row=0)
-        for i in range(9):
+        searchEntry.grid(row=0, column=1, sticky="ew")
+        for i in range(PROFILES_PER_PAGE + 1):
             self.buttons[i][0].grid(row=i+1, sticky="w") # Layout done here
+        prevPage.grid(row=0, column=0)
+        self.pageLabel.grid(row=0, column=1)
+        nextPage.grid(row=0, column=2)
+        pageBar.grid(row=PROFILES_PER_PAGE+2, sticky="w")
         deleteProfile.grid(row=1, column=1, rowspan=2, sticky="ew")
         createNewProfile.grid(row=3, column=1, rowspan=2, sticky="ew")
         switchToProfile.grid(row=5, column=1, rowspan=2, sticky="ew")
         editProfile.grid(row=7, column=1, rowspan=2, sticky="ew")
+        self.soberLabel.grid(row=PROFILES_PER_PAGE+3, columnspan=2, sticky="w")
+
+        self._refresh_job = None
+        self.show_page(0)
+        controller.subscribe(self.on_change)
+
+    def on_show(self):
+        """ Starts BAC redraw loop """
+        self.refresh()
 
-        self.after(500, self.refresh)
+    def on_hide(self):
+        """ Stops BAC redraw loop """
+        if self._refresh_job is not None:
+            self.after_cancel(self._refresh_job)
+            self._refresh_job = None
 
-    #TODO: I was half asleep writing this who knows if it truly works
+    def on_change(self, kind, action, index, obj):
+        """ Relabels buttons of the page if a profile was added, removed or renamed """
+        if kind != "users":
+            return
+        if self._query: # Profile may have moved in or out of the matches
+            self._matches = self.controller.indexes["users"].search(self._query)
+        elif action == "change" and all(button[1] is not obj for button in self.buttons[:PROFILES_PER_PAGE]):
+            return # Not on page shown
+        self.show_page(self.page)
+
+    def profile_list(self):
+        """ Returns profiles matching the search, every profile if there is none """
+        return self.controller.profiles if self._matches is None else self._matches
+
+    def search(self, query):
+        """ Pages through profiles whose name matches query only, from the first page """
+        self._query = query
+        self._matches = self.controller.indexes["users"].search(query) if query else None
+        self.show_page(0)
+
+    def show_page(self, page):
+        """ Shows page number of profile_list(), kept between first and last page """
+        pages = max(1, -(-len(self.profile_list()) // PROFILES_PER_PAGE))
+        self.page = max(0, min(page, pages - 1))
+        self.update_buttons()
+        self.pageLabel.config(text="Page %d of %d" % (self.page + 1, pages))
+
+    def update_buttons(self):
+        """ Sets profile, name and state of each button from the page shown """
+        profs = self.profile_list()
+        first = self.page * PROFILES_PER_PAGE
+        for i, button in enumerate(self.buttons[:PROFILES_PER_PAGE]):
+            prof = profs[first + i] if first + i < len(profs) else None
+            if prof is None:
+                button[0].config(text="", state=tk.DISABLED)
+            else:
+                button[0].config(text=prof.get_name(), state=tk.NORMAL)
+            button[1] = prof # Change associated profile
+
+    @instrument.timed("gui.change_profile.refresh")
     def refresh(self):
-        """ If any differences found in the lists it deletes and readds to profile """
-        update = False
-        for button in self.buttons:
-            if button[1] not in [prof.get_name() for prof in self.controller.profiles] and not "Default" in button[1] and not "Guest" in button[1]:
-                update = True
-
-        for prof in self.controller.profiles:
-            if not any(prof.get_name() in sublist for sublist in self.buttons):
-                update = True
-
-        if update:
-            for i in range(8):
-                prof = None
-                if i < len(self.controller.profiles):
-                    prof = self.controller.profiles[i]
-                else:
-                    prof = user.User("Default %d" % i, util.Sex.Male, 0, util.Experience.Light)
-                (self.buttons[i][0]).config(text=prof.get_name(), state=(tk.DISABLED if ("Default %d" % i in prof.get_name()) else tk.NORMAL))
-                self.buttons[i][1] = prof.get_name() # Change assiciated string
-                i = i+1
+        """ BAC falls over time, so it is redrawn every half second """
+        # Show BAC of every profile on the page from one batched calculation
+        shown = [button for button in self.buttons[:PROFILES_PER_PAGE] if button[1] is not None]
+        with self.controller.service.lock: # Pour histories are copied while no pour changes them
+            self.bac_engine.update([button[1] for button in shown])
+        for button, level in zip(shown, self.bac_engine.bac_all()):
+            text = "%s (BAC: %.2f%%)" % (button[1].get_name(), level)
+            if button[0].cget("text") != text:
+                button[0].config(text=text)
+
+        # When active profile drops below the legal limit
+        prof = self.controller._active_profile
+        wait = self.controller.service.time_until(prof, util.LEGAL_BAC_LIMIT)
+        if wait > 0:
+            text = "%s below %.2f%% BAC in %d:%02d" % (prof.get_name(), util.LEGAL_BAC_LIMIT, wait // 3600, wait % 3600 // 60)
+        else:
+            text = "%s is below %.2f%% BAC" % (prof.get_name(), util.LEGAL_BAC_LIMIT)
+        if self.soberLabel.cget("text") != text:
+            self.soberLabel.config(text=text)
 
-        self.after(500, self.refresh)
+        self._refresh_job = self.after(500, self.refresh)
 
 
     def toDelete(self):
-        self.controller._delete_list = self.controller.profiles
+        self.controller.get_frame("DeleteOption").set_list(self.controller.profiles)
         self.controller._prev_frame = "ChangeProfile"
         self.controller.show_frame("DeleteOption")
 
@@ -332,11 +433,13 @@ class ChangeProfile(tk.Frame):
                 self.controller._display_message.set("Active profile set as Guest! BAC estimates may be significantly off and drink history won't be saved after switching accounts!")
             else:
                 self.controller._display_message.set("Active profile is already Guest!")
+        elif self.buttons[idx][1] is None: # Empty row of last page
+            return
         # Already Active Profile
-        elif self.controller._active_profile.get_name() == self.controller.profiles[idx].get_name():
+        elif self.controller._active_profile.get_name() == self.buttons[idx][1].get_name():
             self.controller._display_message.set("%s is already the active profile!" % self.controller._active_profile.get_name())
         else:
-            self.controller._active_profile = self.controller.profiles[idx]
+            self.controller._active_profile = self.buttons[idx][1]
             self.controller._display_message.set("%s is set to the active profile!" % self.controller._active_profile.get_name())
         self.controller._prev_frame = "ChangeProfile"
         self.controller.show_frame("DisplayInfo")
@@ -396,7 +499,7 @@ class NewProfile(tk.Frame):
             return
         if len(self.nameInput.get()) > util.NAME_MAX_LEN or not self.nameInput.get():
             dispMessage = "Name must be between 1 and 12 characters!"
-        if self.nameInput.get() in [subset.get_name() for subset in self.controller.profiles] or self.nameInput.get().lower() == "guest":
+        if self.controller.registry.get_user(self.nameInput.get()) is not None or self.nameInput.get().lower() == "guest":
             dispMessage = "Cannot of multiple profiles with the same name!"
         if not self.weightInput.get().replace('.','',1).isdigit():
             dispMessage = "Weight must be a number!"
@@ -408,7 +511,7 @@ class NewProfile(tk.Frame):
                 exp = util.Experience.Regular
             elif expChoice == 2:
                 exp = util.Experience.Heavy
-            self.controller.profiles.append(user.User(self.nameInput.get(), sex, float(self.weightInput.get()), exp))
+            self.controller.service.add(user.User(self.nameInput.get(), sex, float(self.weightInput.get()), exp))
             dispMessage = "Profile Successfully Added!"
             self.controller._prev_frame = "ChangeProfile"
 
@@ -452,12 +555,23 @@ class EditProfile(tk.Frame):
         self.heavyRb.grid(row=6, column=1, sticky="w")
         createButton.grid(row=7)
         back.grid(row=7, column=1)
-        self.after(1000, self.refresh)
+        self._refresh_job = None
+
+    def on_show(self):
+        """ Starts active profile check loop """
+        self.refresh()
 
+    def on_hide(self):
+        """ Stops active profile check loop """
+        if self._refresh_job is not None:
+            self.after_cancel(self._refresh_job)
+            self._refresh_job = None
+
+    @instrument.timed("gui.edit_profile.refresh")
     def refresh(self):
         """ Checks for different active profile every second """
         self.nameLabel.config(text="Editing %s's Profile" % self.controller._active_profile.get_name())
-        self.after(1000, self.refresh)
+        self._refresh_job = self.after(1000, self.refresh)
 
     def editProfile(self, sexChoice, expChoice):
         dispMessage = ""
@@ -476,9 +590,7 @@ class EditProfile(tk.Frame):
                 exp = util.Experience.Regular
             elif expChoice == 2:
                 exp = util.Experience.Heavy
-            self.controller._active_profile.change_weight(float(self.weightInput.get()))
-            self.controller._active_profile.change_sex(sex)
-            self.controller._active_profile.change_experience(exp)
+            self.controller.service.update_profile(self.controller._active_profile, float(self.weightInput.get()), sex, exp)
             dispMessage = "Profile Successfully Edited!"
             self.controller._prev_frame = "ChangeProfile"
 
@@ -493,17 +605,13 @@ class EditDrinks(tk.Frame):
 
         # Define Widgets
         drinkLabel = tk.Label(self, text="Current Drinks", font=controller.label_font)
-        """ Scroll Box of Drinks """
-        drinkScroll = tk.Scrollbar(self)
-        self.drinkChoice = tk.Listbox(self, yscrollcommand=drinkScroll.set, selectmode=tk.SINGLE)
-        for dr in self.controller.drinks:
-            self.drinkChoice.insert(tk.END, dr.get_name())
-        drinkScroll.config(command=self.drinkChoice.yview)
-        self.drinkChoice.config(font=controller.scroll_font)
+        """ Searchable Scroll Box of Drinks """
+        self.drinkChoice = widgets.VirtualList(self, lambda: self.controller.drinks, lambda dr: dr.get_name(), controller.indexes["drinks"],
+                                               font=controller.scroll_font)
 
         newDrink = tk.Button(self, text="Add New Drink", command=lambda: self.add_drink(), bg=LIME, activebackground=LIME, font=controller.label_font, bd=1, pady=10)
         deleteDrink = tk.Button(self, text="Delete a Drink", command=lambda: self.delete_drink(), bg='red', activebackground='red', font=controller.label_font, bd=1, pady=10)
-        viewDrink = tk.Button(self, text="View Selected Drink", command=lambda: self.view_drink(self.drinkChoice.curselection()), bg=CYAN, activebackground=CYAN, font=controller.label_font, bd=1, pady=10)
+        viewDrink = tk.Button(self, text="View Selected Drink", command=lambda: self.view_drink(self.drinkChoice.selected()), bg=CYAN, activebackground=CYAN, font=controller.label_font, bd=1, pady=10)
         pad = tk.Label(self)
 
         # Layout Widgets
@@ -516,34 +624,16 @@ class EditDrinks(tk.Frame):
 
         drinkLabel.grid(row=0, column=1)
         self.drinkChoice.grid(row=1, rowspan=3,  column=1, sticky="ew")
-        drinkScroll.grid(row=1, rowspan=3, column=2, sticky="wns")
         newDrink.grid(row=1, column=3)
         deleteDrink.grid(row=2, column=3)
         viewDrink.grid(row=3, column=3)
-        self.after(500, self.refresh)
-
+        controller.subscribe(self.on_change)
 
-    def refresh(self):
-        """ Checks for drinks update every half second """
-        update = False
-
-        for dr in self.controller.drinks:
-            if dr.get_name() not in self.drinkChoice.get(0, tk.END):
-                update = True
-                break
-
-        for dr in self.drinkChoice.get(0,tk.END):
-            if dr not in [temp.get_name() for temp in self.controller.drinks]:
-                update = True
-                break
-
-        # Delete and add back valid choices
-        if update:
-            self.drinkChoice.delete(0, tk.END)
-            for dr in self.controller.drinks:
-                self.drinkChoice.insert(tk.END,dr.get_name())
 
-        self.after(500, self.refresh)
+    def on_change(self, kind, action, index, obj):
+        """ Redraws drink rows on screen """
+        if kind == "drinks":
+            self.drinkChoice.apply_event(action, index, obj)
 
     def add_drink(self):
         self.controller._prev_frame = "EditDrinks"
@@ -554,15 +644,15 @@ class EditDrinks(tk.Frame):
             self.controller.show_frame("NewDrink")
 
     def delete_drink(self):
-        self.controller._delete_list = self.controller.drinks
+        self.controller.get_frame("DeleteOption").set_list(self.controller.drinks)
         self.controller._prev_frame = "EditDrinks"
         self.controller.show_frame("DeleteOption")
 
-    def view_drink(self, choice):
+    def view_drink(self, dr):
         self.controller._prev_frame = "EditDrinks"
-        if choice:
-            info = self.controller.drinks[choice[0]].get_liquids_name()
-            toPrint = "Name: %s\nABV: %.2f%%\n\n" % (self.controller.drinks[choice[0]].get_name(), self.controller.drinks[choice[0]].get_abv()*100)
+        if dr is not None:
+            info = dr.get_liquids_name()
+            toPrint = "Name: %s\nABV: %.2f%%\n\n" % (dr.get_name(), dr.get_abv()*100)
             for liq in info:
                 toPrint = toPrint + str(liq[1]) + " oz of " + liq[0] + "\n"
             self.controller._display_message.set(toPrint)
@@ -580,20 +670,13 @@ class NewDrink(tk.Frame):
         liqLabel =  []
         volLabel =  []
         self.volEntry = []
-        drinkScroll = []
         self.drinkChoice = []
-        """ Scroll Box of Drinks """
+        """ Searchable Scroll Box of Liquids, nothing selected leaves liquid out """
         for i in range(4):
             liqLabel.append(tk.Label(self, text="Liquid %d:" % (i+1), font=controller.label_font))
             volLabel.append(tk.Label(self, text="Amount [oz]:", font=controller.label_font))
-            drinkScroll.append(tk.Scrollbar(self))
-            self.drinkChoice.append(tk.Listbox(self, yscrollcommand=drinkScroll[i].set, selectmode=tk.SINGLE, exportselection=0, height=1, width=24))
-            self.drinkChoice[i].insert(tk.END, "") # Blank
-            for dr in self.controller.liquids:
-                self.drinkChoice[i].insert(tk.END, dr.get_name())
-            drinkScroll[i].config(command=self.drinkChoice[i].yview)
-            self.drinkChoice[i].config(font=controller.scroll_font)
-            self.drinkChoice[i].select_set(0)
+            self.drinkChoice.append(widgets.VirtualList(self, lambda: self.controller.liquids, lambda liq: liq.get_name(),
+                                                        controller.indexes["liquids"], height=1, font=controller.scroll_font, width=24))
 
             # Spinbox for volumes
             self.volEntry.append(tk.Spinbox(self, from_=.5, to=16, increment=.5, width=5))
@@ -612,35 +695,18 @@ class NewDrink(tk.Frame):
         for i in range(1,5):
             liqLabel[i-1].grid(row=i*2, column=0, pady=5)
             volLabel[i-1].grid(row=i*2, column=2)
-            self.drinkChoice[i-1].grid(row=i*2+1, column=0, sticky="e")
-            drinkScroll[i-1].grid(row=i*2+1, column=1, sticky="w")
+            self.drinkChoice[i-1].grid(row=i*2+1, column=0, columnspan=2, sticky="e")
             self.volEntry[i-1].grid(row=i*2+1, column=2)
         createButton.grid(row=10, column=0, pady=10)
         back.grid(row=10, column=2, pady=10)
-        self.after(1000, self.refresh)
-
-    def refresh(self):
-        update = False
-        for i in range(4):
-            for dr in self.controller.liquids:
-                if dr.get_name() not in self.drinkChoice[i].get(0, tk.END):
-                    update = True
-                    break
-
-            for dr in self.drinkChoice[i].get(0,tk.END):
-                if dr and dr not in [temp.get_name() for temp in self.controller.liquids]:
-                    update = True
-                    break
-
-            # Delete and add back valid choices
-            if update:
-                self.drinkChoice[i].delete(0, tk.END)
-                self.drinkChoice[i].insert(tk.END, "") # Blank
-                for dr in self.controller.liquids:
-                    self.drinkChoice[i].insert(tk.END,dr.get_name())
-                self.drinkChoice[i].select_set(0)
+        controller.subscribe(self.on_change)
 
-        self.after(1000, self.refresh)
+    def on_change(self, kind, action, index, obj):
+        """ Redraws liquid rows on screen in each liquid choice """
+        if kind != "liquids":
+            return
+        for choice in self.drinkChoice:
+            choice.apply_event(action, index, obj)
 
 
     def createDrink(self):
@@ -649,15 +715,15 @@ class NewDrink(tk.Frame):
         self.controller._prev_frame = "NewDrink"
         if len(drinkName) > util.DRINK_MAX_LEN or not drinkName:
             dispMessage = "Name must be between 1 and %d characters!" % util.DRINK_MAX_LEN
-        elif drinkName in [subset.get_name() for subset in self.controller.drinks]:
+        elif self.controller.registry.get_drink(drinkName) is not None:
             dispMessage = "Drink with same name already exists!"
         else:
             goodLiq = []
             for i in range(4):
-                liqNum = self.drinkChoice[i].curselection()[0]
+                liq = self.drinkChoice[i].selected()
                 volTemp = self.volEntry[i].get()
-                if liqNum > 0: # Liquid should be added
-                    if self.controller.liquids[liqNum-1].get_name() in [lq[0].get_name() for lq in goodLiq]:
+                if liq is not None: # Liquid should be added
+                    if liq.get_name() in [lq[0].get_name() for lq in goodLiq]:
                         dispMessage = "Cannot add the same liquid multiple times in a drink"
                         break
                     elif not volTemp.replace('.','',1).isdigit():
@@ -668,7 +734,7 @@ class NewDrink(tk.Frame):
                         if volNum not in [x*0.5 for x in range(2*0, 2*16+1)][1:]: # Make sure in range .5-16
                             dispMessage = "Volume must be in increments of .5 oz from .5-16"
                         else:
-                            goodLiq.append((self.controller.liquids[liqNum-1],float(volNum))) # Add liquid to drink
+                            goodLiq.append((liq,float(volNum))) # Add liquid to drink
 
             # Add drink to list
             if not dispMessage and goodLiq:
@@ -683,14 +749,7 @@ class NewDrink(tk.Frame):
         self.controller.show_frame("DisplayInfo")
 
     def makeDrink(self, drinkName, goodLiq):
-        if len(goodLiq) == 1:
-            self.controller.drinks.append(drink.Drink(drinkName, goodLiq[0]))
-        elif len(goodLiq) == 2:
-            self.controller.drinks.append(drink.Drink(drinkName, goodLiq[0], goodLiq[1]))
-        elif len(goodLiq) == 3:
-            self.controller.drinks.append(drink.Drink(drinkName, goodLiq[0], goodLiq[1], goodLiq[2]))
-        else:
-            self.controller.drinks.append(drink.Drink(drinkName, goodLiq[0], goodLiq[1], goodLiq[2], goodLiq[3]))
+        self.controller.service.add(drink.Drink(drinkName, *goodLiq))
 
 class EditLiquids(tk.Frame):
     def __init__(self, parent, controller):
@@ -705,14 +764,9 @@ class EditLiquids(tk.Frame):
         curLiquidLabel = tk.Label(self, text="Current Liquids", font=controller.label_font)
         volLabel = tk.Label(self, text="Set Volume", font=controller.label_font)
 
-        """ Scroll Box of Liquids """
-        liquidScroll = tk.Scrollbar(self)
-        self.liquidChoice = tk.Listbox(self, yscrollcommand=liquidScroll.set, exportselection=0, selectmode=tk.SINGLE, height=5)
-        for dr in self.controller.liquids:
-            self.liquidChoice.insert(tk.END, dr.get_name())
-        self.liquidChoice.insert(tk.END, "No Liquid")
-        liquidScroll.config(command=self.liquidChoice.yview)
-        self.liquidChoice.config(font=controller.scroll_font)
+        """ Searchable Scroll Box of Liquids """
+        self.liquidChoice = widgets.VirtualList(self, lambda: self.controller.liquids, lambda liq: liq.get_name(), controller.indexes["liquids"],
+                                                height=5, extra=[NO_LIQUID], font=controller.scroll_font)
 
         """ Scroll Box of Containers """
         containerScroll = tk.Scrollbar(self)
@@ -729,7 +783,8 @@ class EditLiquids(tk.Frame):
         newLiquid = tk.Button(self, text="Add New Liquid", command=lambda: self.addLiquid(), bg=LIME, activebackground=LIME, font=controller.label_font, bd=1, pady=5)
         confirmChange = tk.Button(self, text="Confirm Change", command=lambda: self.changeLiquid(), bg=ORANGE, activebackground=ORANGE, font=controller.label_font, bd=1, pady=5)
         deleteLiquid = tk.Button(self, text="Delete Liquid", command=lambda: self.delete_liquid(), bg='red', activebackground='red', font=controller.label_font, bd=1, pady=5)
-        viewLiquid = tk.Button(self, text="View Liquid", command=lambda: self.view_liquid(self.liquidChoice.curselection()), bg=CYAN, activebackground=CYAN, font=controller.label_font, bd=1, pady=5)
+        viewLiquid = tk.Button(self, text="View Liquid", command=lambda: self.view_liquid(self.liquidChoice.selected()), bg=CYAN, activebackground=CYAN, font=controller.label_font, bd=1, pady=5)
+        self.suggestLoading = tk.Button(self, text="Suggest Loading", command=lambda: self.suggest_loading(), bg=CYAN, activebackground=CYAN, font=controller.label_font, bd=1, pady=5)
 
         self.FLText = tk.StringVar()
         self.FRText = tk.StringVar()
@@ -753,13 +808,13 @@ class EditLiquids(tk.Frame):
 
         pad.grid(row=0)
         liquidLabel.grid(row=0, column=1, pady=5)
-        self.liquidChoice.grid(row=1, column=1, sticky="nse")
-        liquidScroll.grid(row=1, column=2, sticky="nsw")
+        self.liquidChoice.grid(row=1, column=1, columnspan=2, sticky="nse")
         containerLabel.grid(row=2, column=1)
         self.containerChoice.grid(row=3, column=1, pady=2, sticky="nse")
         containerScroll.grid(row=3, column=2, sticky="nsw")
         confirmChange.grid(row=5, column=1, pady=2)
         viewLiquid.grid(row=5, column=4, pady=2, columnspan=2)
+        self.suggestLoading.grid(row=5, column=3, pady=2, padx=10)
         newLiquid.grid(row=6, column=1, pady=0, padx=10)
         deleteLiquid.grid(row=6, column=4, columnspan=3, pady=10, padx=10)
         curLiquidLabel.grid(row=0, column=4, columnspan=2)
@@ -770,30 +825,15 @@ class EditLiquids(tk.Frame):
         self.FLBox.grid(row=3, column=4, rowspan=1, sticky="nsew")
         self.FRBox.grid(row=3, column=5, rowspan=1, sticky="nsew")
 
-        self.after(1000, self.refresh)
-
-    def refresh(self):
-        self.updateContainerText()
-        update = False
-
-        for dr in self.controller.liquids:
-            if dr.get_name() not in self.liquidChoice.get(0, tk.END):
-                update = True
-                break
-
-        for dr in self.liquidChoice.get(0,tk.END):
-            if dr not in [temp.get_name() for temp in self.controller.liquids] and dr != "No Liquid":
-                update = True
-                break
+        controller.subscribe(self.on_change)
 
-        # Delete and add back valid choices
-        if update:
-            self.liquidChoice.delete(0, tk.END)
-            for dr in self.controller.liquids:
-                self.liquidChoice.insert(tk.END,dr.get_name())
-            self.liquidChoice.insert(tk.END,"No Liquid")
-
-        self.after(1000, self.refresh)
+    def on_change(self, kind, action, index, obj):
+        """ Redraws liquid rows on screen, "No Liquid" stays last """
+        if kind != "liquids":
+            return
+        self.liquidChoice.apply_event(action, index, obj)
+        if obj in self.controller._stored_liquids.values(): # Volume or name in a container changed
+            self.updateContainerText()
 
     def updateContainerText(self):
         """ Updates stringvar to container with new liquid """
@@ -825,32 +865,22 @@ class EditLiquids(tk.Frame):
 
     def changeLiquid(self):
         self.controller._prev_frame = "EditLiquids"
-        liq = self.liquidChoice.curselection()
+        liq = self.liquidChoice.selected()
         container = self.containerChoice.curselection()
         volTemp = self.volEntry.get()
-        if liq and container and (liq[0] == len(self.controller.liquids) or volTemp):
+        if liq is not None and container and (liq == NO_LIQUID or volTemp):
             dispMessage = ""
-            liq_choice = liq[0]
             con_choice = container[0]
-            if  liq_choice != len(self.controller.liquids) and not volTemp.replace('.','',1).isdigit():
+            if  liq != NO_LIQUID and not volTemp.replace('.','',1).isdigit():
                 dispMessage = "Volume must be a number"
-            elif liq_choice != len(self.controller.liquids) and float(volTemp) not in [x*0.5 for x in range(2*0, 2*16+1)][1:]: # Make sure in range .5-16
+            elif liq != NO_LIQUID and float(volTemp) not in [x*0.5 for x in range(2*0, 2*16+1)][1:]: # Make sure in range .5-16
                 dispMessage = "Volume must be in increments of .5 oz from .5-16"
             else: # Volume is good change container
-                # Remove old liquid info
-                containerName = self._containers.get(con_choice).name
-                prev_liq = self.controller._stored_liquids.get(containerName) # Gets liq obj hopefully
-                if prev_liq is not None:
-                    liq_id = util.findId(self.controller.liquids, prev_liq.get_name())
-                    self.controller.liquids[liq_id].remove_container()
-
-                # Update liquid to new info
-                if liq_choice != len(self.controller.liquids): # Didnt Chose no liquid
-                    self.controller.liquids[liq_choice].change_container(self._containers.get(con_choice))
-                    self.controller.liquids[liq_choice].change_volume_left(float(volTemp))
-
-                # Update _current storage
-                self.controller._stored_liquids = util.current_liquids(self.controller.liquids)
+                # Swap liquid in container, no liquid empties it
+                if liq != NO_LIQUID: # Didnt Chose no liquid
+                    self.controller.service.load_container(self._containers.get(con_choice), liq, float(volTemp))
+                else:
+                    self.controller.service.load_container(self._containers.get(con_choice))
                 # update text for page
                 self.updateContainerText()
                 dispMessage = "Sucessfully Updated Storage Information!"
@@ -858,18 +888,55 @@ class EditLiquids(tk.Frame):
             self.controller.show_frame("DisplayInfo")
 
     def delete_liquid(self):
-        self.controller._delete_list = self.controller.liquids
+        self.controller.get_frame("DeleteOption").set_list(self.controller.liquids)
         self.controller._prev_frame = "EditLiquids"
         self.controller.show_frame("DeleteOption")
 
-    def view_liquid(self, choice):
+    def view_liquid(self, liq):
         self.controller._prev_frame = "EditLiquids"
-        if choice and choice[0] < len(self.controller.liquids): # Didnt choose no liquid
-            liq = self.controller.liquids[choice[0]]
+        if liq is not None and liq != NO_LIQUID:
             toPrint = "Name: %s\nABV: %.2f%%\nDensity: %.2f g/mL" % (liq.get_name(), liq.get_abv()*100, liq.get_density())
             self.controller._display_message.set(toPrint)
             self.controller.show_frame("DisplayInfo")
 
+    def suggest_loading(self):
+        """
+        Searches liquids to load that make the most drinks, weighted by pour history.
+        Search runs on a worker thread so Tk keeps drawing, button is disabled until it is done
+        """
+        self.suggestLoading.config(state=tk.DISABLED, text="Searching...")
+        results = queue.Queue()
+
+        def search():
+            try:
+                results.put(self.controller.service.suggest_loadings())
+            except Exception as e:
+                results.put(e)
+        threading.Thread(target=search, name="SuggestLoading", daemon=True).start()
+        self.after(100, self._show_loadings, results)
+
+    def _show_loadings(self, results):
+        """ Shows search result once the worker put it in results, checked every 100 ms on the Tk thread """
+        try:
+            loadings = results.get_nowait()
+        except queue.Empty:
+            self.after(100, self._show_loadings, results)
+            return
+        self.suggestLoading.config(state=tk.NORMAL, text="Suggest Loading")
+        if self.controller._shown is not self:
+            return # User moved on, do not pull them back
+        self.controller._prev_frame = "EditLiquids"
+        if isinstance(loadings, Exception):
+            toPrint = "Unable to suggest a loading! %s" % str(loadings)
+        elif not loadings:
+            toPrint = "No drinks to suggest a loading for."
+        else:
+            lines = ["%d. %s (%d drinks)" % (num + 1, ", ".join(liq.get_name() for liq in loading.liquids), len(loading.drinks))
+                     for num, loading in enumerate(loadings)]
+            toPrint = "Suggested Loadings:\n" + "\n".join(lines)
+        self.controller._display_message.set(toPrint)
+        self.controller.show_frame("DisplayInfo")
+
 class NewLiquid(tk.Frame):
     def __init__(self, parent, controller):
         # Init Frame
@@ -904,14 +971,14 @@ class NewLiquid(tk.Frame):
         self.controller._prev_frame = "NewLiquid"
         if len(liqName) > util.LIQUID_MAX_LEN or not liqName:
             dispMessage = "Name must be between 1 and %d characters!" % util.LIQUID_MAX_LEN
-        elif liqName in [subset.get_name() for subset in self.controller.liquids]:
+        elif self.controller.registry.get_liquid(liqName) is not None:
             dispMessage = "Liquid with same name already exists!"
         elif not abv or not abv.replace('.','',1).isdigit() or float(abv) < 0 or float(abv) > 100:
             dispMessage = "ABV must be between 0-100%!"
         elif not density or not density.replace('.','',1).isdigit():
             dispMessage = "Density must be a number!"
         else:
-            self.controller.liquids.append(liquid.Liquid(liqName, float(abv)/100, float(density)))
+            self.controller.service.add(liquid.Liquid(liqName, float(abv)/100, float(density)))
             dispMessage = "Successfully added liquid to storage!"
             self.controller._prev_frame = "EditLiquids"
         self.controller._display_message.set(dispMessage)
@@ -925,14 +992,10 @@ class DeleteOption(tk.Frame):
 
         # Define Widgets
         label = tk.Label(self, text="Select to Delete: ", font=controller.label_font, fg="red")
-        """ Scroll Box of Objects """
-        scroll = tk.Scrollbar(self)
-        self.choice = tk.Listbox(self, yscrollcommand=scroll.set, selectmode=tk.SINGLE)
-        for dr in self.controller._delete_list:
-            self.choice.insert(tk.END, dr.get_name())
-        scroll.config(command=self.choice.yview)
-        self.choice.config(font=controller.scroll_font)
-        selectButton = tk.Button(self, text="Select option", command=lambda: self.select_option(self.choice.curselection()), bg="red", activebackground="red", font=controller.label_font, bd=1, pady=10)
+        """ Searchable Scroll Box of Objects """
+        self.choice = widgets.VirtualList(self, lambda: self.controller._delete_list, lambda obj: obj.get_name(), widgets.SearchIndex(),
+                                          font=controller.scroll_font)
+        selectButton = tk.Button(self, text="Select option", command=lambda: self.select_option(self.choice.selected()), bg="red", activebackground="red", font=controller.label_font, bd=1, pady=10)
         back = tk.Button(self, text="Back", command=lambda: controller.show_frame(self.controller._prev_frame), bg=ORANGE, activebackground=ORANGE, font=controller.label_font, bd=1, pady=20, padx=30)
         pad = tk.Label(self)
 
@@ -945,55 +1008,41 @@ class DeleteOption(tk.Frame):
         pad.grid(row=0)
         label.grid(row=1, column=0, sticky="e")
         self.choice.grid(row=1, column=1, sticky="ew")
-        scroll.grid(row=1, column=2, sticky="wns")
         selectButton.grid(row=2, column=1, pady=5)
         back.grid(row=2, column=2, pady=5)
 
-        self.after(500, self.refresh)
+        controller.subscribe(self.on_change)
 
-    def refresh(self):
-        """ If any differences found in the lists it deletes and readds to delete list """
-        update = False
-        for item in self.choice.get(0,tk.END):
-            if item not in [key.get_name() for key in self.controller._delete_list]:
-                update = True
+    def set_list(self, items):
+        """ Shows items (profiles, drinks or liquids list of registry) to delete from """
+        self.controller._delete_list = items
+        kind = next(kind for kind in self.controller.indexes if getattr(self.controller.registry, kind) is items)
+        self.choice.set_source(lambda: items, self.controller.indexes[kind])
 
-        if self.choice.size() != len(self.controller._delete_list):
-            update = True
+    def on_change(self, kind, action, index, obj):
+        """ Redraws rows on screen if the list that changed is shown """
+        if getattr(self.controller.registry, kind, None) is self.controller._delete_list:
+            self.choice.apply_event(action, index, obj)
 
-        if update:
-            self.choice.delete(0, tk.END)
-            for thing in self.controller._delete_list:
-                self.choice.insert(tk.END, thing.get_name())
-
-        self.after(500, self.refresh)
-
-    def select_option(self, choice):
-        if choice: # If no option then ignore click
-            idx = choice[0]
+    def select_option(self, obj):
+        if obj is not None: # If no option then ignore click
             # Cant delete active profile
-            if  self.controller._delete_list == self.controller.profiles and self.controller._delete_list[idx].get_name() == self.controller._active_profile.get_name():
+            if  self.controller._delete_list == self.controller.profiles and obj.get_name() == self.controller._active_profile.get_name():
                 self.controller._display_message.set("You cannot delete the active profile!")
             # Cant delete liquid in container
-            elif self.controller._delete_list == self.controller.liquids and self.controller._delete_list[idx].get_name() in [("" if liq is None else liq.get_name()) for liq in self.controller._stored_liquids.values()]:
+            elif self.controller._delete_list == self.controller.liquids and obj.get_name() in [("" if liq is None else liq.get_name()) for liq in self.controller._stored_liquids.values()]:
                 self.controller._display_message.set("You cannot delete a liquid currently in a container!")
             # Cant delete liquid if in any drink
-            elif self.controller._delete_list == self.controller.liquids and self.liq_in_stored_drink(self.controller._delete_list[idx].get_name()):
+            elif self.controller._delete_list == self.controller.liquids and self.liq_in_stored_drink(obj):
                 self.controller._display_message.set("You cannot delete a liquid currently in a drink!")
             else: # Delete Option
-                self.controller._display_message.set("%s has successfully been deleted!" % self.controller._delete_list[idx].get_name())
-                self.controller._delete_list.pop(idx)
+                self.controller._display_message.set("%s has successfully been deleted!" % obj.get_name())
+                self.controller.service.remove(obj)
             self.controller.show_frame("DisplayInfo")
 
     def liq_in_stored_drink(self, liq):
-        ''' Checks every dr in storage if liq in a drink '''
-        for dr in self.controller.drinks:
-            liqs_dr = dr.get_liquids_name()
-            for each_liq in liqs_dr:
-                if liq == each_liq[0]:
-                    return True
-
-        return False
+        ''' Checks dependency index if liq obj is in any stored drink '''
+        return self.controller.registry.liquid_in_drink(liq)
 
 class DisplayInfo(tk.Frame):
 
@@ -1012,8 +1061,12 @@ class DisplayInfo(tk.Frame):
         self.message.grid(row=0, column=0)
         back.grid(row=1)
 
+# Frame class of every page name, frames are built on first show
+FRAMES = {"MainMenu":MainMenu, "PourDrink":PourDrink, "ChangeProfile":ChangeProfile, "NewProfile":NewProfile,
+          "EditProfile":EditProfile, "EditLiquids":EditLiquids, "NewLiquid":NewLiquid, "EditDrinks":EditDrinks,
+          "NewDrink":NewDrink, "DeleteOption":DeleteOption, "DisplayInfo":DisplayInfo}
 
 if __name__ == "__main__":
     us, dr, liq = util.load_storage()
-    app = CapRockGUI(us,dr,liq)
+    app = CapRockGUI(service.CapRockService(us,dr,liq))
     app.mainloop()
\ No newline at end of file
@@ -0,0 +1,209 @@
+"""
+CapRock_instrument.py - Call counts and latency histograms of hot paths, cheap enough to leave on
+
+Usage:
+    @instrument.timed("gui.taskbar.refresh")
+    def refresh(self): ...
+
+    with instrument.timer("storage.save"):
+        ...
+
+    instrument.snapshot() / instrument.dump("logs/metrics.json")
+
+@author: Brian Kachala - ECE 4900 Team 8
+@Last Edited: 10/18/2026
+"""
+import functools
+import json
+import os
+import threading
+import time
+
+SUB_BUCKET_BITS = 5 # 32 buckets per power of two, values are kept within 1/32 (~3%)
+PERCENTILES = (50, 90, 99, 99.9)
+METRICS_PATH = "logs/metrics.json" # Where the kiosk dumps metrics on exit or SIGUSR1
+
+ENABLED = True
+_histograms = {} # {name:Histogram}
+_lock = threading.Lock()
+
+class Histogram():
+    """
+    HDR style latency histogram. Durations are counted in log-linear buckets of
+    whole nanoseconds: exact below 2**(SUB_BUCKET_BITS+1) ns, then
+    2**SUB_BUCKET_BITS buckets per power of two. Recording is one dict update,
+    memory only grows with the number of distinct buckets hit.
+
+    Params:
+    name (string) - Name metric is reported under
+    """
+
+    def __init__(self, name):
+        """
+        Constructor for histogram.
+        self._counts (dict) - {bucket index:number of durations in it}
+        self._total (float) - Sum of recorded seconds
+        """
+        self.name = name
+        self._lock = threading.Lock()
+        self._counts = {}
+        self._count = 0
+        self._total = 0.0
+        self._min = None
+        self._max = 0.0
+
+    def record(self, seconds):
+        """ Counts one duration of seconds """
+        index = _bucket_index(int(seconds * 1e9))
+        with self._lock:
+            self._counts[index] = self._counts.get(index, 0) + 1
+            self._count = self._count + 1
+            self._total = self._total + seconds
+            if self._min is None or seconds < self._min:
+                self._min = seconds
+            if seconds > self._max:
+                self._max = seconds
+
+    def get_count(self):
+        """ Returns number of recorded durations """
+        return self._count
+
+    def percentile(self, q):
+        """ Returns seconds q percent of recorded durations are at or below, 0.0 if there are none """
+        with self._lock:
+            counts = sorted(self._counts.items())
+            count, top = self._count, self._max
+        return _percentile(counts, count, top, q)
+
+    def summary(self, buckets=False):
+        """
+        Returns dict of count, total, mean, min, max and PERCENTILES in milliseconds
+        @param buckets (bool): Also return {"buckets":{lowest ns of bucket:count}}, enough to merge dumps later
+        """
+        with self._lock: # One consistent copy, recording threads only wait for this
+            counts = sorted(self._counts.items())
+            count, total, low, top = self._count, self._total, self._min, self._max
+        result = {"count":count, "total_ms":total * 1e3, "mean_ms":(total / count * 1e3) if count else 0.0,
+                  "min_ms":(low or 0.0) * 1e3, "max_ms":top * 1e3}
+        for q in PERCENTILES:
+            result["p%s_ms" % ("%g" % q).replace(".", "")] = _percentile(counts, count, top, q) * 1e3
+        if buckets:
+            result["buckets"] = {str(_bucket_low(index)):n for index, n in counts}
+        return result
+
+def _percentile(counts, count, top, q):
+    """ Returns seconds at percentile q of sorted [(bucket index, count)], capped at largest recorded top """
+    if not count:
+        return 0.0
+    rank = max(1, int(round(q / 100.0 * count)))
+    seen = 0
+    for index, n in counts:
+        seen = seen + n
+        if seen >= rank:
+            return min(_bucket_high(index) / 1e9, top)
+    return top
+
+def _bucket_index(nanos):
+    """ Returns bucket of nanos, see Histogram """
+    shift = nanos.bit_length() - SUB_BUCKET_BITS - 1
+    if shift <= 0:
+        return max(nanos, 0)
+    return (shift << SUB_BUCKET_BITS) + (nanos >> shift)
+
+def _bucket_low(index):
+    """ Returns lowest nanos in bucket index """
+    shift = (index >> SUB_BUCKET_BITS) - 1
+    if shift <= 0:
+        return index
+    return (index - (shift << SUB_BUCKET_BITS)) << shift
+
+def _bucket_high(index):
+    """ Returns highest nanos in bucket index """
+    shift = (index >> SUB_BUCKET_BITS) - 1
+    return _bucket_low(index) + (1 << max(shift, 0)) - 1
+
+class timer():
+    """
+    Context manager recording how long its block took under name, the block
+    is timed even if it raises.
+
+    Params:
+    name (string) - Histogram to record in
+    """
+
+    __slots__ = ("_name", "_start")
+
+    def __init__(self, name):
+        self._name = name
+        self._start = None
+
+    def __enter__(self):
+        if ENABLED:
+            self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if self._start is not None:
+            record(self._name, time.perf_counter() - self._start)
+        return False
+
+def timed(name=None):
+    """
+    Decorator recording call count and duration of a function
+    @param name (string): Histogram to record in, defaults to module.qualified name of the function
+    """
+    def decorate(func):
+        metric = name or "%s.%s" % (func.__module__, func.__qualname__)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(metric, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+def histogram(name):
+    """ Returns Histogram of name, created on first use """
+    hist = _histograms.get(name)
+    if hist is None:
+        with _lock:
+            hist = _histograms.setdefault(name, Histogram(name))
+    return hist
+
+def record(name, seconds):
+    """ Counts one duration of seconds under name """
+    if ENABLED:
+        histogram(name).record(seconds)
+
+def enable(on=True):
+    """ Turns recording on or off, recorded data is kept """
+    global ENABLED
+    ENABLED = bool(on)
+
+def reset():
+    """ Drops every histogram """
+    with _lock:
+        _histograms.clear()
+
+def snapshot(buckets=False):
+    """ Returns {name:Histogram.summary()} of every histogram, sorted by name """
+    with _lock:
+        hists = sorted(_histograms.items())
+    return {name:hist.summary(buckets) for name, hist in hists}
+
+def dump(path, buckets=True):
+    """ Writes snapshot() with the time it was taken to path as JSON, replacing it atomically """
+    folder = os.path.dirname(path)
+    if folder and not os.path.exists(folder):
+        os.makedirs(folder)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"time":time.time(), "metrics":snapshot(buckets)}, f, indent=1)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
@@ -0,0 +1,324 @@
+"""
+CapRock_journal.py - Append-only journal of pours so no pour is lost between saves
+
+@author: Brian Kachala - ECE 4900 Team 8
+@Last Edited: 10/18/2026
+"""
+import logging
+import os
+import struct
+import threading
+import zlib
+import CapRock_backend_util as util
+
+log = logging.getLogger(__name__)
+
+JOURNAL_PATH = "backend/pour_journal.bin"
+CHECKPOINT_PATH = "backend/pour_journal.ckpt"
+GROUP_COMMIT_MS = 50 # Max time a pour waits before its batch is fsynced
+GROUP_COMMIT_SIZE = 32 # Pours that force an fsync without waiting
+SYNC_RETRY_MAX_MS = 5000 # Longest wait between retries while fsync keeps failing
+
+FILE_MAGIC = b"CRJ1"
+RECORD_HEADER = struct.Struct("<IIQ") # payload length, crc32 of payload, sequence number
+POUR_HEAD = struct.Struct("<dB") # epoch seconds, number of liquid deltas
+STR_LEN = struct.Struct("<H")
+DELTA = struct.Struct("<d")
+
+class PourRecord():
+    """
+    A single journaled pour.
+
+    Params:
+    seq (int) - Sequence number of record in journal
+    time (float) - Epoch seconds of pour
+    user (int) - ID of profile that poured, 0 for a guest
+    drink (int) - ID of drink poured
+    deltas (list) - (liquid ID, oz removed) tuples
+    """
+
+    def __init__(self, seq, time, user, drink, deltas):
+        self.seq = seq
+        self.time = time
+        self.user = user
+        self.drink = drink
+        self.deltas = deltas
+
+    def encode(self):
+        """ Returns payload bytes of record """
+        parts = [POUR_HEAD.pack(self.time, len(self.deltas)), _pack_ref(self.user), _pack_ref(self.drink)]
+        for ref, oz in self.deltas:
+            parts.append(_pack_ref(ref))
+            parts.append(DELTA.pack(oz))
+        return b"".join(parts)
+
+    @staticmethod
+    def decode(seq, payload):
+        """ Returns PourRecord from payload bytes """
+        time, count = POUR_HEAD.unpack_from(payload, 0)
+        pos = POUR_HEAD.size
+        user_id, pos = _unpack_ref(payload, pos)
+        drink_id, pos = _unpack_ref(payload, pos)
+        deltas = []
+        for _ in range(count):
+            liquid_id, pos = _unpack_ref(payload, pos)
+            deltas.append((liquid_id, DELTA.unpack_from(payload, pos)[0]))
+            pos = pos + DELTA.size
+        return PourRecord(seq, time, user_id, drink_id, deltas)
+
+class PourJournal():
+    """
+    Append-only binary journal with group commit. Pours are written as soon as
+    they happen and a background thread fsyncs them in batches, so many pours
+    share one fsync. checkpoint() is called after a successful storage save and
+    empties the journal, since the snapshot now holds every journaled pour.
+
+    Params:
+    path (string) - Location of journal file
+    checkpoint_path (string) - Location of file holding last checkpointed sequence number
+    """
+
+    def __init__(self, path=JOURNAL_PATH, checkpoint_path=CHECKPOINT_PATH):
+        """
+        Constructor for journal class.
+        self._next_seq (int) - Sequence number of next record
+        self._durable_seq (int) - Highest sequence number known to be fsynced
+        self._sync_error (OSError) - Error of the last fsync if it failed, None once one succeeds
+        self._failed_seq (int) - Highest sequence number written when an fsync last failed
+        """
+        self._path = path
+        self._checkpoint_path = checkpoint_path
+        self._cond = threading.Condition()
+        self._closed = False
+        self._checkpoint_seq = self._read_checkpoint()
+        self._next_seq = self._checkpoint_seq + 1
+        self._written_seq = self._checkpoint_seq
+        self._durable_seq = self._checkpoint_seq
+        self._sync_error = None
+        self._failed_seq = 0
+
+        folder = os.path.dirname(path)
+        if folder and not os.path.exists(folder):
+            os.mkdir(folder)
+        self._records = self._scan() # Also truncates a torn tail left by a crash
+        if self._records:
+            self._next_seq = max(self._next_seq, self._records[-1].seq + 1)
+            self._written_seq = self._durable_seq = self._next_seq - 1
+        self._file = open(path, "ab")
+        if self._file.tell() == 0:
+            self._file.write(FILE_MAGIC)
+
+        self._flusher = threading.Thread(target=self._flush_loop, name="CapRockJournal", daemon=True)
+        self._flusher.start()
+
+    def pending_records(self):
+        """ Returns journaled pours newer than the last checkpoint, oldest first """
+        return [rec for rec in self._records if rec.seq > self._checkpoint_seq]
+
+    def record_pour(self, user_id, drink_id, deltas, time):
+        """
+        Appends pour to journal and returns its sequence number
+        @param user_id (int): ID of profile, 0 for a guest
+        @param deltas (list): (liquid ID, oz removed) tuples
+        @param time (float): Epoch seconds of pour
+        """
+        with self._cond:
+            if self._closed:
+                raise util.CapRockError("Pour journal is closed!")
+            seq = self._next_seq
+            payload = PourRecord(seq, time, user_id, drink_id, deltas).encode()
+            self._file.write(RECORD_HEADER.pack(len(payload), zlib.crc32(payload), seq) + payload)
+            self._next_seq = seq + 1
+            self._written_seq = seq
+            self._cond.notify_all() # Wake flusher, it waits for the batch to fill
+        return seq
+
+    def last_seq(self):
+        """ Returns sequence number of the last pour written, saved with the storage snapshot that holds it """
+        with self._cond:
+            return self._written_seq
+
+    def wait_durable(self, seq, timeout=None):
+        """
+        Blocks until pour seq is fsynced. Returns False on timeout. Raises
+        util.CapRockError if an fsync of seq failed or the journal closed without it
+        """
+        with self._cond:
+            self._cond.notify_all()
+            self._cond.wait_for(lambda: self._durable_seq >= seq or self._closed or self._failed_seq >= seq, timeout)
+            if self._durable_seq >= seq:
+                return True
+            if self._failed_seq >= seq:
+                raise util.CapRockError("Pour journal failed to sync: %s" % str(self._sync_error))
+            if self._closed:
+                raise util.CapRockError("Pour journal closed before pour %d was synced" % seq)
+            return False
+
+    def sync(self):
+        """ Fsyncs every written pour now """
+        with self._cond:
+            self._sync_locked()
+
+    def checkpoint(self):
+        """
+        Empties journal after every pour was saved in a storage snapshot
+        NOTE: A crash between the snapshot and this call leaves pours already
+        in the snapshot here, apply_pours skips them by the sequence number saved with it
+        """
+        with self._cond:
+            if self._written_seq == self._checkpoint_seq:
+                return # Nothing journaled since last checkpoint
+            self._sync_locked()
+            seq = self._written_seq
+            util.write_atomic(self._checkpoint_path, "%d\n" % seq)
+            self._checkpoint_seq = seq
+            self._file.flush()
+            self._file.truncate(len(FILE_MAGIC))
+            self._file.seek(0, os.SEEK_END)
+            self._records = []
+            log.info("Pour journal checkpointed at %d", seq)
+
+    def close(self):
+        """ Fsyncs remaining pours and stops flusher thread """
+        with self._cond:
+            if self._closed:
+                return
+            try:
+                self._sync_locked()
+            except OSError:
+                pass # Logged, pours still in the file are replayed if they made it to disk
+            self._closed = True
+            self._file.close()
+            self._cond.notify_all()
+        self._flusher.join()
+
+    def _sync_locked(self):
+        """ Flushes and fsyncs file, caller holds self._cond """
+        if self._durable_seq < self._written_seq and not self._closed:
+            try:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            except OSError as e:
+                if self._sync_error is None: # Once until it works again
+                    log.error("%s : Failed to sync pour journal!", str(e))
+                self._sync_error = e
+                self._failed_seq = self._written_seq
+                self._cond.notify_all() # Durable waiters fail instead of waiting forever
+                raise
+            if self._sync_error is not None:
+                log.warning("Pour journal syncs again")
+                self._sync_error = None
+            self._durable_seq = self._written_seq
+            self._cond.notify_all()
+
+    def _flush_loop(self):
+        """
+        Group commit thread, fsyncs whatever was written in the last interval.
+        While fsync fails it retries after a wait doubling up to SYNC_RETRY_MAX_MS
+        """
+        backoff = 0.0 # Seconds until the next retry, 0 while fsync works
+        with self._cond:
+            while not self._closed:
+                self._cond.wait_for(lambda: self._closed or self._written_seq > self._durable_seq)
+                if self._closed:
+                    break
+                if backoff:
+                    self._cond.wait_for(lambda: self._closed, backoff)
+                else: # Let more pours join this batch unless it is already full
+                    self._cond.wait_for(lambda: self._closed or self._written_seq - self._durable_seq >= GROUP_COMMIT_SIZE,
+                                        GROUP_COMMIT_MS / 1000)
+                try:
+                    self._sync_locked()
+                    backoff = 0.0
+                except OSError:
+                    backoff = min(max(backoff * 2, GROUP_COMMIT_MS / 1000), SYNC_RETRY_MAX_MS / 1000)
+
+    def _read_checkpoint(self):
+        """ Returns last checkpointed sequence number """
+        try:
+            with open(self._checkpoint_path, "r") as f:
+                return int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            return 0
+
+    def _scan(self):
+        """ Reads every intact record and truncates anything after the last one """
+        if not os.path.exists(self._path):
+            return []
+        with open(self._path, "rb") as f:
+            data = f.read()
+        if not data.startswith(FILE_MAGIC):
+            log.error("%s is not a pour journal, starting a new one", self._path)
+            os.replace(self._path, self._path + ".bad")
+            return []
+
+        records = []
+        pos = len(FILE_MAGIC)
+        while pos + RECORD_HEADER.size <= len(data):
+            length, crc, seq = RECORD_HEADER.unpack_from(data, pos)
+            payload = data[pos + RECORD_HEADER.size:pos + RECORD_HEADER.size + length]
+            if len(payload) != length or zlib.crc32(payload) != crc:
+                break
+            try:
+                records.append(PourRecord.decode(seq, payload))
+            except (struct.error, UnicodeDecodeError):
+                break
+            pos = pos + RECORD_HEADER.size + length
+
+        if pos != len(data):
+            log.error("Pour journal has a torn record at byte %d, truncating", pos)
+            with open(self._path, "r+b") as f:
+                f.truncate(pos)
+        return records
+
+def apply_pours(records, users, drinks, liquids, saved_seq=None):
+    """
+    Replays journaled pours onto freshly loaded storage
+    Returns number of pours applied
+    @param saved_seq (int): Last sequence number in the snapshot, see util.stored_journal_seq.
+        None for snapshots saved without one, pours found in a profile's history are skipped instead
+    """
+    user_refs = util.RefIndex(users)
+    drink_refs = util.RefIndex(drinks)
+    liquid_refs = util.RefIndex(liquids)
+    applied = 0
+    for rec in records:
+        person = user_refs.get(rec.user) # Guest pours only change volumes
+        dr = drink_refs.get(rec.drink)
+        if saved_seq is not None:
+            if rec.seq <= saved_seq:
+                continue # Pour already made it into the snapshot
+        elif person is not None and any(d[0] == rec.time and d[1] is dr for d in person.get_current_drinks()):
+            continue
+
+        for ref, oz in rec.deltas:
+            liq = liquid_refs.get(ref)
+            if liq is not None:
+                liq.change_volume_left(liq.get_volume_left() - oz)
+        if person is not None and dr is not None:
+            person.add_drink(dr, time=rec.time)
+        applied = applied + 1
+    return applied
+
+def _pack_ref(obj_id):
+    """ Packs an ID as '#<id>' text """
+    return _pack_str(util.format_ref(obj_id))
+
+def _unpack_ref(data, pos):
+    """ Returns (ID, position after it) of a reference packed by _pack_ref """
+    text, pos = _unpack_str(data, pos)
+    obj_id = util.parse_ref(text)
+    if not isinstance(obj_id, int):
+        raise struct.error("reference is not an ID")
+    return obj_id, pos
+
+def _pack_str(text):
+    raw = text.encode("utf-8")
+    return STR_LEN.pack(len(raw)) + raw
+
+def _unpack_str(data, pos):
+    (length,) = STR_LEN.unpack_from(data, pos)
+    pos = pos + STR_LEN.size
+    if pos + length > len(data):
+        raise struct.error("string runs past record")
+    return data[pos:pos + length].decode("utf-8"), pos + length
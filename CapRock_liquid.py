@@ -2,7 +2,7 @@
 CapRock_liquid.py - Class to hold information of a Liquid
 
 @author: Brian Kachala - ECE 4900 Team 8
-@Last Edited: 4/10/2020
+@Last Edited: 10/18/2026
 """
 import CapRock_backend_util as util
 
@@ -16,9 +16,13 @@ class Liquid():
     density(float) - Density of liquid in (g/mL)
     volume_available - Volume of liquid in a storage container in ounces
     container(util.Container) - Container liquid is stored in NOTE: If in container it must previously be empty
+    obj_id (int) - Stable ID stored references use, None gives a new one
     """
+    __slots__ = ("_id", "_name", "_abv", "_density", "_container", "_volume_left", "_dirty", "_observer")
+    renames = 0 # Bumped by every rename of any liquid, drinks check it before reusing cached names
+    abv_changes = 0 # Bumped by every ABV change of any liquid, drinks recompute their ABV when it moved
 
-    def __init__(self, name, abv, density, volume=0, container=util.Container.NA):
+    def __init__(self, name, abv, density, volume=0, container=util.Container.NA, obj_id=None):
         """
         Constructor for Liquid class.
         """
@@ -31,11 +35,18 @@ class Liquid():
         if volume > util.MAX_VOLUME_OZ:
             raise util.CapRockError("Cannot store greater than %d oz of liquid" % util.MAX_VOLUME_OZ)
 
+        self._id = util.claim_id("liquids", obj_id)
         self._name = name
         self._abv = abv
         self._density = density
         self._container = container
         self._volume_left = volume
+        self._dirty = True # Not saved yet
+        self._observer = None # Called with self after every change, set by Registry
+
+    def get_id(self):
+        """ Returns stable ID of the liquid, kept across renames """
+        return self._id
 
     def get_name(self):
         """ Returns the Name of the liquid """
@@ -47,6 +58,8 @@ class Liquid():
             raise util.CapRockError("Name greater than %d characters" % util.LIQUID_MAX_LEN)
 
         self._name = new_name
+        Liquid.renames = Liquid.renames + 1
+        self._mark_dirty()
 
     def get_abv(self):
         """ Returns the ABV of the liquid from 0-1 """
@@ -58,6 +71,8 @@ class Liquid():
             raise util.CapRockError("Invalid ABV. Must be between 0 and 1")
 
         self._abv = new_abv
+        Liquid.abv_changes = Liquid.abv_changes + 1
+        self._mark_dirty()
 
     def get_density(self):
         """ Returns the density of the liquid in g/mL """
@@ -66,6 +81,7 @@ class Liquid():
     def change_density(self, new_density):
         """ Changes the density of the liquid to new_density """
         self._density = new_density
+        self._mark_dirty()
 
     def get_container(self):
         """ Returns the two letter container code of the liquid """
@@ -80,6 +96,7 @@ class Liquid():
             raise util.CapRockError("Not a valid container")
 
         self._container = new_container
+        self._mark_dirty()
 
     def remove_container(self):
         """ Removes liquid from associated container and sets volume to 0 """
@@ -93,6 +110,7 @@ class Liquid():
     def change_volume_left(self, new_volume):
         """ Updates the volume of the liquid to new_volume """
         self._volume_left = new_volume
+        self._mark_dirty()
 
     def get_liquid_info(self):
         """
@@ -104,3 +122,20 @@ class Liquid():
 
     # NOTE: Each Function up to here has been manually tested to work
 
+    def is_dirty(self):
+        """ Returns True if liquid changed since it was last saved """
+        return self._dirty
+
+    def clear_dirty(self):
+        """ Marks liquid as saved """
+        self._dirty = False
+
+    def set_observer(self, callback):
+        """ Sets function called with this liquid after every change, None to stop """
+        self._observer = callback
+
+    def _mark_dirty(self):
+        """ Flags liquid to be written on the next save and tells observer """
+        self._dirty = True
+        if self._observer is not None:
+            self._observer(self)
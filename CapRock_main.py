@@ -1,37 +1,170 @@
 """
 CapRock_main.py - Main program to run the CapRock software
 @author: Brian Kachala - ECE 4900 Team 8
-@Last Edited: 4/10/2020
+@Last Edited: 10/18/2026
 """
+import time
+START = time.perf_counter() # Before the other imports, --startup-timing counts from here
 
+import argparse
+import json
+import os
+import signal
 import CapRock_liquid as liquid
 import CapRock_drink as drink
+import CapRock_archive as archive
 import CapRock_user as user
 import CapRock_backend_util as util
 import CapRock_gui_frames as gui
+import CapRock_instrument as instrument
+import CapRock_journal as journal
+import CapRock_service as service
+import CapRock_server as server
+import CapRock_storage as storage
 import logging
 
-def startup():
-    """ Initial routine to setup software """
+log = logging.getLogger("CapRock_main") # Named so --log-level can set it, __name__ is __main__ here
+DUMP_POLL_MS = 500 # How often the Tk loop checks for a SIGUSR1 metrics dump
+_dump_requested = False
+
+def startup(scale=util.SCALE_MODE, log_levels=None):
+    """
+    Initial routine to setup software
+    @param scale (string): Key of util.SCALE_MODES
+    @param log_levels (dict): {module name:level}, see util.init_logging
+    """
+    util.configure_scale(scale) # Unknown mode stops here, before an empty catalog could be saved
+    try:
+        util.init_logging(log_levels)
+        log.info("Scale mode %s, %s storage", util.SCALE_MODE, util.STORAGE_BACKEND)
+        if util.STORAGE_BACKEND == "sqlite" and os.path.exists("backend"):
+            storage.migrate_text_to_sqlite(source="sharded") # Kiosk catalog carries over to venue mode once
+    except Exception as e:
+        log.critical("%s - Startup issue", str(e))
+
+    # Keep pours that leave profile history, catalog still works without it.
+    # Opened before loading, so no pour can leave history before it is archived
+    pour_archive = None
+    try:
+        pour_archive = archive.PourArchive()
+        user.set_expired_sink(pour_archive.add_pours)
+    except Exception as e:
+        log.error("%s - Pour archive unavailable", str(e))
+
     try:
-        util.init_logging()
-        return util.load_storage()
+        profiles, drinks, liquids = util.load_storage()
     except Exception as e:
-        logging.critical("%s - Startup issue" % str(e))
-        return [], [], []
+        log.critical("%s - Startup issue", str(e))
+        profiles, drinks, liquids = [], [], []
 
+    # Recover pours made after the last save
+    pour_journal = None
+    try:
+        pour_journal = journal.PourJournal()
+        replayed = journal.apply_pours(pour_journal.pending_records(), profiles, drinks, liquids, util.stored_journal_seq())
+        if replayed:
+            log.warning("Replayed %d pours from journal", replayed)
+        expired = sum(person.expire() for person in profiles) # Pours that expired while the kiosk was off
+        if expired:
+            log.info("Archived %d pours that expired while off", expired)
+        if pour_archive is not None:
+            pour_archive.flush()
+        if util.save_storage(profiles, drinks, liquids, journal_seq=pour_journal.last_seq()):
+            pour_journal.checkpoint()
+    except Exception as e:
+        log.critical("%s - Pour journal unavailable", str(e))
+    core = service.CapRockService(profiles, drinks, liquids, pour_journal, pour_archive)
 
-def cleanup():
+    # Take orders from other devices, kiosk still works without it
+    order_server = server.CapRockServer(core)
+    try:
+        order_server.start()
+    except OSError as e:
+        log.error("%s - Ordering server not started", str(e))
+        order_server = None
+    return core, order_server
+
+
+def dump_metrics():
+    """ Writes latency histograms to instrument.METRICS_PATH """
+    try:
+        instrument.dump(instrument.METRICS_PATH)
+    except OSError as e:
+        log.error("%s - Metrics not written", str(e))
+
+def request_dump(*args):
+    """
+    SIGUSR1 handler. Only sets a flag, the main thread it interrupts could
+    hold an instrument lock that dump_metrics would wait on forever
+    """
+    global _dump_requested
+    _dump_requested = True
+
+def poll_dump(app):
+    """ Dumps metrics from the Tk loop once SIGUSR1 asked for it """
+    global _dump_requested
+    if _dump_requested:
+        _dump_requested = False
+        dump_metrics()
+    app.after(DUMP_POLL_MS, poll_dump, app)
+
+def cleanup(core, order_server):
     """ Cleanup actions to exit software """
-    pass
+    dump_metrics()
+    if order_server is not None:
+        order_server.stop()
+    if core.journal is not None:
+        core.journal.close()
+    if core.archive is not None:
+        core.archive.close()
+    util.stop_logging()
+
+def startup_timing(marks):
+    """ Prints seconds each startup phase took as one JSON line, marks are (phase, perf_counter) in order """
+    timing = {}
+    prev = START
+    for phase, mark in marks:
+        timing[phase] = mark - prev
+        prev = mark
+    timing["total"] = prev - START
+    print(json.dumps(timing), flush=True)
+
+def log_level(text):
+    """ Returns (module, level) of a --log-level MODULE=LEVEL argument, LEVEL alone sets every module """
+    name, _, level = text.rpartition("=")
+    if not isinstance(logging.getLevelName(level.upper()), int):
+        raise argparse.ArgumentTypeError("Unknown log level %s" % level)
+    return name, level.upper()
 
 
 
 # Full main Program
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="CapRock drink mixer")
+    parser.add_argument("--scale", choices=sorted(util.SCALE_MODES), default=util.SCALE_MODE,
+                        help="kiosk keeps the small catalog limits, venue allows thousands of profiles and drinks")
+    parser.add_argument("--log-level", type=log_level, action="append", default=[], metavar="[MODULE=]LEVEL",
+                        help="e.g. CapRock_storage=DEBUG, repeatable. Modules log INFO and up by default")
+    parser.add_argument("--startup-timing", action="store_true",
+                        help="Print seconds from start to first frame drawn as JSON and exit, see CapRock_benchmark.py startup")
+    parser.add_argument("--no-metrics", action="store_true", help="Do not record call counts and latencies")
+    args = parser.parse_args()
+    instrument.enable(not args.no_metrics)
+    if hasattr(signal, "SIGUSR1"): # kill -USR1 <pid> dumps metrics of the running kiosk
+        signal.signal(signal.SIGUSR1, request_dump)
+
+    imported = time.perf_counter()
 
     # Load Previous Information from storage
-    profiles, drinks, liquids = startup()
-    app = gui.CapRockGUI(profiles, drinks, liquids)
-    app.mainloop() # Run GUI
-    cleanup()
+    core, order_server = startup(args.scale, dict(args.log_level))
+    loaded = time.perf_counter()
+    app = gui.CapRockGUI(core)
+    built = time.perf_counter()
+    if args.startup_timing:
+        app.update() # First frame is drawn and takes clicks once pending events are handled
+        startup_timing([("imports", imported), ("startup", loaded), ("gui", built), ("first_frame", time.perf_counter())])
+        app.destroy()
+    else:
+        poll_dump(app)
+        app.mainloop() # Run GUI
+    cleanup(core, order_server)
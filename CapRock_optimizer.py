@@ -0,0 +1,192 @@
+"""
+CapRock_optimizer.py - Search for the liquids to load that make the most drinks
+
+@author: Brian Kachala - ECE 4900 Team 8
+@Last Edited: 10/18/2026
+"""
+import bisect
+import heapq
+import multiprocessing
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+import CapRock_backend_util as util
+import CapRock_drink as drink
+
+CONTAINER_SLOTS = len(util.Container) - 1 # Every container but NA
+PARALLEL_MIN_LIQUIDS = 24 # Smaller searches finish before a process pool starts
+# Workers are never forked from the kiosk itself, a fork copies locks held by its Tk, server, journal and log threads
+START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+# One ranked answer, liquids to load and drinks they make
+Loading = namedtuple("Loading", ["score", "liquids", "drinks"])
+
+def popularity_weights(users, drinks):
+    """ Returns {drink_obj:1 + times poured in pour history of users}, so unpoured drinks still count """
+    weights = {dr:1.0 for dr in drinks}
+    for person in users:
+        for pour in person.get_current_drinks():
+            if pour.drink in weights:
+                weights[pour.drink] = weights[pour.drink] + 1
+    return weights
+
+def best_loadings(drinks, liquids=None, k=5, weights=None, slots=CONTAINER_SLOTS, workers=None):
+    """
+    Returns up to k best Loading tuples, highest score first
+    @param liquids (list): Liquids that may be loaded, defaults to every liquid used in drinks
+    @param weights (dict): {drink_obj:weight}, defaults to 1 so score is number of makeable drinks
+    @param workers (int): Processes to search with, defaults to cpu count, 1 searches in this process
+    """
+    if k < 1:
+        raise util.CapRockError("k must be at least 1")
+    recipes = [(dr, {liq[drink.LIQUID_POS] for liq in dr.get_liquids_obj()}) for dr in drinks]
+    if liquids is None:
+        liquids = list({liq:None for _, needed in recipes for liq in needed}) # Keep first seen order
+    allowed = set(liquids)
+    recipes = [(dr, needed) for dr, needed in recipes if needed <= allowed and len(needed) <= slots]
+    weight = (lambda dr: 1.0) if weights is None else (lambda dr: float(weights.get(dr, 0)))
+
+    # Candidates with the most drink weight are tried first
+    gains = {liq:0.0 for liq in liquids}
+    for dr, needed in recipes:
+        for liq in needed:
+            gains[liq] = gains[liq] + weight(dr)
+    cands = sorted(liquids, key=lambda liq: -gains[liq])
+    slots = min(slots, len(cands))
+    if slots == 0:
+        return []
+    bit_of = {liq:i for i, liq in enumerate(cands)}
+    totals = {} # {mask of liquids:weight of drinks needing exactly those}
+    for dr, needed in recipes:
+        mask = 0
+        for liq in needed:
+            mask = mask | (1 << bit_of[liq])
+        totals[mask] = totals.get(mask, 0.0) + weight(dr)
+    partial = _partial_bounds(totals, slots)
+    suffix_bound = _suffix_bounds(totals, len(cands), slots)
+
+    firsts = list(range(len(cands) - slots + 1))
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers > 1 and len(cands) >= PARALLEL_MIN_LIQUIDS:
+        chunks = [firsts[i::workers] for i in range(workers)] # Round robin, early branches are the largest
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(START_METHOD)) as pool:
+            results = pool.map(_search, chunks, *([arg] * workers for arg in (len(cands), totals, partial, suffix_bound, slots, k)))
+            found = heapq.nlargest(k, (item for result in results for item in result))
+    else:
+        found = heapq.nlargest(k, _search(firsts, len(cands), totals, partial, suffix_bound, slots, k))
+
+    loadings = []
+    for score, combo in found:
+        loaded = {cands[i] for i in combo}
+        loadings.append(Loading(score, [cands[i] for i in combo], [dr for dr, needed in recipes if needed <= loaded]))
+    return loadings
+
+def _partial_bounds(totals, slots):
+    """
+    Returns {part mask:[None, (firsts, weights) for 1 to slots-1 missing]} over
+    drinks containing part. firsts are sorted lowest missing candidates of
+    drinks missing at most that many liquids, weights[j] is the weight of
+    those from firsts[j] on.
+    """
+    found = {}
+    for mask, weight in totals.items():
+        part = (mask - 1) & mask
+        while part:
+            rest = mask & ~part
+            missing = _ones(rest)
+            if missing < slots:
+                per_left = found.setdefault(part, [None] + [[] for _ in range(slots - 1)])
+                for left in range(missing, slots):
+                    per_left[left].append(((rest & -rest).bit_length() - 1, weight))
+            part = (part - 1) & mask
+
+    for per_left in found.values():
+        for left in range(1, slots):
+            entries = sorted(per_left[left])
+            weights = [0.0] * (len(entries) + 1)
+            for j in range(len(entries) - 1, -1, -1):
+                weights[j] = weights[j + 1] + entries[j][1]
+            per_left[left] = ([first for first, _ in entries], weights)
+    return found
+
+def _suffix_bounds(totals, n, slots):
+    """
+    Returns bound[r][i], most weight that r more candidates from i on can add
+    through drinks made only of candidates i and later: the sum of the r largest
+    per candidate totals over such drinks of at most r liquids
+    """
+    bound = [[0.0] * (n + 1) for _ in range(slots + 1)]
+    by_first = [[] for _ in range(n)] # Drinks by their lowest candidate
+    for mask, weight in totals.items():
+        by_first[(mask & -mask).bit_length() - 1].append((mask, weight))
+    for r in range(1, slots + 1):
+        per_cand = [0.0] * n
+        for i in range(n - 1, -1, -1):
+            for mask, weight in by_first[i]:
+                if _ones(mask) <= r:
+                    for j in _bits(mask):
+                        per_cand[j] = per_cand[j] + weight
+            bound[r][i] = sum(heapq.nlargest(r, per_cand[i:]))
+    return bound
+
+def _search(firsts, n, totals, partial, suffix_bound, slots, k):
+    """
+    Depth first search over loadings, in increasing candidate order, starting
+    with a candidate in firsts. A branch that loads candidate i next can only
+    add drinks already partly loaded whose missing liquids are all i or later
+    (partial), plus drinks of candidates i and later only (suffix_bound). Both
+    shrink as i grows, so the loop stops at the first branch that cannot beat
+    the k-th best. Returns list of (score, combo) of the best k found
+    """
+    best = [] # Min-heap of (score, combo), best[0] is the k-th best so far
+
+    def visit(start, mask, combo, score):
+        left = slots - len(combo)
+        if left == 0:
+            if len(best) < k:
+                heapq.heappush(best, (score, tuple(combo)))
+            elif score > best[0][0]:
+                heapq.heapreplace(best, (score, tuple(combo)))
+            return
+
+        parts = []
+        part = mask
+        while part:
+            if part in partial:
+                parts.append(partial[part][left])
+            part = (part - 1) & mask
+
+        for i in range(start, n - left + 1):
+            if len(best) == k:
+                bound = score + suffix_bound[left][i]
+                for firsts_left, weights in parts:
+                    bound = bound + weights[bisect.bisect_left(firsts_left, i)]
+                if bound <= best[0][0]:
+                    break
+            bit = 1 << i
+            gain = totals.get(bit, 0.0)
+            part = mask
+            while part: # Drinks of i and any loaded liquids
+                gain = gain + totals.get(part | bit, 0.0)
+                part = (part - 1) & mask
+            combo.append(i)
+            visit(i + 1, mask | bit, combo, score + gain)
+            combo.pop()
+
+    for first in firsts:
+        if len(best) == k and suffix_bound[slots][first] <= best[0][0]:
+            break
+        visit(first + 1, 1 << first, [first], totals.get(1 << first, 0.0))
+    return best
+
+def _ones(mask):
+    """ Returns number of set bits """
+    return bin(mask).count("1")
+
+def _bits(mask):
+    """ Yields positions of set bits """
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask = mask ^ low
@@ -0,0 +1,192 @@
+"""
+CapRock_planner.py - Servings left per drink and pour plans over the loaded liquids
+
+@author: Brian Kachala - ECE 4900 Team 8
+@Last Edited: 10/18/2026
+"""
+from collections import namedtuple
+import CapRock_backend_util as util
+import CapRock_drink as drink
+
+EPSILON = 1e-9 # Volumes are floats, 1.5 oz in 3 oz is 2 servings
+
+# Best mix of pours, counts come after the queued orders that fit
+Plan = namedtuple("Plan", ["servings", "counts", "unserved"])
+
+class ServingsPlanner():
+    """
+    Answers how many of each drink can still be poured from the loaded
+    containers, on its own. Counts are taken when asked for and kept until one
+    of the drink's liquids changes volume or container, so a pour costs the same
+    however many drinks use the liquid. plan() answers the shared question,
+    which mix of pours gets the most servings out of the containers.
+
+    Params:
+    reg (CapRock_registry.Registry) - Catalog to follow
+    """
+
+    def __init__(self, reg):
+        """
+        Constructor for servings planner.
+        self._left (dict) - {drink_obj:[servings left if only it was poured, recipe tuple,
+                             ((liquid_obj, total oz), ...), liquid versions counted at] or None until asked}
+        self._versions (dict) - {liquid_obj:number of volume or container changes}
+        self._subscribers (list) - Functions called as callback("servings", action, index, obj)
+        """
+        self._registry = reg
+        self._left = {dr:None for dr in reg.drinks}
+        self._versions = {}
+        self._seen = {liq:(liq.get_container(), liq.get_volume_left()) for liq in reg.liquids} # {liquid_obj:(container, volume)}
+        self._subscribers = []
+        reg.subscribe(self._on_change)
+
+    def servings_left(self, dr):
+        """ Returns number of drink obj that can be poured before a liquid runs out, 0 if not stored """
+        if dr not in self._left:
+            return 0
+        entry = self._left[dr]
+        recipe = dr.get_liquids_obj()
+        if entry is None or entry[1] is not recipe: # Drink replaces its recipe tuple on edits
+            needs = tuple(_needs(dr).items())
+            entry = [None, recipe, needs, None]
+            self._left[dr] = entry
+        stamp = tuple(self._versions.get(liq, 0) for liq, _ in entry[2])
+        if entry[3] != stamp:
+            entry[0] = _count(entry[2])
+            entry[3] = stamp
+        return entry[0]
+
+    def subscribe(self, callback):
+        """
+        Calls callback("servings", "liquid", index, liquid_obj) when servings left of drinks
+        using a stored liquid may have changed, and callback("servings", "update", index, drink_obj)
+        when the recipe of a stored drink changed, index is position in the liquid or drink list
+        """
+        self._subscribers.append(callback)
+
+    def plan(self, queue=(), drinks=None):
+        """
+        Returns Plan of pours using the most of the loaded liquids. Queued orders are poured
+        first in order, ones that do not fit are returned in unserved and skipped.
+        @param queue (list): Drink objects ordered but not poured yet
+        @param drinks (list): Drinks allowed in the mix, defaults to every stored drink
+        """
+        volumes = {liq:liq.get_volume_left() for liq in self._loaded()}
+        unserved = []
+        for dr in queue:
+            needs = _needs(dr)
+            if all(liq in volumes and volumes[liq] + EPSILON >= oz for liq, oz in needs.items()):
+                for liq, oz in needs.items():
+                    volumes[liq] = volumes[liq] - oz
+            else:
+                unserved.append(dr)
+
+        if drinks is None:
+            drinks = self._registry.drinks
+        order = list(volumes)
+        recipes = []
+        for dr in drinks:
+            needs = _needs(dr)
+            if needs and all(liq in volumes for liq in needs):
+                recipes.append((dr, tuple(needs.get(liq, 0.0) for liq in order)))
+        servings, counts = _max_servings(recipes, tuple(volumes[liq] for liq in order))
+        return Plan(servings, counts, unserved)
+
+    def _on_change(self, kind, action, index, obj):
+        """ Follows one Registry event """
+        if kind == "liquids":
+            if action == "remove":
+                self._seen.pop(obj, None)
+                return
+            seen = (obj.get_container(), obj.get_volume_left())
+            if self._seen.get(obj) != seen: # Renames and ABV do not change servings
+                self._seen[obj] = seen
+                self._versions[obj] = self._versions.get(obj, 0) + 1
+                if action == "change":
+                    self._emit("liquid", index, obj)
+        elif kind == "drinks":
+            if action == "remove":
+                self._left.pop(obj, None)
+            elif action == "add":
+                self._left[obj] = None
+            else: # Recipe may have changed, servings_left notices the new tuple
+                self._emit("update", index, obj)
+
+    def _loaded(self):
+        """ Returns liquid objects in a container """
+        return [liq for liq in self._registry.liquids if liq.get_container() != util.Container.NA.name]
+
+    def _emit(self, action, index, obj):
+        """ Tells subscribers servings of obj or drinks using it may have changed """
+        for callback in list(self._subscribers):
+            callback("servings", action, index, obj)
+
+def _count(needs):
+    """ Returns servings the loaded liquids hold of a drink needing ((liquid_obj, total oz), ...) """
+    left = None
+    for liq, oz in needs:
+        if liq.get_container() == util.Container.NA.name:
+            return 0
+        servings = int(liq.get_volume_left() / oz + EPSILON) if oz > 0 else None
+        if servings is not None and (left is None or servings < left):
+            left = servings
+    return left if left is not None else 0
+
+def _needs(dr):
+    """ Returns {liquid_obj:total oz} drink obj takes from each liquid """
+    needs = {}
+    for liq in dr.get_liquids_obj():
+        needs[liq[drink.LIQUID_POS]] = needs.get(liq[drink.LIQUID_POS], 0.0) + liq[drink.VOLUME_POS]
+    return needs
+
+def _max_servings(recipes, volumes):
+    """
+    Integer allocation, most total servings with sum of oz used per liquid at most its volume.
+    Drinks needing at least as much of every liquid as another drink are dropped first,
+    a pour of the other always fits in their place. Branch and bound over the rest,
+    most servings of the cheapest drinks first, with the bound that every serving
+    takes at least the smallest amount any remaining drink needs of one of its liquids.
+    @param recipes (list): [(drink_obj, oz needed per liquid as in volumes)]
+    Returns (servings, {drink_obj:count})
+    """
+    kept = []
+    for dr, needs in sorted(recipes, key=lambda recipe: sum(recipe[1])):
+        if any(all(a <= b for a, b in zip(other, needs)) for _, other in kept):
+            continue
+        if any(oz > 0 for oz in needs):
+            kept.append((dr, needs))
+    if not kept:
+        return 0, {}
+
+    n = len(kept)
+    # smallest[i][l]: least oz of liquid l a drink from i on needs, None if none uses it
+    smallest = [[None] * len(volumes) for _ in range(n + 1)]
+    for i in range(n - 1, -1, -1):
+        for l, oz in enumerate(kept[i][1]):
+            low = smallest[i + 1][l]
+            smallest[i][l] = oz if oz > 0 and (low is None or oz < low) else low
+    best = [0, [0] * n]
+    counts = [0] * n
+    seen = {} # {(i, volumes):most servings reached there}
+
+    def bound(i, vol):
+        return sum(int(v / oz + EPSILON) for v, oz in zip(vol, smallest[i]) if oz is not None)
+
+    def visit(i, vol, total):
+        if total > best[0]:
+            best[0], best[1] = total, list(counts)
+        if i == n or total + bound(i, vol) <= best[0]:
+            return
+        key = (i, vol)
+        if seen.get(key, -1) >= total:
+            return
+        seen[key] = total
+        needs = kept[i][1]
+        most = min(int(v / oz + EPSILON) for v, oz in zip(vol, needs) if oz > 0)
+        for count in range(most, -1, -1):
+            counts[i] = count
+            visit(i + 1, tuple(round(v - oz * count, 9) for v, oz in zip(vol, needs)), total + count)
+        counts[i] = 0
+
+    visit(0, tuple(volumes), 0)
+    return best[0], {kept[i][0]:count for i, count in enumerate(best[1]) if count}
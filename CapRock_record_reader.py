@@ -0,0 +1,181 @@
+"""
+CapRock_record_reader.py - Single pass reader for the text storage record format
+
+@author: Brian Kachala - ECE 4900 Team 8
+@Last Edited: 10/18/2026
+"""
+from collections import namedtuple
+import CapRock_backend_util as util
+
+SEPARATOR = "-----"
+
+# id is None for records saved before IDs existed, references are an int ID or a name from such records
+LiquidRecord = namedtuple("LiquidRecord", ["name", "abv", "density", "volume", "container", "id"])
+DrinkRecord = namedtuple("DrinkRecord", ["name", "liquids", "id"]) # liquids: [(liquid ref, oz)]
+UserRecord = namedtuple("UserRecord", ["name", "sex", "weight", "experience", "drinks", "id"]) # drinks: [(time_str, drink ref)]
+
+class StorageParseError(util.CapRockError):
+    """
+    Malformed record in a storage file.
+
+    Params:
+    path (string) - File being read
+    line (int) - 1 based line number of the bad field
+    message (string) - What was wrong
+    """
+
+    def __init__(self, path, line, message):
+        util.CapRockError.__init__(self, "%s:%d: %s" % (path, line, message))
+        self.path = path
+        self.line = line
+
+class _Fields():
+    """
+    Cursor over the non-blank lines of one record. Line numbers are only
+    worked out when an error has to be reported.
+    """
+
+    def __init__(self, path, first_line, raw):
+        self._path = path
+        self._first_line = first_line
+        self._raw = raw
+        self.lines = [text for text in raw if text] if "" in raw else raw
+        self.pos = 0
+
+    def error(self, message, pos=None):
+        """ Returns StorageParseError pointing at non-blank line pos, defaults to current """
+        pos = self.pos if pos is None else pos
+        seen = -1
+        for i, text in enumerate(self._raw):
+            if text:
+                seen = seen + 1
+                if seen == pos:
+                    return StorageParseError(self._path, self._first_line + i, message)
+        return StorageParseError(self._path, self._first_line + len(self._raw) - 1, message)
+
+    def text(self, what):
+        if self.pos >= len(self.lines):
+            raise self.error("record ended before %s" % what)
+        self.pos = self.pos + 1
+        return self.lines[self.pos - 1]
+
+    def number(self, what, convert=float):
+        raw = self.text(what)
+        try:
+            return convert(raw)
+        except ValueError:
+            raise self.error("%s must be a number, got %r" % (what, raw), self.pos - 1)
+
+    def member(self, what, enum):
+        raw = self.text(what)
+        if raw not in enum.__members__:
+            raise self.error("%s must be one of %s, got %r" % (what, "/".join(enum.__members__), raw), self.pos - 1)
+        return enum[raw]
+
+    def ident(self):
+        """ Returns ID of an '#<id>' first line, None if the record has no ID line """
+        if self.pos < len(self.lines):
+            ref = util.parse_ref(self.lines[self.pos])
+            if isinstance(ref, int):
+                self.pos = self.pos + 1
+                return ref
+        return None
+
+    def pairs(self, count, what):
+        """ Returns next count (line, line) pairs as a list """
+        end = self.pos + 2 * count
+        if count < 0 or end > len(self.lines):
+            raise self.error("expected %d %s entries" % (count, what), min(end, len(self.lines)))
+        block = self.lines[self.pos:end]
+        self.pos = end
+        return list(zip(block[0::2], block[1::2]))
+
+    def finish(self):
+        if self.pos != len(self.lines):
+            raise self.error("%d unexpected line(s) at end of record" % (len(self.lines) - self.pos))
+
+def _parse_liquid(fields):
+    obj_id = fields.ident()
+    return LiquidRecord(fields.text("name"), fields.number("abv"), fields.number("density"),
+                        fields.number("volume"), fields.member("container", util.Container), obj_id)
+
+def _parse_drink(fields):
+    obj_id = fields.ident()
+    name = fields.text("name")
+    count = fields.number("liquid count", int)
+    start = fields.pos
+    liquids = []
+    for i, (liq_name, oz) in enumerate(fields.pairs(count, "liquid")):
+        try:
+            liquids.append((util.parse_ref(liq_name), float(oz)))
+        except ValueError:
+            raise fields.error("liquid volume must be a number, got %r" % oz, start + 2 * i + 1)
+    return DrinkRecord(name, liquids, obj_id)
+
+def _parse_user(fields):
+    obj_id = fields.ident()
+    name = fields.text("name")
+    sex = fields.member("sex", util.Sex)
+    weight = fields.number("weight")
+    experience = fields.member("experience", util.Experience)
+    count = fields.number("drink count", int)
+    pours = [(time, util.parse_ref(ref)) for time, ref in fields.pairs(count, "pour")]
+    return UserRecord(name, sex, weight, experience, pours, obj_id)
+
+PARSERS = {"liquids":_parse_liquid, "drinks":_parse_drink, "users":_parse_user}
+
+def iter_raw_records(f, chunk_size=1 << 16):
+    """
+    Yields (first_line_number, lines) for every record of an open file, where
+    lines still holds blank lines. The file is read in chunks so memory is
+    bounded by the chunk size plus the largest record.
+    """
+    split_on = "\n" + SEPARATOR + "\n"
+    pending = ["\n"] # Chunks of the unfinished record, virtual line 0 so a separator on line 1 matches
+    tail = "\n" # End of pending text, a separator may straddle chunks
+    line_no = 0 # Line number of first line in pending
+    while True:
+        chunk = f.read(chunk_size)
+        if not chunk:
+            break
+        probe = tail + chunk
+        tail = probe[-len(split_on):]
+        pending.append(chunk)
+        if split_on not in probe:
+            continue
+
+        pieces = "".join(pending).split(split_on)
+        pending = [pieces.pop()] # Last piece may continue in next chunk
+        tail = pending[0][-len(split_on):]
+        for piece in pieces:
+            lines = piece.split("\n")
+            if any(lines):
+                yield line_no, lines
+            line_no = line_no + len(lines) + 1
+
+    rest = "".join(pending)
+    if rest.endswith("\n" + SEPARATOR):
+        rest = rest[:-len(SEPARATOR) - 1]
+    lines = rest.split("\n")
+    if any(lines):
+        yield line_no, lines
+
+def read_records(path, kind, errors=None):
+    """
+    Yields parsed records of kind ("liquids", "drinks" or "users") from path
+    @param errors (list): If given, malformed records are appended here as
+                          StorageParseError and skipped, otherwise raised
+    """
+    parse = PARSERS[kind]
+    with open(path, "r") as f:
+        for first_line, raw in iter_raw_records(f):
+            fields = _Fields(path, first_line, raw)
+            try:
+                record = parse(fields)
+                fields.finish()
+            except StorageParseError as e:
+                if errors is None:
+                    raise
+                errors.append(e)
+                continue
+            yield record
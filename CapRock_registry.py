@@ -0,0 +1,246 @@
+"""
+CapRock_registry.py - Class to hold and index every liquid, drink and user profile
+
+@author: Brian Kachala - ECE 4900 Team 8
+@Last Edited: 10/18/2026
+"""
+import CapRock_backend_util as util
+import CapRock_liquid as liquid
+import CapRock_drink as drink
+import CapRock_user as user
+
+class Registry():
+    """
+    Owns the liquid, drink and user profile lists and keeps name and ID lookups
+    and the liquid -> drinks dependency index in sync with them. Subscribers are
+    told of every add, remove and change so screens redraw only what changed.
+
+    Params:
+    liquids (list) - Previously stored liquid objects
+    drinks (list) - Previously stored drink objects
+    users (list) - Previously stored user objects
+    """
+
+    def __init__(self, liquids=(), drinks=(), users=()):
+        """
+        Constructor for registry class.
+        self.liquids, self.drinks, self.users (list) - Catalog in display order
+        self._ids (dict) - {kind:{stable ID:obj}}
+        self._liquid_drinks (dict) - {liquid_obj:set of drink_obj using it}
+        self._versions (dict) - {kind:number of changes}, kind is "liquids", "drinks" or "users"
+        self._positions (dict) - {kind:{obj:index in list} or None until next lookup after a removal}
+        self._subscribers (list) - Functions called as callback(kind, action, index, obj)
+        """
+        self.liquids = []
+        self.drinks = []
+        self.users = []
+        self._liquid_names = {} # {name:liquid_obj}
+        self._drink_names = {} # {name:drink_obj}
+        self._user_names = {} # {name:user_obj}
+        self._ids = {"liquids":{}, "drinks":{}, "users":{}}
+        self._liquid_drinks = {}
+        self._drink_liquids = {} # {drink_obj:liquid_objs linked in _liquid_drinks}
+        self._versions = {"liquids":0, "drinks":0, "users":0}
+        self._positions = {"liquids":{}, "drinks":{}, "users":{}}
+        self._subscribers = []
+
+        for liq in liquids:
+            self.add_liquid(liq)
+        for dr in drinks:
+            self.add_drink(dr)
+        for person in users:
+            self.add_user(person)
+
+    # Lookups
+    def get_liquid(self, name):
+        """ Returns liquid obj with name or None """
+        return self._liquid_names.get(name)
+
+    def get_drink(self, name):
+        """ Returns drink obj with name or None """
+        return self._drink_names.get(name)
+
+    def get_user(self, name):
+        """ Returns user obj with name or None """
+        return self._user_names.get(name)
+
+    def get_by_id(self, kind, obj_id):
+        """ Returns obj of list kind with stable ID obj_id or None """
+        return self._ids[kind].get(obj_id)
+
+    def drinks_using(self, liq):
+        """ Returns set of drink objects that contain liq """
+        return frozenset(self._liquid_drinks.get(liq, ()))
+
+    def liquid_in_drink(self, liq):
+        """ Returns True if any stored drink contains liq """
+        return bool(self._liquid_drinks.get(liq))
+
+    def position(self, kind, obj):
+        """ Returns index of obj in list kind, None if it is not in it """
+        positions = self._positions[kind]
+        if positions is None: # Rebuilt once after removals shifted the list
+            positions = {item:i for i, item in enumerate(getattr(self, kind))}
+            self._positions[kind] = positions
+        return positions.get(obj)
+
+    # Change events
+    def subscribe(self, callback):
+        """
+        Calls callback(kind, action, index, obj) after every change
+        kind: "liquids", "drinks" or "users", list that changed
+        action: "add", "remove" or "change", index is position in list (before removal)
+        """
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        """ Stops calling callback """
+        self._subscribers.remove(callback)
+
+    def version(self, kind):
+        """ Returns number of changes made to list kind, only grows """
+        return self._versions[kind]
+
+    # Additions
+    def add_liquid(self, liq):
+        """ Adds liquid obj to catalog """
+        if not isinstance(liq, liquid.Liquid):
+            raise util.CapRockError("Must be a liquid object")
+        self._claim_name(self._liquid_names, liq, "liquids")
+        self.liquids.append(liq)
+        self._liquid_drinks.setdefault(liq, set())
+        self._watch("liquids", liq)
+
+    def add_drink(self, dr):
+        """ Adds drink obj to catalog """
+        if not isinstance(dr, drink.Drink):
+            raise util.CapRockError("Must be a drink object")
+        self._claim_name(self._drink_names, dr, "drinks")
+        self.drinks.append(dr)
+        self._link_drink(dr)
+        self._watch("drinks", dr)
+
+    def add_user(self, person):
+        """ Adds user obj to catalog """
+        if not isinstance(person, user.User):
+            raise util.CapRockError("Must be a user object")
+        self._claim_name(self._user_names, person, "users")
+        self.users.append(person)
+        self._watch("users", person)
+
+    # Removals
+    def remove_liquid(self, liq):
+        """ Removes liquid obj from catalog. Must not be used by any drink """
+        if self.liquid_in_drink(liq):
+            raise util.CapRockError("%s is used in a stored drink!" % liq.get_name())
+        index = self.position("liquids", liq)
+        if index is None:
+            raise util.CapRockError("%s is not stored!" % liq.get_name())
+        del self.liquids[index]
+        del self._liquid_names[liq.get_name()]
+        del self._ids["liquids"][liq.get_id()]
+        self._liquid_drinks.pop(liq, None)
+        self._unwatch("liquids", index, liq)
+
+    def remove_drink(self, dr):
+        """ Removes drink obj from catalog """
+        index = self.position("drinks", dr)
+        if index is None:
+            raise util.CapRockError("%s is not stored!" % dr.get_name())
+        del self.drinks[index]
+        del self._drink_names[dr.get_name()]
+        del self._ids["drinks"][dr.get_id()]
+        self._unlink_drink(dr)
+        self._unwatch("drinks", index, dr)
+
+    def remove_user(self, person):
+        """ Removes user obj from catalog """
+        index = self.position("users", person)
+        if index is None:
+            raise util.CapRockError("%s is not stored!" % person.get_name())
+        del self.users[index]
+        del self._user_names[person.get_name()]
+        del self._ids["users"][person.get_id()]
+        self._unwatch("users", index, person)
+
+    def remove(self, obj):
+        """ Removes liquid, drink or user obj from catalog """
+        if isinstance(obj, liquid.Liquid):
+            self.remove_liquid(obj)
+        elif isinstance(obj, drink.Drink):
+            self.remove_drink(obj)
+        elif isinstance(obj, user.User):
+            self.remove_user(obj)
+        else:
+            raise util.CapRockError("Not a catalog object")
+
+    # Updates
+    def rename(self, obj, new_name):
+        """ Renames liquid, drink or user obj and keeps lookups valid """
+        if isinstance(obj, liquid.Liquid):
+            names = self._liquid_names
+        elif isinstance(obj, drink.Drink):
+            names = self._drink_names
+        elif isinstance(obj, user.User):
+            names = self._user_names
+        else:
+            raise util.CapRockError("Not a catalog object")
+
+        if new_name in names and names[new_name] is not obj:
+            raise util.CapRockError("%s already exists!" % new_name)
+        old_name = obj.get_name()
+        del names[old_name] # Index is right before change event goes out
+        names[new_name] = obj
+        try:
+            obj.change_name(new_name) # Validates length
+        except util.CapRockError:
+            del names[new_name]
+            names[old_name] = obj
+            raise
+
+    def reindex_drink(self, dr):
+        """ Refreshes dependency index after liquids of dr were changed """
+        self._unlink_drink(dr)
+        self._link_drink(dr)
+
+    # Helpers
+    def _claim_name(self, names, obj, kind):
+        """ Adds obj to name and ID indexes if neither is taken """
+        if obj.get_name() in names:
+            raise util.CapRockError("%s already exists!" % obj.get_name())
+        if obj.get_id() in self._ids[kind]:
+            raise util.CapRockError("ID %d of %s is taken!" % (obj.get_id(), obj.get_name()))
+        names[obj.get_name()] = obj
+        self._ids[kind][obj.get_id()] = obj
+
+    def _link_drink(self, dr):
+        """ Adds dr to the dependency set of each of its liquids """
+        liqs = [liq[drink.LIQUID_POS] for liq in dr.get_liquids_obj()]
+        for liq in liqs:
+            self._liquid_drinks.setdefault(liq, set()).add(dr)
+        self._drink_liquids[dr] = liqs
+
+    def _unlink_drink(self, dr):
+        """ Removes dr from the dependency sets it was linked into """
+        for liq in self._drink_liquids.pop(dr, ()):
+            self._liquid_drinks.get(liq, set()).discard(dr)
+
+    def _watch(self, kind, obj):
+        """ Sends add event for obj at end of list kind and listens to its changes """
+        index = len(getattr(self, kind)) - 1
+        if self._positions[kind] is not None:
+            self._positions[kind][obj] = index
+        obj.set_observer(lambda changed: self._notify(kind, "change", self.position(kind, changed), changed))
+        self._notify(kind, "add", index, obj)
+
+    def _unwatch(self, kind, index, obj):
+        """ Stops listening to obj and sends its remove event """
+        obj.set_observer(None)
+        self._positions[kind] = None # Later items moved up
+        self._notify(kind, "remove", index, obj)
+
+    def _notify(self, kind, action, index, obj):
+        """ Bumps version of kind and calls every subscriber """
+        self._versions[kind] = self._versions[kind] + 1
+        for callback in list(self._subscribers):
+            callback(kind, action, index, obj)
@@ -0,0 +1,202 @@
+"""
+CapRock_server.py - Local HTTP/JSON ordering server on top of CapRockService
+
+Routes:
+GET /menu, GET /inventory, GET /profiles
+GET /metrics - Call counts and latency percentiles, see CapRock_instrument
+POST /pour {"drink":name, "profile":name} - profile left out or "Guest" pours for a guest
+
+@author: Brian Kachala - ECE 4900 Team 8
+@Last Edited: 10/18/2026
+"""
+import asyncio
+import json
+import logging
+import threading
+import CapRock_backend_util as util
+import CapRock_instrument as instrument
+import CapRock_service as service
+
+log = logging.getLogger(__name__)
+
+MAX_BODY_BYTES = 1 << 16
+MAX_HEADERS = 64
+KEEP_ALIVE_S = 30 # Idle connections are closed after this long
+REASONS = {200:"OK", 400:"Bad Request", 404:"Not Found", 405:"Method Not Allowed", 409:"Conflict",
+           413:"Payload Too Large", 500:"Internal Server Error"}
+
+class HTTPError(util.CapRockError):
+    """
+    Request that is answered with an error status.
+
+    Params:
+    status (int) - HTTP status code
+    message (string) - Sent back as {"error":message}
+    """
+
+    def __init__(self, status, message):
+        util.CapRockError.__init__(self, message)
+        self.status = status
+
+class CapRockServer():
+    """
+    Serves a CapRockService over HTTP with asyncio on its own thread, so many
+    clients share one thread and the Tk main loop is never blocked. Service
+    calls run in worker threads since they wait on the service lock.
+
+    Params:
+    service (CapRock_service.CapRockService) - Core taking the orders
+    host (string) - Address to listen on
+    port (int) - Port to listen on, 0 picks a free one
+    """
+
+    def __init__(self, service, host=util.SERVER_HOST, port=util.SERVER_PORT):
+        self.service = service
+        self.host = host
+        self.port = port
+        self._loop = None
+        self._server = None
+        self._thread = None
+
+    def start(self):
+        """ Starts server thread, returns once listening. Raises OSError if port cannot be bound """
+        started = threading.Event()
+        failure = []
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            try:
+                self._server = self._loop.run_until_complete(asyncio.start_server(self._handle, self.host, self.port))
+            except OSError as e:
+                failure.append(e)
+                self._loop.close()
+                started.set()
+                return
+            self.port = self._server.sockets[0].getsockname()[1]
+            started.set()
+            self._loop.run_forever()
+            self._loop.run_until_complete(self._shutdown())
+            self._loop.close()
+
+        self._thread = threading.Thread(target=run, name="CapRockServer", daemon=True)
+        self._thread.start()
+        started.wait()
+        if failure:
+            raise failure[0]
+        log.info("Ordering server listening on %s:%d", self.host, self.port)
+
+    def stop(self):
+        """ Stops server and waits for its thread """
+        if self._thread is None:
+            return
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._thread = None
+
+    async def _shutdown(self):
+        """ Closes listener and drops open connections """
+        self._server.close()
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self._server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        """ Serves requests of one connection until it closes or idles out """
+        try:
+            while True:
+                try:
+                    line = await asyncio.wait_for(reader.readline(), KEEP_ALIVE_S)
+                except asyncio.TimeoutError:
+                    break
+                if not line:
+                    break
+                keep_alive = True
+                try:
+                    method, path, version = line.decode("latin-1").split()
+                    headers = await self._read_headers(reader)
+                    keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                    length = int(headers.get("content-length", 0))
+                    if length > MAX_BODY_BYTES:
+                        raise HTTPError(413, "Body larger than %d bytes" % MAX_BODY_BYTES)
+                    body = await reader.readexactly(length) if length else b""
+                    status, payload = 200, await self._route(method, path.split("?")[0], body)
+                except HTTPError as e:
+                    status, payload = e.status, {"error":str(e)}
+                except ValueError:
+                    status, payload, keep_alive = 400, {"error":"Malformed request"}, False
+                except Exception as e:
+                    log.error("%s : Ordering server request failed", str(e))
+                    status, payload, keep_alive = 500, {"error":"Internal error"}, False
+                self._respond(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass # Client went away
+        except asyncio.CancelledError:
+            pass # Server stopping
+        finally:
+            writer.close()
+
+    async def _read_headers(self, reader):
+        """ Returns {lowercase name:value} of request headers """
+        headers = {}
+        for _ in range(MAX_HEADERS):
+            line = (await reader.readline()).decode("latin-1").strip()
+            if not line:
+                return headers
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        raise HTTPError(400, "Too many headers")
+
+    async def _route(self, method, path, body):
+        """ Returns JSON payload of request or raises HTTPError """
+        queries = {"/menu":self.service.menu, "/inventory":self.service.inventory, "/profiles":self.service.profiles,
+                   "/metrics":instrument.snapshot}
+        if path in queries:
+            if method != "GET":
+                raise HTTPError(405, "%s only accepts GET" % path)
+            return await asyncio.to_thread(queries[path])
+        if path == "/pour":
+            if method != "POST":
+                raise HTTPError(405, "/pour only accepts POST")
+            return await asyncio.to_thread(self._pour, self._json(body))
+        raise HTTPError(404, "No route %s" % path)
+
+    def _pour(self, order):
+        """ Pours order {"drink":name, "profile":name} on a worker thread """
+        if not isinstance(order.get("drink"), str):
+            raise HTTPError(400, "drink must be a drink name string")
+        if not isinstance(order.get("profile", ""), (str, type(None))):
+            raise HTTPError(400, "profile must be a profile name string")
+        name = order.get("profile") or service.GUEST_NAME
+        try:
+            pour, _, level = self.service.pour_order(order["drink"], name, durable=True)
+        except KeyError as e:
+            raise HTTPError(404, e.args[0])
+        except util.CapRockError as e:
+            raise HTTPError(409, str(e))
+        return {"drink":pour.drink.get_name(), "profile":name, "time":pour.time, "bac":level}
+
+    @staticmethod
+    def _json(body):
+        """ Returns dict decoded from request body """
+        try:
+            order = json.loads(body.decode("utf-8"))
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            raise HTTPError(400, "Body must be JSON")
+        if not isinstance(order, dict):
+            raise HTTPError(400, "Body must be a JSON object")
+        return order
+
+    @staticmethod
+    def _respond(writer, status, payload, keep_alive):
+        """ Writes JSON response """
+        body = json.dumps(payload).encode("utf-8")
+        head = "HTTP/1.1 %d %s\r\nContent-Type: application/json\r\nContent-Length: %d\r\nConnection: %s\r\n\r\n" % (
+            status, REASONS.get(status, ""), len(body), "keep-alive" if keep_alive else "close")
+        writer.write(head.encode("latin-1") + body)
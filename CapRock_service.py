@@ -0,0 +1,267 @@
+"""
+CapRock_service.py - Headless CapRock core shared by the GUI and the ordering server
+
+@author: Brian Kachala - ECE 4900 Team 8
+@Last Edited: 10/18/2026
+"""
+import threading
+import CapRock_backend_util as util
+import CapRock_clock as clock
+import CapRock_drink as drink
+import CapRock_feasibility as feasibility
+import CapRock_instrument as instrument
+import CapRock_optimizer as optimizer
+import CapRock_planner as planner
+import CapRock_registry as registry
+import CapRock_user as user
+
+GUEST_NAME = "Guest" # Profile name of guests unless a profile is named that
+
+class CapRockService():
+    """
+    Owns the catalog, the loaded containers and the pour journal. Every
+    operation holds self.lock, so the GUI thread and the server thread can
+    both use it and a save never lands between a pour and its journal record.
+
+    Params:
+    users (list) - Previously stored user objects
+    drinks (list) - Previously stored drink objects
+    liquids (list) - Previously stored liquid objects
+    pour_journal (CapRock_journal.PourJournal) - Journal pours are recorded in, optional
+    pour_archive (CapRock_archive.PourArchive) - Archive pours leaving profile history go to, optional
+    """
+
+    def __init__(self, users, drinks, liquids, pour_journal=None, pour_archive=None):
+        """
+        Constructor for service class.
+        self.stored_liquids (dict) - {container_code_str:liquid_obj or None}
+        self.feasibility (FeasibilityIndex) - Which drinks can be poured now
+        self.planner (ServingsPlanner) - How many of each drink are left
+        self._changed (dict) - {kind:set of objs changed since the last save, None once one was added or removed
+                               and before the first save, which compares the whole catalog}
+        """
+        self.lock = threading.RLock()
+        self.registry = registry.Registry(liquids, drinks, users)
+        self.feasibility = feasibility.FeasibilityIndex(self.registry) # Subscribed first so it is current for later subscribers
+        self.planner = planner.ServingsPlanner(self.registry)
+        self.journal = pour_journal
+        self.archive = pour_archive
+        user.set_expired_sink(None if pour_archive is None else pour_archive.add_pours)
+        self.stored_liquids = util.current_liquids(self.registry.liquids)
+        self._changed = {"liquids":None, "drinks":None, "users":None} # Loaded objects may be dirty from journal replay
+        self.registry.subscribe(self._track_change)
+
+    def subscribe(self, callback):
+        """
+        Calls callback(kind, action, index, obj) after every catalog change, see
+        Registry.subscribe, when a drink becomes makeable or not, see FeasibilityIndex.subscribe,
+        and when servings left may have changed, see ServingsPlanner.subscribe
+        """
+        self.registry.subscribe(callback)
+        self.feasibility.subscribe(callback)
+        self.planner.subscribe(callback)
+
+    # Queries
+    def menu(self):
+        """ Returns list of drink info dicts with "available" set if drink can be made now and "servings_left" """
+        with self.lock:
+            result = []
+            for dr in self.registry.drinks:
+                info = dr.get_drink_info()
+                info["available"] = self.feasibility.is_makeable(dr)
+                info["servings_left"] = self.planner.servings_left(dr)
+                result.append(info)
+            return result
+
+    def inventory(self):
+        """ Returns list of liquid info dicts """
+        with self.lock:
+            return [liq.get_liquid_info() for liq in self.registry.liquids]
+
+    def profiles(self):
+        """ Returns list of profile dicts (name, sex, weight, experience, bac) """
+        with self.lock:
+            return [{"name":person.get_name(), "sex":person.get_sex(), "weight":person.get_weight(),
+                     "experience":person.get_experience(), "bac":person.get_bac()} for person in self.registry.users]
+
+    def bac(self, person):
+        """ Returns current BAC of person, under the lock since it pops pours that wore off """
+        with self.lock:
+            return person.get_bac()
+
+    def time_until(self, person, threshold=util.LEGAL_BAC_LIMIT):
+        """ Returns seconds until BAC of person drops to threshold, see User.time_until """
+        with self.lock:
+            return person.time_until(threshold)
+
+    def check_drink(self, dr):
+        """ Returns why drink obj cannot be made right now, empty string if it can """
+        stored = [liq for liq in self.stored_liquids.values() if liq is not None]
+        errorMsg = ""
+        for liq in dr.get_liquids_obj():
+            liq_obj = liq[drink.LIQUID_POS]
+            volume = liq[drink.VOLUME_POS]
+            if liq_obj not in stored:
+                errorMsg = "Unable to make %s! %s is not in storage." % (dr.get_name(), liq_obj.get_name())
+            elif volume > liq_obj.get_volume_left():
+                errorMsg = "Unable to make %s! %s requires %s oz of liquid but only %s oz remaining" % (dr.get_name(), liq_obj.get_name(), volume, liq_obj.get_volume_left())
+        return errorMsg
+
+    def plan_servings(self, queue=()):
+        """ Returns planner.Plan of pours getting the most servings out of the containers after queue of drink objs """
+        with self.lock:
+            return self.planner.plan(queue)
+
+    def usage(self, by, measure="pours", start=None, end=None):
+        """
+        Returns {user, drink, liquid name or hour:total} of archived pours, see PourArchive.totals.
+        Names are the current ones, deleted entities keep the last name archived
+        """
+        if self.archive is None:
+            raise util.CapRockError("No pour archive!")
+        kinds = {"user":self.registry.users, "drink":self.registry.drinks, "liquid":self.registry.liquids}
+        with self.lock:
+            names = {obj.get_id():obj.get_name() for obj in kinds.get(by, ())}
+        return self.archive.totals(by, measure, start, end, names)
+
+    def suggest_loadings(self, k=3, by_popularity=True):
+        """
+        Returns up to k optimizer.Loading of the liquids to load that make the most drinks,
+        by_popularity weights drinks by how often they were poured
+        """
+        with self.lock: # Search runs on a copy so pours are not held up
+            drinks = list(self.registry.drinks)
+            liquids = list(self.registry.liquids)
+            weights = optimizer.popularity_weights(self.registry.users, drinks) if by_popularity else None
+        return optimizer.best_loadings(drinks, liquids, k, weights)
+
+    # Operations
+    def expire(self, now=None):
+        """ Moves pours past SESSION_TIME out of profile history, to the archive if there is one. Returns number moved """
+        with self.lock:
+            return sum(person.expire(now) for person in self.registry.users)
+
+    @instrument.timed("service.pour")
+    def pour(self, dr, person=None, durable=False):
+        """
+        Pours drink obj for person and returns its user.Pour
+        @param person (User): Profile drinking, None for a guest whose history is not kept
+        @param durable (bool): Wait until the pour is fsynced in the journal, util.CapRockError if that fails
+        """
+        with self.lock:
+            pour, seq = self._pour_locked(dr, person)
+        if durable and seq is not None:
+            self.journal.wait_durable(seq)
+        return pour
+
+    @instrument.timed("service.pour_order")
+    def pour_order(self, drink_name, profile_name=None, durable=False):
+        """
+        Pours drink named drink_name for profile named profile_name. Names are
+        looked up under the same lock as the pour, so no rename or removal comes in between.
+        Returns (user.Pour, profile obj or None for a guest, BAC of profile after the pour or None)
+        Raises KeyError for an unknown name, util.CapRockError if the drink cannot be poured
+        @param profile_name (string): None, or "Guest" unless a profile has that name, pours for a guest
+        """
+        with self.lock:
+            dr = self.registry.get_drink(drink_name)
+            if dr is None:
+                raise KeyError("No drink named %s" % drink_name)
+            person = None if profile_name is None else self.registry.get_user(profile_name)
+            if person is None and profile_name not in (None, GUEST_NAME):
+                raise KeyError("No profile named %s" % profile_name)
+            pour, seq = self._pour_locked(dr, person)
+            level = None if person is None else person.get_bac()
+        if durable and seq is not None:
+            self.journal.wait_durable(seq)
+        return pour, person, level
+
+    def load_container(self, container, liq=None, volume=0):
+        """
+        Puts liquid obj with volume oz in container, emptying what was there
+        @param liq (Liquid): None leaves container empty
+        """
+        if not isinstance(container, util.Container) or container == util.Container.NA:
+            raise util.CapRockError("Not a valid container")
+        with self.lock:
+            prev_liq = self.stored_liquids.get(container.name)
+            if prev_liq is not None:
+                prev_liq.remove_container()
+            if liq is not None:
+                liq.change_container(container)
+                liq.change_volume_left(volume)
+            self.stored_liquids = util.current_liquids(self.registry.liquids)
+
+    def update_profile(self, person, weight, sex, experience):
+        """ Changes weight, sex and experience of person """
+        with self.lock:
+            person.change_weight(weight)
+            person.change_sex(sex)
+            person.change_experience(experience)
+
+    def add(self, obj):
+        """ Adds liquid, drink or user obj to catalog """
+        with self.lock:
+            if isinstance(obj, drink.Drink):
+                self.registry.add_drink(obj)
+            elif isinstance(obj, user.User):
+                self.registry.add_user(obj)
+            else:
+                self.registry.add_liquid(obj)
+
+    def remove(self, obj):
+        """ Removes liquid, drink or user obj from catalog, liquids must not be loaded """
+        with self.lock:
+            if obj in self.stored_liquids.values():
+                raise util.CapRockError("%s is in a container!" % obj.get_name())
+            self.registry.remove(obj)
+
+    def snapshot(self):
+        """ Expires old pours, saves storage and compacts pour journal once the save succeeded. Returns True if saved """
+        with self.lock:
+            self.expire()
+            if self.archive is not None: # Expired pours are on disk before the save drops them
+                try:
+                    self.archive.flush()
+                except util.CapRockError:
+                    return False
+            seq = None if self.journal is None else self.journal.last_seq()
+            saved = util.save_storage(self.registry.users, self.registry.drinks, self.registry.liquids,
+                                      changed=self._changed, journal_seq=seq)
+            if saved:
+                self._changed = {"liquids":set(), "drinks":set(), "users":set()}
+                if self.journal is not None:
+                    self.journal.checkpoint()
+            return saved
+
+    def _pour_locked(self, dr, person):
+        """
+        Pours drink obj for person, caller holds self.lock. Journaled first, so
+        nothing changes if the journal fails. Returns (user.Pour, journal sequence number or None)
+        """
+        errorMsg = self.check_drink(dr)
+        if errorMsg:
+            raise util.CapRockError(errorMsg)
+        when = float(int(clock.now()))
+        seq = None
+        if self.journal is not None:
+            seq = self.journal.record_pour(0 if person is None else person.get_id(), dr.get_id(),
+                                           [(liq.get_id(), oz) for liq, oz in dr.get_liquids_obj()], when)
+        for liq in dr.get_liquids_obj(): # Update volume of liquids used to make drink
+            liq_obj = liq[drink.LIQUID_POS]
+            liq_obj.change_volume_left(liq_obj.get_volume_left() - liq[drink.VOLUME_POS])
+
+        if person is not None:
+            person.expire() # History of a profile stays bounded between saves
+            pour = person.add_drink(dr, time=when)
+        else:
+            pour = user.Pour(when, dr, dr.get_alcohol_grams())
+        return pour, seq
+
+    def _track_change(self, kind, action, index, obj):
+        """ Collects objects the next save has to look at, so it does not compare the whole catalog """
+        if action == "change":
+            if self._changed[kind] is not None:
+                self._changed[kind].add(obj)
+        else:
+            self._changed[kind] = None
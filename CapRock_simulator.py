@@ -0,0 +1,261 @@
+"""
+CapRock_simulator.py - Discrete-event party simulation through the real pour path at accelerated time
+
+Usage: python CapRock_simulator.py [--guests N] [--hours H] [--arrival NAME] [--synthetic] [--seed N]
+
+@author: Brian Kachala - ECE 4900 Team 8
+@Last Edited: 10/18/2026
+"""
+import argparse
+import heapq
+import os
+import random
+import shutil
+import tempfile
+import time
+import CapRock_backend_util as util
+import CapRock_clock as clock
+import CapRock_drink as drink
+import CapRock_liquid as liquid
+import CapRock_service as service
+import CapRock_storage as storage
+import CapRock_user as user
+
+HOUR = 60*60
+
+def _poisson_arrivals(rng, guests, window):
+    """ Exponential gaps, guests show up at a steady average rate over window seconds """
+    times = []
+    t = 0.0
+    for _ in range(guests):
+        t = t + rng.expovariate(guests / window)
+        times.append(min(t, window))
+    return times
+
+def _uniform_arrivals(rng, guests, window):
+    """ Every second of window equally likely """
+    return sorted(rng.uniform(0, window) for _ in range(guests))
+
+def _burst_arrivals(rng, guests, window):
+    """ Most guests in the first tenth of window, like doors opening """
+    return sorted(min(rng.expovariate(10 / window), window) for _ in range(guests))
+
+ARRIVALS = {"poisson":_poisson_arrivals, "uniform":_uniform_arrivals, "burst":_burst_arrivals}
+
+class PartySimulator():
+    """
+    Runs a party on a CapRockService with a VirtualClock that jumps from event
+    to event. Guests arrive per an ARRIVALS distribution, are added as
+    profiles and then order a drink they can get every order_minutes on
+    average, until their BAC passes max_bac or the party ends. Orders go
+    through CapRockService.pour, so volume checks, container volumes, BAC and
+    pour history are the real ones, and the catalog is saved every
+    save_minutes. An empty container is refilled refill_minutes later.
+
+    Params:
+    core (CapRock_service.CapRockService) - Catalog and loaded containers, changed by the run
+    guests (int) - Number of guests
+    hours (float) - Length of party
+    arrival (string) - Key of ARRIVALS
+    arrival_hours (float) - Hours from the start guests arrive in
+    order_minutes (float) - Mean minutes between orders of a guest
+    max_bac (float) - Guests stop ordering above this BAC, None never stops them
+    save_minutes (float) - Minutes between saves, None never saves
+    refill_minutes (float) - Minutes until an empty container is refilled, None never refills
+    seed (int) - Seed of guest profiles, arrivals and orders
+    start (float) - Epoch seconds party starts at
+    """
+
+    def __init__(self, core, guests=100, hours=8, arrival="poisson", arrival_hours=2, order_minutes=30,
+                 max_bac=util.LEGAL_BAC_LIMIT, save_minutes=1, refill_minutes=5, seed=0, start=None):
+        """
+        Constructor for party simulator.
+        self._events (list) - Heap of (epoch seconds, sequence number, action, argument)
+        self._latency (dict) - {operation:list of wall clock seconds it took}
+        self._depleted (dict) - {liquid name:[hours since start it ran out]}
+        """
+        if arrival not in ARRIVALS:
+            raise util.CapRockError("Unknown arrival distribution %s" % arrival)
+        self.core = core
+        self._guests = guests
+        self._hours = hours
+        self._arrival = arrival
+        self._arrival_hours = arrival_hours
+        self._order_minutes = order_minutes
+        self._max_bac = max_bac
+        self._save_minutes = save_minutes
+        self._refill_minutes = refill_minutes
+        self._rng = random.Random(seed)
+        self._start = float(int(time.time())) if start is None else start
+        self._clock = clock.VirtualClock(self._start)
+        self._events = []
+        self._seq = 0
+        self._latency = {"pour":[], "bac":[], "menu":[], "save":[]}
+        self._counts = {"pours":0, "cut off":0, "nothing available":0, "failed":0, "saves":0, "refills":0}
+        self._depleted = {}
+        self._refilling = set()
+
+    def run(self):
+        """ Simulates the whole party and returns report dict, see print_report """
+        previous = clock.set_clock(self._clock)
+        wall_start = time.perf_counter()
+        try:
+            end = self._start + self._hours * HOUR
+            window = min(self._arrival_hours, self._hours) * HOUR
+            for offset in ARRIVALS[self._arrival](self._rng, self._guests, window):
+                self._schedule(self._start + offset, "arrive", None)
+            if self._save_minutes:
+                self._schedule(self._start + self._save_minutes * 60, "save", None)
+
+            while self._events and self._events[0][0] <= end:
+                when, _, action, arg = heapq.heappop(self._events)
+                self._clock.set(when)
+                getattr(self, "_on_" + action)(arg)
+            self._clock.set(max(end, self._clock.now()))
+            self._timed("save", self.core.snapshot) # Closing save like the kiosk on exit
+        finally:
+            clock.set_clock(previous)
+        return self._report(time.perf_counter() - wall_start)
+
+    # Events
+    def _on_arrive(self, arg):
+        rng = self._rng
+        guest = user.User("Guest %d" % self._seq, rng.choice(list(util.Sex)), float(rng.randint(110, 250)),
+                          rng.choice(list(util.Experience)))
+        self.core.add(guest)
+        self._schedule_order(guest)
+
+    def _on_order(self, guest):
+        bac = self._timed("bac", lambda: self.core.bac(guest))
+        if self._max_bac is not None and bac > self._max_bac:
+            self._counts["cut off"] = self._counts["cut off"] + 1
+            return # Guest is done for the night
+        menu = self._timed("menu", self.core.feasibility.makeable_drinks)
+        if not menu:
+            self._counts["nothing available"] = self._counts["nothing available"] + 1
+        else:
+            dr = self._rng.choice(menu)
+            try:
+                self._timed("pour", lambda: self.core.pour(dr, guest))
+                self._counts["pours"] = self._counts["pours"] + 1
+            except util.CapRockError:
+                self._counts["failed"] = self._counts["failed"] + 1
+            self._check_depleted(dr)
+        self._schedule_order(guest)
+
+    def _on_save(self, arg):
+        self._timed("save", self.core.snapshot)
+        self._counts["saves"] = self._counts["saves"] + 1
+        self._schedule(self._clock.now() + self._save_minutes * 60, "save", None)
+
+    def _on_refill(self, liq):
+        self._refilling.discard(liq)
+        container = util.Container[liq.get_container()]
+        self.core.load_container(container, liq, util.MAX_VOLUME_OZ)
+        self._counts["refills"] = self._counts["refills"] + 1
+
+    # Helpers
+    def _schedule(self, when, action, arg):
+        self._seq = self._seq + 1
+        heapq.heappush(self._events, (when, self._seq, action, arg))
+
+    def _schedule_order(self, guest):
+        self._schedule(self._clock.now() + self._rng.expovariate(1 / (self._order_minutes * 60)), "order", guest)
+
+    def _timed(self, operation, func):
+        """ Returns func(), wall clock time it took is kept under operation """
+        start = time.perf_counter()
+        result = func()
+        self._latency[operation].append(time.perf_counter() - start)
+        return result
+
+    def _check_depleted(self, dr):
+        """ Records liquids of dr too low for any drink using them and schedules their refill """
+        for liq, _ in dr.get_liquids_obj():
+            if liq in self._refilling or liq.get_container() == util.Container.NA.name:
+                continue
+            need = min(oz for user_dr in self.core.registry.drinks_using(liq)
+                       for user_liq, oz in user_dr.get_liquids_obj() if user_liq is liq)
+            if liq.get_volume_left() < need:
+                hours = (self._clock.now() - self._start) / HOUR
+                self._depleted.setdefault(liq.get_name(), []).append(hours)
+                if self._refill_minutes is not None:
+                    self._refilling.add(liq)
+                    self._schedule(self._clock.now() + self._refill_minutes * 60, "refill", liq)
+
+    def _report(self, wall_seconds):
+        simulated = self._clock.now() - self._start
+        return {"guests":self._guests, "hours":simulated / HOUR, "wall_seconds":wall_seconds,
+                "speedup":simulated / wall_seconds if wall_seconds else float("inf"),
+                "counts":dict(self._counts), "pours_per_hour":self._counts["pours"] / (simulated / HOUR) if simulated else 0.0,
+                "depleted":{name:list(times) for name, times in self._depleted.items()},
+                "latency":{op:percentiles(samples) for op, samples in self._latency.items()}}
+
+def percentiles(samples):
+    """ Returns {"count", "p50", "p90", "p99", "max"} of samples in seconds, None if there are none """
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    return {"count":len(ordered), "p50":pick(.5), "p90":pick(.9), "p99":pick(.99), "max":ordered[-1]}
+
+def print_report(report):
+    """ Prints report returned by PartySimulator.run """
+    print("%d guests, %.1f h simulated in %.2f s (%.0fx)" % (report["guests"], report["hours"], report["wall_seconds"], report["speedup"]))
+    print(", ".join("%s %d" % item for item in report["counts"].items()))
+    print("%.1f pours per hour" % report["pours_per_hour"])
+    for name, times in sorted(report["depleted"].items(), key=lambda item: item[1][0]):
+        print("%-24s ran out %d time(s), first at %.2f h" % (name, len(times), times[0]))
+    print("%-8s %8s %10s %10s %10s %10s" % ("op", "count", "p50 [ms]", "p90 [ms]", "p99 [ms]", "max [ms]"))
+    for op, res in report["latency"].items():
+        if res is not None:
+            print("%-8s %8d %10.3f %10.3f %10.3f %10.3f" % (op, res["count"], res["p50"] * 1e3, res["p90"] * 1e3,
+                                                           res["p99"] * 1e3, res["max"] * 1e3))
+
+def synthetic_catalog(drinks=12, seed=0):
+    """ Returns (users, drinks, liquids) with a full liquid in every container and drinks mixing them """
+    rng = random.Random(seed)
+    containers = [c for c in util.Container if c != util.Container.NA]
+    liquids = [liquid.Liquid("Spirit %d" % i, .4, .95, util.MAX_VOLUME_OZ, c) for i, c in enumerate(containers)]
+    drink_list = [drink.Drink("Mix %d" % i, *[(liq, rng.choice((.5, 1.0, 1.5))) for liq in rng.sample(liquids, rng.randint(1, 2))])
+                  for i in range(drinks)]
+    return [], drink_list, liquids
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulate a party on the CapRock catalog at accelerated time")
+    parser.add_argument("--guests", type=int, default=100)
+    parser.add_argument("--hours", type=float, default=8)
+    parser.add_argument("--arrival", choices=sorted(ARRIVALS), default="poisson")
+    parser.add_argument("--arrival-hours", type=float, default=2, help="Hours from the start guests arrive in")
+    parser.add_argument("--order-minutes", type=float, default=30, help="Mean minutes between orders of a guest")
+    parser.add_argument("--refill-minutes", type=float, default=5, help="Minutes until an empty container is refilled")
+    parser.add_argument("--save-minutes", type=float, default=1, help="Minutes between saves")
+    parser.add_argument("--scale", choices=sorted(util.SCALE_MODES), default="venue")
+    parser.add_argument("--synthetic", action="store_true", help="Use a generated catalog instead of the stored one")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    util.configure_scale(args.scale)
+    users, drinks, liquids = [], [], []
+    if not args.synthetic:
+        try:
+            users, drinks, liquids = util.load_storage()
+        except Exception as e:
+            print("%s - No stored catalog, using a generated one" % str(e))
+        storage.get_backend().close()
+    if not drinks:
+        users, drinks, liquids = synthetic_catalog(seed=args.seed)
+
+    cwd = os.getcwd()
+    folder = tempfile.mkdtemp()
+    try:
+        os.chdir(folder) # Saves of the run go to a scratch 'backend/', stored catalog is never touched
+        storage._instances.clear()
+        core = service.CapRockService(users, drinks, liquids)
+        sim = PartySimulator(core, args.guests, args.hours, args.arrival, args.arrival_hours, args.order_minutes,
+                             save_minutes=args.save_minutes, refill_minutes=args.refill_minutes, seed=args.seed)
+        print_report(sim.run())
+        storage.get_backend().close()
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(folder, ignore_errors=True)
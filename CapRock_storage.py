@@ -0,0 +1,523 @@
+"""
+CapRock_storage.py - Storage backends used by util.load_storage and util.save_storage
+
+@author: Brian Kachala - ECE 4900 Team 8
+@Last Edited: 10/18/2026
+"""
+import logging
+import os
+import sqlite3
+import threading
+from collections import Counter
+import CapRock_backend_util as util
+import CapRock_liquid as liquid
+import CapRock_drink as drink
+import CapRock_user as user
+
+log = logging.getLogger(__name__)
+
+SQLITE_PATH = "backend/caprock.db"
+
+# Objects are keyed by their stable ID, recipe lines and pours reference IDs so renames touch one row
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS liquids (id INTEGER PRIMARY KEY, name TEXT NOT NULL, abv REAL NOT NULL, density REAL NOT NULL,
+                                    volume_left REAL NOT NULL, container TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS liquids_container ON liquids (container);
+CREATE TABLE IF NOT EXISTS drinks (id INTEGER PRIMARY KEY, name TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS recipe_lines (drink INTEGER NOT NULL, position INTEGER NOT NULL, liquid INTEGER NOT NULL,
+                                         volume REAL NOT NULL, PRIMARY KEY (drink, position)) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS recipe_lines_liquid ON recipe_lines (liquid);
+CREATE TABLE IF NOT EXISTS users (id INTEGER PRIMARY KEY, name TEXT NOT NULL, sex TEXT NOT NULL, weight REAL NOT NULL,
+                                  experience TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS pours (id INTEGER PRIMARY KEY, user INTEGER NOT NULL, time REAL NOT NULL, drink INTEGER NOT NULL);
+CREATE INDEX IF NOT EXISTS pours_user ON pours (user);
+CREATE INDEX IF NOT EXISTS pours_drink ON pours (drink);
+"""
+
+class StorageBackend():
+    """
+    Interface every storage backend implements. Tracks which IDs were last
+    persisted so subclasses only write dirty or new objects and delete removed ones.
+    """
+
+    def __init__(self):
+        """
+        Constructor for storage backend.
+        self._saved (dict) - {kind:[IDs in order]} as of the last load or save
+        self._saved_next_ids (dict) - util.next_ids() as of the last load or save
+        self.journal_seq (int) - Last pour journal sequence number the stored catalog holds, None if saved without one
+        """
+        self._saved = {"liquids":[], "drinks":[], "users":[]}
+        self._saved_next_ids = None
+        self.journal_seq = None
+
+    def load(self):
+        """ Returns tuple of previous stored data (Users, Drinks, Liquids) """
+        raise NotImplementedError
+
+    def save(self, users, drinks, liquids, changed=None, journal_seq=None):
+        """
+        Saves information to storage. Raises util.CapRockError on failure
+        @param changed (dict): {kind:set of objs changed since the last save, None if any were added or removed},
+                               lets a save skip comparing every object, None compares all
+        @param journal_seq (int): Last pour journal sequence number the objects hold, stored once the objects are,
+                                  so journal replay skips records at or below it. None keeps the stored one
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """ Releases any resources held by the backend """
+        pass
+
+    def _pending(self, kind, objs, changed=None):
+        """
+        Returns (objs to write, IDs to delete, current IDs in order)
+        compared to what was last persisted for kind. If only objects in
+        changed can differ, order and IDs are kept without looking at the
+        other objects, a rename is just a dirty object. A dirty object missing
+        from changed, e.g. changed before it was tracked, means a full compare.
+        """
+        if changed is not None and changed.get(kind) is not None and len(objs) == len(self._saved[kind]):
+            tracked = changed[kind]
+            if not any(obj.is_dirty() and obj not in tracked for obj in objs):
+                return [obj for obj in tracked if obj.is_dirty()], set(), self._saved[kind]
+        saved = set(self._saved[kind])
+        ids = [obj.get_id() for obj in objs]
+        to_write = [obj for obj, obj_id in zip(objs, ids) if obj.is_dirty() or obj_id not in saved]
+        to_delete = saved.difference(ids)
+        return to_write, to_delete, ids
+
+    def _pending_next_ids(self):
+        """ Returns util.next_ids() if they moved since last persisted, else None """
+        next_ids = util.next_ids()
+        return None if next_ids == self._saved_next_ids else next_ids
+
+    def _save_next_ids_file(self):
+        """ Writes util.NEXT_IDS_PATH of the text backends if IDs were handed out since the last save """
+        next_ids = self._pending_next_ids()
+        if next_ids is None:
+            return
+        try:
+            folder = os.path.dirname(util.NEXT_IDS_PATH)
+            if folder and not os.path.exists(folder):
+                os.makedirs(folder)
+            util.save_next_ids(next_ids)
+        except OSError as e:
+            log.error("%s : Failed to save next IDs!", str(e))
+            raise util.CapRockError("%s failed to save!" % util.NEXT_IDS_PATH)
+        self._saved_next_ids = next_ids
+
+    def _save_journal_seq_file(self, journal_seq):
+        """ Writes util.JOURNAL_SEQ_PATH of the text backends, after every other file of the save """
+        if journal_seq is None or journal_seq == self.journal_seq:
+            return
+        try:
+            util.save_journal_seq(journal_seq)
+        except OSError as e:
+            log.error("%s : Failed to save journal sequence number!", str(e))
+            raise util.CapRockError("%s failed to save!" % util.JOURNAL_SEQ_PATH)
+        self.journal_seq = journal_seq
+
+    def _loaded(self, users, drinks, liquids):
+        """ Records freshly loaded objects as persisted """
+        self._persisted("users", users)
+        self._persisted("drinks", drinks)
+        self._persisted("liquids", liquids)
+        self._saved_next_ids = util.next_ids()
+
+    def _persisted(self, kind, objs, ids=None):
+        """ Clears dirty flags of objs and remembers their IDs """
+        for obj in objs:
+            obj.clear_dirty()
+        self._remember(kind, [obj.get_id() for obj in objs] if ids is None else ids)
+
+    def _remember(self, kind, ids):
+        """ Remembers IDs in order as persisted """
+        self._saved[kind] = ids
+
+class TextStorage(StorageBackend):
+    """ Original plain text files in 'backend/'. A file is rewritten in full if anything in it changed """
+
+    def load(self):
+        if not os.path.exists('backend'):
+            raise FileNotFoundError("Backend directory not available")
+
+        stored_ids = util.load_next_ids()
+        self.journal_seq = util.load_journal_seq()
+        legacy = set()
+        liquids = util.load_liquid_info(legacy)
+        drinks = util.load_drink_info(liquids, legacy)
+        users = util.load_user_info(drinks, legacy)
+        self._loaded(users, drinks, liquids)
+        for kind, objs in (("liquids", liquids), ("drinks", drinks), ("users", users)):
+            if any(obj in legacy for obj in objs): # File references names, rewritten with IDs on the next save
+                self._remember(kind, [obj.get_id() for obj in objs if obj not in legacy])
+        self._saved_next_ids = stored_ids # Written on the next save if IDs were never stored
+        return users, drinks, liquids
+
+    def save(self, users, drinks, liquids, changed=None, journal_seq=None):
+        if not os.path.exists('backend'):
+            os.mkdir('backend')
+            util.sync_dir(".")
+        self._save_next_ids_file()
+        for kind, objs, write in (("users", users, util.save_user_info), ("drinks", drinks, util.save_drink_info),
+                                  ("liquids", liquids, util.save_liquid_info)):
+            to_write, to_delete, ids = self._pending(kind, objs, changed)
+            if to_write or to_delete or ids != self._saved[kind]:
+                write(objs)
+                self._persisted(kind, objs, ids)
+        self._save_journal_seq_file(journal_seq)
+
+class ShardedTextStorage(StorageBackend):
+    """
+    One text file per liquid, drink and user in 'backend/<kind>/' named by
+    its ID ('#12.rec') using the same record format as TextStorage, plus an
+    'order.idx' file holding the catalog order. Only dirty objects are
+    rewritten so idle saves do no I/O and a rename rewrites one shard.
+    Falls back to the TextStorage files if no shards exist yet.
+    """
+    ROOT = "backend"
+    EXTENSION = ".rec"
+    ORDER_FILE = "order.idx"
+
+    def load(self):
+        if not os.path.exists(self.ROOT):
+            raise FileNotFoundError("Backend directory not available")
+        self.journal_seq = util.load_journal_seq()
+        if not os.path.exists(os.path.join(self.ROOT, "liquids")):
+            # First start after upgrade, nothing is persisted here so the first save writes every shard
+            log.info("No sharded storage found, loading text storage")
+            return TextStorage().load()
+
+        stored_ids = util.load_next_ids()
+        liquids = self._load_kind("liquids", util.liquid_from_record)
+        liquid_refs = util.RefIndex(liquids)
+        drinks = self._load_kind("drinks", lambda rec: util.drink_from_record(rec, liquid_refs))
+        drink_refs = util.RefIndex(drinks)
+        users = self._load_kind("users", lambda rec: util.user_from_record(rec, drink_refs))
+
+        self._loaded(users, drinks, liquids)
+        self._saved_next_ids = stored_ids
+        return users, drinks, liquids
+
+    def save(self, users, drinks, liquids, changed=None, journal_seq=None):
+        self._save_next_ids_file()
+        for kind, objs, fmt in (("liquids", liquids, util.format_liquid_record),
+                                ("drinks", drinks, util.format_drink_record),
+                                ("users", users, util.format_user_record)):
+            to_write, to_delete, ids = self._pending(kind, objs, changed)
+            if not to_write and not to_delete and ids == self._saved[kind]:
+                continue # Nothing changed, no I/O
+
+            folder = os.path.join(self.ROOT, kind)
+            try:
+                if not os.path.exists(folder):
+                    os.makedirs(folder)
+                    util.sync_dir(self.ROOT)
+                for obj in to_write:
+                    util.write_atomic(self._shard_path(kind, obj.get_id()), fmt(obj) + "\n", sync_folder=False)
+                for obj_id in to_delete:
+                    path = self._shard_path(kind, obj_id)
+                    if os.path.exists(path):
+                        os.remove(path)
+                if ids != self._saved[kind]:
+                    util.write_atomic(os.path.join(folder, self.ORDER_FILE), "".join(util.format_ref(i) + "\n" for i in ids),
+                                      sync_folder=False)
+                util.sync_dir(folder) # One fsync for every rename and removal of kind
+            except OSError as e:
+                log.error("%s : Failed to save %s shards!", str(e), kind)
+                raise util.CapRockError("%s storage failed to save!" % kind)
+
+            for obj in to_write:
+                obj.clear_dirty()
+            self._remember(kind, ids)
+            log.info("Saved %d %s shards", len(to_write), kind)
+        self._save_journal_seq_file(journal_seq)
+
+    def _shard_path(self, kind, obj_id):
+        return os.path.join(self.ROOT, kind, util.format_ref(obj_id) + self.EXTENSION)
+
+    def _load_kind(self, kind, create):
+        """
+        Returns objs of kind in catalog order
+        @param create (function): Makes obj from a record, may return None
+        """
+        records = [rec for path in self._shard_paths(kind) for rec in util.read_storage_file(path, kind)]
+        util.reserve_record_ids(records, kind)
+        objs = []
+        for rec in records:
+            try:
+                obj = create(rec)
+            except util.CapRockError as e:
+                log.error("%s : Failed to load %s %s!", str(e), kind, rec.name)
+                continue
+            if obj is None:
+                continue
+            objs.append(obj)
+        return util.unique_ids(objs, kind)
+
+    def _shard_paths(self, kind):
+        """ Returns path of every shard of kind in catalog order """
+        folder = os.path.join(self.ROOT, kind)
+        if not os.path.exists(folder):
+            return [] # Kind was empty on every save so far
+        order = []
+        order_path = os.path.join(folder, self.ORDER_FILE)
+        if os.path.exists(order_path):
+            with open(order_path, "r") as f:
+                order = [line for line in f.read().split("\n") if line] # '#<id>' lines
+        # Shards written before a crash could miss from order file
+        found = set(fn[:-len(self.EXTENSION)] for fn in os.listdir(folder)
+                    if fn.endswith(self.EXTENSION) and isinstance(util.parse_ref(fn[:-len(self.EXTENSION)]), int))
+        ordered = [stem for stem in order if stem in found]
+        rest = found.difference(ordered)
+        ordered.extend(sorted(rest, key=util.parse_ref))
+        return [os.path.join(folder, stem + self.EXTENSION) for stem in ordered]
+
+class SQLiteStorage(StorageBackend):
+    """
+    SQLite database in WAL mode. Only dirty or new objects are written and
+    removed ones deleted, all in one transaction. Rows are keyed by object ID,
+    so catalog order is ID order.
+
+    Params:
+    path (string) - Location of database file
+    """
+
+    def __init__(self, path=SQLITE_PATH):
+        """
+        Constructor for SQLite storage.
+        self._pours (dict) - {user_id:[(pour_id, epoch time, drink_id)]} last persisted pours, None until read
+        """
+        StorageBackend.__init__(self)
+        self._path = path
+        self._lock = threading.Lock()
+        self._db = None
+        self._pours = None
+
+    def _connect(self):
+        """ Opens database on first use """
+        if self._db is None:
+            folder = os.path.dirname(self._path)
+            if folder and not os.path.exists(folder):
+                os.mkdir(folder)
+            db = sqlite3.connect(self._path, check_same_thread=False)
+            try:
+                db.execute("PRAGMA journal_mode=WAL")
+                db.execute("PRAGMA synchronous=FULL") # Commit is on disk before the pour journal is emptied
+                db.executescript(SCHEMA)
+            except sqlite3.Error:
+                db.close()
+                raise
+            self._db = db
+        return self._db
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def get_meta(self, key):
+        """ Returns stored meta value or None """
+        with self._lock:
+            row = self._connect().execute("SELECT value FROM meta WHERE key=?", (key,)).fetchone()
+        return None if row is None else row[0]
+
+    def set_meta(self, key, value):
+        """ Stores meta value """
+        with self._lock:
+            db = self._connect()
+            with db:
+                db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def is_empty(self):
+        """ Returns True if no catalog has been stored yet """
+        with self._lock:
+            db = self._connect()
+            return all(db.execute("SELECT 1 FROM %s LIMIT 1" % table).fetchone() is None
+                       for table in ("liquids", "drinks", "users"))
+
+    def load(self):
+        with self._lock:
+            db = self._connect()
+            self._pours = self._read_pours(db)
+            stored_ids = {key[len("next_id_"):]:int(value) for key, value
+                          in db.execute("SELECT key, value FROM meta WHERE key LIKE 'next_id_%'")}
+            util.reserve_ids(stored_ids)
+            row = db.execute("SELECT value FROM meta WHERE key='journal_seq'").fetchone()
+            self.journal_seq = None if row is None else int(row[0])
+
+            liquid_list = [liquid.Liquid(row[1], row[2], row[3], row[4], util.Container[row[5]], obj_id=row[0])
+                           for row in db.execute("SELECT id, name, abv, density, volume_left, container FROM liquids ORDER BY id")]
+            liquid_refs = util.RefIndex(liquid_list)
+
+            recipes = {}
+            for dr_id, liq_id, volume in db.execute("SELECT drink, liquid, volume FROM recipe_lines ORDER BY drink, position"):
+                liq = liquid_refs.get(liq_id)
+                if liq is not None: # If deleted before dont worry about it
+                    recipes.setdefault(dr_id, []).append((liq, volume))
+
+            drink_list = []
+            for dr_id, dr_name in db.execute("SELECT id, name FROM drinks ORDER BY id"):
+                lines = recipes.get(dr_id)
+                if not lines:
+                    log.error("%s has no stored liquids, skipping drink", dr_name)
+                    continue
+                drink_list.append(drink.Drink(dr_name, *lines, obj_id=dr_id))
+            drink_refs = util.RefIndex(drink_list)
+
+            user_list = [user.User(row[1], util.Sex[row[2]], row[3], util.Experience[row[4]], obj_id=row[0])
+                         for row in db.execute("SELECT id, name, sex, weight, experience FROM users ORDER BY id")]
+            user_refs = util.RefIndex(user_list)
+
+            for user_id, pours in self._pours.items():
+                person = user_refs.get(user_id)
+                if person is None:
+                    continue
+                for _, time, dr_id in pours:
+                    dr = drink_refs.get(dr_id)
+                    if dr is not None: # If drink was deleted dont add
+                        person.add_drink(dr, time=time)
+
+            self._loaded(user_list, drink_list, liquid_list)
+            self._saved_next_ids = stored_ids # Written on the next save if IDs were never stored
+        return user_list, drink_list, liquid_list
+
+    def save(self, users, drinks, liquids, changed=None, journal_seq=None):
+        pending = {"liquids":self._pending("liquids", liquids, changed), "drinks":self._pending("drinks", drinks, changed),
+                   "users":self._pending("users", users, changed)}
+        next_ids = self._pending_next_ids()
+        if journal_seq == self.journal_seq:
+            journal_seq = None
+        if not any(p[0] or p[1] for p in pending.values()) and next_ids is None and journal_seq is None:
+            return # Nothing changed, no I/O
+
+        try:
+            with self._lock:
+                db = self._connect()
+                if self._pours is None: # Saving over a database this instance never loaded
+                    self._pours = self._read_pours(db)
+                with db: # Single transaction for the whole save
+                    if next_ids is not None:
+                        db.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                                       [("next_id_%s" % kind, str(next_id)) for kind, next_id in next_ids.items()])
+                    for obj_id in pending["liquids"][1]:
+                        db.execute("DELETE FROM liquids WHERE id=?", (obj_id,))
+                    for liq in pending["liquids"][0]:
+                        self._write_liquid(db, liq)
+                    for obj_id in pending["drinks"][1]:
+                        db.execute("DELETE FROM recipe_lines WHERE drink=?", (obj_id,))
+                        db.execute("DELETE FROM drinks WHERE id=?", (obj_id,))
+                    for dr in pending["drinks"][0]:
+                        self._write_drink(db, dr)
+                    for obj_id in pending["users"][1]:
+                        db.execute("DELETE FROM users WHERE id=?", (obj_id,))
+                        db.execute("DELETE FROM pours WHERE user=?", (obj_id,))
+                        self._pours.pop(obj_id, None)
+                    for person in pending["users"][0]:
+                        self._write_user(db, person)
+                        self._pours[person.get_id()] = self._sync_pours(db, person)
+                    if journal_seq is not None: # Same transaction, stored exactly when the pours it covers are
+                        db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('journal_seq', ?)", (str(journal_seq),))
+            for kind, objs in (("liquids", liquids), ("drinks", drinks), ("users", users)):
+                for obj in pending[kind][0]:
+                    obj.clear_dirty()
+                self._remember(kind, pending[kind][2])
+            if next_ids is not None:
+                self._saved_next_ids = next_ids
+            if journal_seq is not None:
+                self.journal_seq = journal_seq
+            log.info("Saved storage to %s", self._path)
+        except sqlite3.Error as e:
+            log.error("%s : Failed to save SQLite storage!", str(e))
+            raise util.CapRockError("%s failed to save!" % self._path)
+
+    def _write_liquid(self, db, liq):
+        # Upsert keeps the row, a rename only changes its name
+        db.execute("INSERT INTO liquids (id, name, abv, density, volume_left, container) VALUES (?, ?, ?, ?, ?, ?) "
+                   "ON CONFLICT (id) DO UPDATE SET name=excluded.name, abv=excluded.abv, density=excluded.density, "
+                   "volume_left=excluded.volume_left, container=excluded.container",
+                   (liq.get_id(), liq.get_name(), liq.get_abv(), liq.get_density(), liq.get_volume_left(), liq.get_container()))
+
+    def _write_drink(self, db, dr):
+        dr_id = dr.get_id()
+        db.execute("INSERT INTO drinks (id, name) VALUES (?, ?) ON CONFLICT (id) DO UPDATE SET name=excluded.name",
+                   (dr_id, dr.get_name()))
+        db.execute("DELETE FROM recipe_lines WHERE drink=?", (dr_id,))
+        db.executemany("INSERT INTO recipe_lines (drink, position, liquid, volume) VALUES (?, ?, ?, ?)",
+                       [(dr_id, i, line[0].get_id(), line[1]) for i, line in enumerate(dr.get_liquids_obj())])
+
+    def _write_user(self, db, person):
+        db.execute("INSERT INTO users (id, name, sex, weight, experience) VALUES (?, ?, ?, ?, ?) "
+                   "ON CONFLICT (id) DO UPDATE SET name=excluded.name, sex=excluded.sex, weight=excluded.weight, "
+                   "experience=excluded.experience",
+                   (person.get_id(), person.get_name(), person.get_sex(), person.get_weight(), person.get_experience()))
+
+    def _read_pours(self, db):
+        """ Returns {user_id:[(pour_id, epoch time, drink_id)]} of every stored pour """
+        pours = {}
+        for pour_id, user_id, time, dr_id in db.execute("SELECT id, user, time, drink FROM pours ORDER BY id"):
+            time = util.parse_pour_time(time) if isinstance(time, str) else float(time) # Older databases stored text
+            pours.setdefault(user_id, []).append((pour_id, time, dr_id))
+        return pours
+
+    def _sync_pours(self, db, person):
+        """
+        Inserts new pours of person and deletes expired or orphaned ones
+        Returns new [(pour_id, epoch time, drink_id)] cache for person
+        """
+        user_id = person.get_id()
+        stored = self._pours.get(user_id, [])
+        pours = [(d[0], d[1].get_id()) for d in person.get_current_drinks()]
+        if [p[1:] for p in stored] == pours:
+            return stored
+
+        # Multiset difference so repeated (time, drink) pours are kept exactly
+        wanted = Counter(pours)
+        kept = []
+        for pour in stored:
+            if wanted[pour[1:]] > 0:
+                wanted[pour[1:]] -= 1
+                kept.append(pour)
+            else:
+                db.execute("DELETE FROM pours WHERE id=?", (pour[0],))
+        for pour, count in wanted.items():
+            for _ in range(count):
+                cur = db.execute("INSERT INTO pours (user, time, drink) VALUES (?, ?, ?)", (user_id,) + pour)
+                kept.append((cur.lastrowid,) + pour)
+        kept.sort()
+        return kept
+
+BACKENDS = {"sharded":ShardedTextStorage, "text":TextStorage, "sqlite":SQLiteStorage}
+_instances = {}
+
+def get_backend(name=None):
+    """ Returns shared backend instance by name, defaults to util.STORAGE_BACKEND """
+    name = util.STORAGE_BACKEND if name is None else name
+    if name not in BACKENDS:
+        raise util.CapRockError("Unknown storage backend %s" % name)
+    if name not in _instances:
+        _instances[name] = BACKENDS[name]()
+    return _instances[name]
+
+def migrate_text_to_sqlite(db_path=SQLITE_PATH, source="text"):
+    """
+    One-shot copy of the text files into an SQLite database
+    Returns True if migrated, False if the database already holds a catalog
+    @param source (string): "text" for the original files, "sharded" for shards or the original files if none exist
+    """
+    target = SQLiteStorage(db_path)
+    try:
+        if not target.is_empty() or any(target.get_meta("migrated_from_%s" % name) is not None for name in ("text", "sharded")):
+            log.info("%s already populated, skipping %s migration", db_path, source)
+            return False
+        backend = BACKENDS[source]()
+        users, drinks, liquids = backend.load()
+        target.save(users, drinks, liquids, journal_seq=backend.journal_seq)
+        target.set_meta("migrated_from_%s" % source, len(users) + len(drinks) + len(liquids))
+        log.info("Migrated %s storage to %s", source, db_path)
+        return True
+    finally:
+        target.close()
@@ -2,18 +2,36 @@
 CapRock_user.py - Class to hold information of a user
 
 @author: Brian Kachala - ECE 4900 Team 8
-@Last Edited: 4/10/2020
+@Last Edited: 10/18/2026
 """
 
-import datetime
+import heapq
+from collections import namedtuple
+import CapRock_clock as clock
+import CapRock_instrument as instrument
 import CapRock_liquid as liquid
 import CapRock_drink as drink
 import CapRock_backend_util as util
 
+try:
+    import numpy as np
+except ImportError: # Projections fall back to plain python
+    np = None
+
 TIME_POS = 0
 DRINK_POS = 1
 OZ_POS = 2
 
+# One entry of pour history, time is epoch seconds, grams of alcohol taken when poured
+Pour = namedtuple("Pour", ["time", "drink", "grams"])
+
+_expired_sink = None # Called as _expired_sink(user_obj, pours) before pours leave history
+
+def set_expired_sink(callback):
+    """ Calls callback(user_obj, pours) with pours dropped from history after SESSION_TIME, None to stop """
+    global _expired_sink
+    _expired_sink = callback
+
 class User():
     """
     All relevant user information to be able to calculate BAC.
@@ -23,12 +41,19 @@ class User():
     sex (util.Sex enum) - Sex of user
     weight(float) - Weight of user in pounds
     experience(util.Experience) - How often user drinks
+    obj_id (int) - Stable ID stored references use, None gives a new one
     """
-    def __init__(self, name, sex, weight, experience):
+    __slots__ = ("_id", "_name", "_sex", "_weight", "_experience", "_bac", "_current_drinks", "_bac_heap",
+                 "_init_sum", "_time_sum", "_dirty", "_observer")
+
+    def __init__(self, name, sex, weight, experience, obj_id=None):
         """
         Constructor for user class.
         self._bac (float) - Blood alcohol content
-        self._current drinks (list) - (drink_obj, datetime of pour) tuples
+        self._current drinks (list) - Pours in time order
+        self._bac_heap (list) - Min-heap of (epoch BAC reaches zero, init BAC, pour epoch) of pours still adding BAC
+        self._init_sum (float) - Sum of init BAC of pours in heap
+        self._time_sum (float) - Sum of pour epoch of pours in heap
         """
         if len(name) > util.NAME_MAX_LEN:
             raise util.CapRockError("Name greater than %d characters" % util.NAME_MAX_LEN)
@@ -39,12 +64,22 @@ class User():
         if not isinstance(weight, int) and not isinstance(weight, float):
             raise util.CapRockError("Not a valid Weight")
 
+        self._id = util.claim_id("users", obj_id)
         self._name = name
         self._sex = util.Sex(sex)
         self._weight = weight
         self._experience = experience
         self._bac = 0.0
         self._current_drinks = []
+        self._bac_heap = []
+        self._init_sum = 0.0
+        self._time_sum = 0.0
+        self._dirty = True # Not saved yet
+        self._observer = None # Called with self after every change, set by Registry
+
+    def get_id(self):
+        """ Returns stable ID of the user profile, kept across renames """
+        return self._id
 
     def get_name(self):
         """ Returns the Name of the user profile """
@@ -56,6 +91,7 @@ class User():
             raise util.CapRockError("Name greater than %d characters" % util.NAME_MAX_LEN)
 
         self._name = new_name
+        self._mark_dirty()
 
     def get_sex(self):
         """ Returns the Sex of the user profile """
@@ -67,6 +103,8 @@ class User():
             raise util.CapRockError("Not a valid Sex")
 
         self._sex = new_sex
+        self._rebuild_bac() # Body water changed
+        self._mark_dirty()
 
     def get_weight(self):
         """ Returns the weight of the user profile in lbs """
@@ -75,6 +113,8 @@ class User():
     def change_weight(self,new_weight):
         """ Changes the sex of the user profile to new_weight """
         self._weight = new_weight
+        self._rebuild_bac()
+        self._mark_dirty()
 
 
     def get_experience(self):
@@ -87,62 +127,177 @@ class User():
             raise util.CapRockError("Not a valid Experience")
 
         self._experience = new_exp
+        self._rebuild_bac() # Elimination rate changed
+        self._mark_dirty()
 
     def _calc_bac(self):
         """
-        Calculates the BAC of the user based on what when each
-        current drink was made. This returns the sum of all individual
-        drink's BAC
+        Calculates the BAC of the user from running sums over the pours still
+        adding BAC, each loses elimination rate per hour since it was poured:
+        sum(init - rate*(now - t)/3600) = init_sum - rate*(count*now - time_sum)/3600
+        Pours that reached zero are popped from the heap first, amortized O(1).
+        History is left alone, see expire().
+        """
+        cur_time = clock.now()
+        while self._bac_heap and self._bac_heap[0][0] <= cur_time:
+            _, init_bac, pour_time = heapq.heappop(self._bac_heap)
+            self._init_sum = self._init_sum - init_bac
+            self._time_sum = self._time_sum - pour_time
+        if not self._bac_heap:
+            self._init_sum = self._time_sum = 0.0 # Drop float drift once all drinks wore off
+            bac_sum = 0.0
+        else:
+            hours = (len(self._bac_heap) * cur_time - self._time_sum) / (60*60)
+            bac_sum = max(self._init_sum - self._experience.value * hours, 0.0)
+        return bac_sum
+
+    def expire(self, now=None):
         """
-        bac_sum = 0
+        Removes drinks from the front of history once BAC is zero and past session
+        timeout time, the expired sink gets them first. Returns number removed
+        @param now (float): Epoch seconds, defaults to current time
+        """
+        cur_time = clock.now() if now is None else now
+        cutoff = cur_time - util.SESSION_TIME*60*60
+        count = 0
         for dr in self._current_drinks:
-            # calc time dif in hours
-            cur_time = datetime.datetime.now()
-            diff = cur_time - datetime.datetime.strptime(str(dr[TIME_POS]), "%m-%d-%y %H:%M:%S")
-            hours = diff.total_seconds() / (60*60)
-            bac_temp = self._bac_equation(dr[DRINK_POS].get_volume(), dr[DRINK_POS].get_abv(), hours)
-            if bac_temp <= 0:
-                if hours > util.SESSION_TIME: # Remove drink after BAC is zero and past session timeout time
-                    self._current_drinks.remove(dr)
-            else:
-                bac_sum = bac_sum + bac_temp
+            if dr.time >= cutoff or self._expiry(dr.time, self._init_bac(dr.grams)) > cur_time:
+                break
+            count = count + 1
+        if count:
+            if _expired_sink is not None:
+                _expired_sink(self, self._current_drinks[:count])
+            del self._current_drinks[:count]
+            self._mark_dirty()
+        return count
 
-        return bac_sum
+    def _track_bac(self, pour):
+        """ Adds pour to running BAC sums """
+        init_bac = self._init_bac(pour.grams)
+        if init_bac > 0:
+            heapq.heappush(self._bac_heap, (self._expiry(pour.time, init_bac), init_bac, pour.time))
+            self._init_sum = self._init_sum + init_bac
+            self._time_sum = self._time_sum + pour.time
+
+    def _rebuild_bac(self):
+        """ Recomputes running BAC sums after weight, sex or experience changed """
+        self._bac_heap = []
+        self._init_sum = self._time_sum = 0.0
+        cur_time = clock.now()
+        for dr in self._current_drinks:
+            if self._expiry(dr.time, self._init_bac(dr.grams)) > cur_time:
+                self._track_bac(dr)
+
+    def _expiry(self, pour_time, init_bac):
+        """ Returns epoch seconds when a pour stops adding BAC """
+        return pour_time + init_bac / self._experience.value * (60*60)
+
+    def _init_bac(self, gram_alc):
+        """ Returns BAC right after drinking gram_alc grams of alcohol """
+        gram_alc_per_ml_water = gram_alc/self.get_body_water()
+        alc_conc_in_blood = gram_alc_per_ml_water * util.BLOOD_WATER_FRACTION # blood is 80.6% water
+        return alc_conc_in_blood * 100 #g/100 mL
 
     def _bac_equation(self, oz_drank, abv, time_elapsed_hr):
         """ Returns estimated bac of single drink """
         # Tested with this example:
         # https://www.craftbeer.com/attachments/0000/1170/Computing_a_BAC_Estimate.pdf
-        weight_kg = float(self._weight)/2.2046
-        sex_const = util.MALE_WATER_CONST if self.get_sex() == "Male" else util.FEMALE__WATER_CONST
-        body_water = weight_kg * sex_const * 1000 # to ml
         oz_alc = abv*oz_drank
-        gram_alc = 29.57 * oz_alc * .79 # ml/oz for one oz alc * g/mL (density)
-        gram_alc_per_ml_water = gram_alc/body_water
-        alc_conc_in_blood = gram_alc_per_ml_water * .806 # blood is 80.6% water
-        init_bac = alc_conc_in_blood * 100 #g/100 mL
+        gram_alc = util.ML_PER_OZ * oz_alc * util.ETHANOL_DENSITY # ml/oz for one oz alc * g/mL (density)
+        init_bac = self._init_bac(gram_alc)
         actual_bac = init_bac - (self._experience.value * time_elapsed_hr)
         return actual_bac
 
+    def get_body_water(self):
+        """ Returns estimated body water of the user in mL """
+        weight_kg = float(self._weight)/util.LBS_PER_KG
+        sex_const = util.MALE_WATER_CONST if self.get_sex() == "Male" else util.FEMALE__WATER_CONST
+        return weight_kg * sex_const * 1000 # to ml
+
+    def get_elimination_rate(self):
+        """ Returns BAC the user eliminates per hour """
+        return self._experience.value
+
     def update_bac(self):
         """ Updates the BAC of the user """
         self._bac = self._calc_bac()
 
+    @instrument.timed("bac.get_bac")
     def get_bac(self):
         """ Returns the BAC of the user profile """
         self.update_bac()
         return self._bac
 
-    def add_drink(self, dr, time=datetime.datetime.now().strftime("%m-%d-%y %H:%M:%S")):
-        """ Adds new drink to current drink list """
+    def bac_curve(self, start, end, step=60):
+        """
+        Returns (times, bacs) lists of projected BAC from start to end, no new drinks assumed
+        @param start, end (float): Epoch seconds, end included if it is on the grid
+        @param step (float): Seconds between points
+        """
+        if step <= 0:
+            raise util.CapRockError("Step must be greater than 0")
+        count = int((end - start) // step) + 1 if end >= start else 0
+        pour_time = [dr.time for dr in self._current_drinks]
+        init_bac = [self._init_bac(dr.grams) for dr in self._current_drinks]
+        rate = self._experience.value
+        if np is None:
+            times = [start + i*step for i in range(count)]
+            bacs = [sum((max(init - rate * (t - pt) / (60*60), 0.0)
+                         for pt, init in zip(pour_time, init_bac) if pt <= t), 0.0)
+                    for t in times]
+            return times, bacs
+
+        times = start + np.arange(count) * float(step)
+        pour_time = np.array(pour_time, dtype=np.float64)
+        # One row per grid point, one column per pour, drinks not poured yet add nothing
+        bac = np.array(init_bac, dtype=np.float64) - rate * (times[:, None] - pour_time) / (60*60)
+        bac[(bac <= 0) | (times[:, None] < pour_time)] = 0
+        return times.tolist(), bac.sum(axis=1).tolist()
+
+    def time_until(self, threshold=util.LEGAL_BAC_LIMIT):
+        """
+        Returns seconds until BAC drops to threshold, 0 if already there
+        BAC falls linearly between the points where single drinks wear off, so
+        each piece is solved directly in order of the expiry heap
+        """
+        self.update_bac()
+        if self._bac <= threshold:
+            return 0.0
+        cur_time = clock.now()
+        rate = self._experience.value
+        init_sum, time_sum, count = self._init_sum, self._time_sum, len(self._bac_heap)
+        for expiry, init_bac, pour_time in sorted(self._bac_heap):
+            # init_sum - rate*(count*t - time_sum)/3600 = threshold
+            when = ((init_sum - threshold) * (60*60) / rate + time_sum) / count
+            if when <= expiry:
+                return max(when - cur_time, 0.0)
+            init_sum, time_sum, count = init_sum - init_bac, time_sum - pour_time, count - 1
+        return max(sorted(self._bac_heap)[-1][0] - cur_time, 0.0) if self._bac_heap else 0.0
+
+    def add_drink(self, dr, time=None):
+        """
+        Adds new drink to current drink list and returns its Pour
+        @param time (float): Epoch seconds of pour, defaults to now in whole seconds like storage
+        """
         if not isinstance(dr, drink.Drink):
             raise util.CapRockError("Liquid must be a drink object")
+        if time is None:
+            time = float(int(clock.now()))
+        elif not isinstance(time, (int, float)):
+            raise util.CapRockError("Pour time must be epoch seconds")
 
-        self._current_drinks.append((time, dr))
+        pour = Pour(float(time), dr, dr.get_alcohol_grams())
+        idx = len(self._current_drinks)
+        while idx and self._current_drinks[idx-1].time > pour.time: # Keep history in time order
+            idx = idx - 1
+        self._current_drinks.insert(idx, pour)
+        self._track_bac(pour)
+        self._mark_dirty()
         self.update_bac()
+        return pour
 
     def get_current_drinks(self):
-        """ Returns list of current drinks. (datetime, drink_obj) """
+        """ Returns list of current drinks. Pour(epoch seconds, drink_obj, grams alcohol) """
         return self._current_drinks
 
 
@@ -153,3 +308,22 @@ class User():
         """
         return {"name":self.get_name(), "sex":self.get_sex(), "weight":self.get_weight(),
                 "experience":self.get_experience(), "bac":self.get_bac(), "current_drinks":self.get_current_drinks()}
+
+    def is_dirty(self):
+        """ Returns True if profile changed since it was last saved """
+        return self._dirty
+
+    def clear_dirty(self):
+        """ Marks profile as saved """
+        self._dirty = False
+
+    def set_observer(self, callback):
+        """ Sets function called with this profile after every change, None to stop """
+        self._observer = callback
+
+    def _mark_dirty(self):
+        """ Flags profile to be written on the next save and tells observer """
+        self._dirty = True
+        if self._observer is not None:
+            self._observer(self)
+
@@ -0,0 +1,255 @@
+"""
+CapRock_widgets.py - Tk widgets for long catalogs: searchable list that only draws visible rows
+
+@author: Brian Kachala - ECE 4900 Team 8
+@Last Edited: 10/18/2026
+"""
+import bisect
+import tkinter as tk
+
+class SearchIndex():
+    """
+    Case-insensitive name search over items, kept up to date one item at a time.
+    Queries shorter than a trigram match name prefixes from a sorted name list,
+    longer ones match anywhere in the name: candidates share every trigram of
+    the query, rarest first, and are checked with a substring test. Results
+    come back in the order items were added, which is catalog order.
+
+    Params:
+    items (list) - Items to index
+    key (function) - Returns the name of an item
+    """
+
+    def __init__(self, items=(), key=str):
+        """
+        Constructor for search index.
+        self._by_seq (dict) - {sequence number:item}, numbers grow in order items are added
+        self._sorted (list) - Sorted (lowercase name, sequence number) for prefix queries
+        self._trigrams (dict) - {3 letters:set of sequence numbers whose name has them}
+        """
+        self._key = key
+        self._seq = {} # {item:sequence number}
+        self._names = {} # {sequence number:lowercase name indexed}
+        self._by_seq = {}
+        self._next_seq = 0
+        self._sorted = []
+        self._trigrams = {}
+        for item in items: # Bulk load, sorted once at the end
+            seq = self._next_seq
+            self._next_seq = self._next_seq + 1
+            name = self._key(item).lower()
+            self._seq[item] = seq
+            self._by_seq[seq] = item
+            self._names[seq] = name
+            self._sorted.append((name, seq))
+            for gram in _trigrams(name):
+                self._trigrams.setdefault(gram, set()).add(seq)
+        self._sorted.sort()
+
+    def __len__(self):
+        return len(self._by_seq)
+
+    def add(self, item):
+        """ Indexes item after every item already indexed """
+        seq = self._next_seq
+        self._next_seq = self._next_seq + 1
+        self._seq[item] = seq
+        self._by_seq[seq] = item
+        self._index(seq, self._key(item).lower())
+
+    def remove(self, item):
+        """ Drops item from index """
+        seq = self._seq.pop(item, None)
+        if seq is not None:
+            del self._by_seq[seq]
+            self._unindex(seq)
+
+    def update(self, item):
+        """ Reindexes item if its name changed, keeps its place. Returns True if it changed """
+        seq = self._seq.get(item)
+        if seq is None:
+            return False
+        name = self._key(item).lower()
+        if name == self._names[seq]:
+            return False
+        self._unindex(seq)
+        self._index(seq, name)
+        return True
+
+    def search(self, query):
+        """ Returns list of items whose name matches query, all items for an empty query """
+        query = query.lower()
+        if not query:
+            return list(self._by_seq.values())
+        if len(query) < 3:
+            found = []
+            pos = bisect.bisect_left(self._sorted, (query, -1))
+            while pos < len(self._sorted) and self._sorted[pos][0].startswith(query):
+                found.append(self._sorted[pos][1])
+                pos = pos + 1
+        else:
+            postings = []
+            for gram in _trigrams(query):
+                posting = self._trigrams.get(gram)
+                if not posting:
+                    return []
+                postings.append(posting)
+            postings.sort(key=len)
+            found = postings[0].intersection(*postings[1:]) if len(postings) > 1 else postings[0]
+            found = [seq for seq in found if query in self._names[seq]]
+        found.sort()
+        return [self._by_seq[seq] for seq in found]
+
+    def _index(self, seq, name):
+        self._names[seq] = name
+        bisect.insort(self._sorted, (name, seq))
+        for gram in _trigrams(name):
+            self._trigrams.setdefault(gram, set()).add(seq)
+
+    def _unindex(self, seq):
+        name = self._names.pop(seq)
+        pos = bisect.bisect_left(self._sorted, (name, seq))
+        del self._sorted[pos]
+        for gram in _trigrams(name):
+            posting = self._trigrams[gram]
+            posting.discard(seq)
+            if not posting:
+                del self._trigrams[gram]
+
+def _trigrams(name):
+    """ Returns set of 3 letter slices of name """
+    return {name[i:i+3] for i in range(len(name) - 2)}
+
+class VirtualList(tk.Frame):
+    """
+    Listbox that only holds the rows that fit on screen, scrolled over a list
+    that may have many thousands of items, with an optional search entry that
+    filters rows as you type. Selection is kept as the item, so it survives
+    scrolling and searching.
+
+    Params:
+    parent (tk widget) - Widget list is placed in
+    source (function) - Returns the current item list, e.g. the registry drinks list
+    text (function) - Returns row text of an item
+    index (SearchIndex) - Names of source() items, kept up to date by its owner
+    color (function) - Returns row text color of an item, optional
+    height (int) - Rows shown
+    search (bool) - Show search entry above the rows
+    extra (list) - Strings shown as rows after the items, e.g. "No Liquid"
+    font (tkfont.Font) - Font of rows and search entry
+    width (int) - Width of rows in characters
+    """
+
+    def __init__(self, parent, source, text, index, color=None, height=10, search=True, extra=(), font=None, width=20):
+        """
+        Constructor for virtual list.
+        self._matches (list) - Items matching the search, None shows all of source()
+        self._offset (int) - Row number shown at the top
+        self._selected - Item or extra string selected, None if nothing is
+        """
+        tk.Frame.__init__(self, parent)
+        self._source = source
+        self._text = text
+        self._color = color
+        self._height = height
+        self._extra = list(extra)
+        self._index = index
+        self._query = ""
+        self._matches = None
+        self._offset = 0
+        self._selected = None
+
+        self.searchText = tk.StringVar()
+        self.searchText.trace_add("write", lambda *args: self.search(self.searchText.get()))
+        self._entry = tk.Entry(self, textvariable=self.searchText, font=font, width=width)
+        self._scroll = tk.Scrollbar(self, command=self._yview)
+        self._list = tk.Listbox(self, height=height, width=width, font=font, selectmode=tk.SINGLE, exportselection=0,
+                                activestyle="none")
+        self._list.bind("<<ListboxSelect>>", self._on_select)
+        self._list.bind("<MouseWheel>", lambda event: self._yview("scroll", -1 if event.delta > 0 else 1, "units"))
+        self._list.bind("<Button-4>", lambda event: self._yview("scroll", -1, "units"))
+        self._list.bind("<Button-5>", lambda event: self._yview("scroll", 1, "units"))
+
+        if search:
+            self._entry.grid(row=0, column=0, columnspan=2, sticky="ew")
+        self._list.grid(row=1, column=0, sticky="nsew")
+        self._scroll.grid(row=1, column=1, sticky="ns")
+        self.render()
+
+    def selected(self):
+        """ Returns selected item or extra string, None if nothing is selected """
+        return self._selected
+
+    def select(self, item):
+        """ Selects item or extra string, None clears the selection """
+        self._selected = item
+        self.render()
+
+    def set_source(self, source, index):
+        """ Shows items of a new source() list searched with index, clears search and selection """
+        self._source = source
+        self._index = index
+        self._selected = None
+        self.searchText.set("") # Runs search("")
+
+    def search(self, query):
+        """ Shows only items whose name matches query, from the top """
+        self._query = query
+        self._matches = self._index.search(query) if query else None
+        self._offset = 0
+        self.render()
+
+    def apply_event(self, action, index, obj):
+        """ Follows one Registry event of the source list after the index did, only rows on screen are redrawn """
+        if action == "remove" and self._selected is obj:
+            self._selected = None
+        if self._query: # Item may have been added, removed or renamed in or out of the matches
+            self._matches = self._index.search(self._query)
+        self.render()
+
+    def render(self):
+        """ Redraws rows on screen and the scrollbar """
+        items = self._source() if self._matches is None else self._matches
+        total = len(items) + len(self._extra)
+        self._offset = max(0, min(self._offset, total - self._height))
+        self._list.delete(0, tk.END)
+        for row in range(self._offset, min(self._offset + self._height, total)):
+            item = items[row] if row < len(items) else self._extra[row - len(items)]
+            if isinstance(item, str):
+                self._list.insert(tk.END, item)
+            else:
+                self._list.insert(tk.END, self._text(item))
+                if self._color is not None:
+                    self._list.itemconfig(tk.END, fg=self._color(item))
+            if item is self._selected:
+                self._list.select_set(tk.END)
+        if total > self._height:
+            self._scroll.set(self._offset / total, (self._offset + self._height) / total)
+        else:
+            self._scroll.set(0, 1)
+
+    def _row_item(self, row):
+        """ Returns item or extra string on screen row, None past the end """
+        items = self._source() if self._matches is None else self._matches
+        pos = self._offset + row
+        if pos < len(items):
+            return items[pos]
+        if pos - len(items) < len(self._extra):
+            return self._extra[pos - len(items)]
+        return None
+
+    def _on_select(self, event):
+        rows = self._list.curselection()
+        if rows:
+            self._selected = self._row_item(rows[0])
+
+    def _yview(self, *args):
+        """ Scrollbar and mouse wheel command, moves the rows shown """
+        items = self._source() if self._matches is None else self._matches
+        total = len(items) + len(self._extra)
+        if args[0] == "moveto":
+            self._offset = int(float(args[1]) * total)
+        elif args[0] == "scroll":
+            step = self._height if args[2] == "pages" else 1
+            self._offset = self._offset + int(args[1]) * step
+        self.render()
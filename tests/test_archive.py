@@ -0,0 +1,70 @@
+"""
+test_archive.py - Archived pours follow their profile or drink through renames
+
+@author: Brian Kachala - ECE 4900 Team 8
+@Last Edited: 10/18/2026
+"""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import CapRock_archive as archive
+import CapRock_backend_util as util
+import CapRock_clock as clock
+import CapRock_drink as drink
+import CapRock_liquid as liquid
+import CapRock_service as service
+import CapRock_user as user
+
+OLD = 10*60*60 # Pours this many seconds old are past SESSION_TIME
+
+class ArchiveTest(unittest.TestCase):
+
+    def setUp(self):
+        self._folder = tempfile.mkdtemp()
+        self.store = archive.PourArchive(os.path.join(self._folder, "archive"))
+        user.set_expired_sink(self.store.add_pours)
+        self.liq = liquid.Liquid("Vodka", .4, .95, 16, util.Container.FL)
+        self.dr = drink.Drink("Shot", (self.liq, 1.5))
+        self.ann = user.User("Ann", util.Sex.Female, 140.0, util.Experience.Regular)
+        self.core = service.CapRockService([self.ann], [self.dr], [self.liq], pour_archive=self.store)
+
+    def tearDown(self):
+        user.set_expired_sink(None)
+        shutil.rmtree(self._folder, ignore_errors=True)
+
+    def archive_pour(self, person, dr):
+        """ Adds an old pour of dr to person and moves it to the archive """
+        person.add_drink(dr, time=float(int(clock.now())) - OLD)
+        self.core.expire()
+
+    def test_rename_keeps_history(self):
+        self.archive_pour(self.ann, self.dr)
+        self.core.registry.rename(self.ann, "Anna")
+        self.core.registry.rename(self.dr, "Double")
+        self.assertEqual(self.core.usage("user"), {"Anna":1})
+        self.assertEqual(self.core.usage("drink"), {"Double":1})
+
+        self.archive_pour(self.ann, self.dr)
+        self.store.flush()
+        self.assertEqual(self.core.usage("user"), {"Anna":2})
+
+        reopened = archive.PourArchive(os.path.join(self._folder, "archive")) # Names file holds the new name
+        self.assertEqual(reopened.totals("user"), {self.ann.get_id():2})
+        self.assertEqual(reopened.name("users", self.ann.get_id()), "Anna")
+
+    def test_reused_name_keeps_separate_history(self):
+        self.archive_pour(self.ann, self.dr)
+        self.core.remove(self.ann)
+        new_ann = user.User("Ann", util.Sex.Female, 150.0, util.Experience.Regular)
+        self.core.add(new_ann)
+        self.archive_pour(new_ann, self.dr)
+        self.assertEqual(self.store.totals("user"), {self.ann.get_id():1, new_ann.get_id():1})
+        self.assertEqual(self.core.usage("user"), {"Ann %s" % util.format_ref(self.ann.get_id()):1,
+                                                   "Ann %s" % util.format_ref(new_ann.get_id()):1})
+
+if __name__ == "__main__":
+    unittest.main()
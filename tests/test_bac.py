@@ -0,0 +1,67 @@
+"""
+test_bac.py - Batched BAC of every profile matches each profile's own BAC
+
+@author: Brian Kachala - ECE 4900 Team 8
+@Last Edited: 10/18/2026
+"""
+import os
+import random
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import CapRock_backend_util as util
+import CapRock_bac as bac
+import CapRock_clock as clock
+import CapRock_drink as drink
+import CapRock_liquid as liquid
+import CapRock_user as user
+
+START = 1700000000.0
+
+def party(rng, users=6, pours=40):
+    """ Returns users with pours spread over the two hours after START """
+    vodka = liquid.Liquid("Vodka", .4, .95, 16)
+    beer = liquid.Liquid("Beer", .05, 1.0, 16)
+    drinks = [drink.Drink("Shot", (vodka, 1.5)), drink.Drink("Beer", (beer, 12)), drink.Drink("Double", (vodka, 3))]
+    people = [user.User("User %d" % i, rng.choice(list(util.Sex)), 100 + rng.random() * 150, rng.choice(list(util.Experience)))
+              for i in range(users)]
+    for _ in range(pours):
+        rng.choice(people).add_drink(rng.choice(drinks), START + rng.randint(0, 2 * 60 * 60))
+    return people
+
+class BACEngineTest(unittest.TestCase):
+
+    def setUp(self):
+        self._previous = clock.set_clock(clock.VirtualClock(START))
+
+    def tearDown(self):
+        clock.set_clock(self._previous)
+
+    def test_bac_all_matches_get_bac(self):
+        for use_numpy in (True, False):
+            with self.subTest(numpy=use_numpy), mock.patch.object(bac, "np", bac.np if use_numpy else None):
+                clock.set_clock(clock.VirtualClock(START)) # Time never goes back, each run starts over
+                people = party(random.Random(5))
+                engine = bac.BACEngine(people)
+                for hours in (2, 2.5, 3, 4, 12): # Every pour is in the past
+                    clock.set_clock(clock.VirtualClock(START + hours * 60 * 60))
+                    expected = [person.get_bac() for person in people]
+                    self.assertTrue(any(expected) or hours == 12)
+                    for got, want in zip(engine.bac_all(), expected):
+                        self.assertAlmostEqual(got, want, places=9)
+
+    def test_update_sees_new_pours_and_profiles(self):
+        people = party(random.Random(8), users=3, pours=6)
+        engine = bac.BACEngine(people)
+        clock.set_clock(clock.VirtualClock(START + 2 * 60 * 60))
+        people[0].add_drink(drink.Drink("Shot", (liquid.Liquid("Rum", .4, .93, 16), 1.5)))
+        people[1].change_weight(people[1].get_weight() + 40)
+        engine.update(people)
+        for got, person in zip(engine.bac_all(), people):
+            self.assertAlmostEqual(got, person.get_bac(), places=9)
+        self.assertEqual(list(engine.bac_by_name()), [person.get_name() for person in people])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+"""
+test_benchmark.py - Benchmark regression check and the kiosk settings benchmarks leave behind
+
+@author: Brian Kachala - ECE 4900 Team 8
+@Last Edited: 10/18/2026
+"""
+import contextlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import CapRock_backend_util as util
+import CapRock_benchmark as benchmark
+import CapRock_storage as storage
+
+class BenchmarkTest(unittest.TestCase):
+
+    def setUp(self):
+        self._cwd = os.getcwd()
+        self._folder = tempfile.mkdtemp()
+        os.chdir(self._folder)
+        storage._instances.clear()
+
+    def tearDown(self):
+        for backend in storage._instances.values():
+            backend.close()
+        storage._instances.clear()
+        util.configure_scale("kiosk")
+        os.chdir(self._cwd)
+        shutil.rmtree(self._folder, ignore_errors=True)
+
+    def test_scale_and_backend_restored(self):
+        kiosk = storage.get_backend()
+        with contextlib.redirect_stdout(io.StringIO()):
+            benchmark.bench_scale(counts=(20,), pours=3)
+            with mock.patch.object(benchmark, "_time_case", lambda func, repeat: func()): # One call, not timed
+                benchmark.bench_suite(sizes=(4,), backends=("sqlite",), repeat=1)
+        self.assertEqual((util.SCALE_MODE, util.STORAGE_BACKEND, util.MAX_USERS), ("kiosk", "sharded", 8))
+        self.assertEqual(storage._instances, {"sharded":kiosk}) # Caller's backend kept, benchmark ones closed
+        self.assertEqual(os.getcwd(), os.path.realpath(self._folder))
+
+    def test_compare_flags_slower_cases(self):
+        case = lambda median: {"min":median, "median":median, "number":1}
+        baseline = {"load/text/16":case(1e-3), "save/text/16":case(2e-3), "removed":case(1e-3), "zero":case(0.0)}
+        benchmark.write_results(baseline, "baseline.json")
+        with open("baseline.json", "r") as f:
+            self.assertEqual(json.load(f)["results"], baseline)
+        now = {"load/text/16":case(1.2e-3), "save/text/16":case(2.6e-3), "new case":case(1.0), "zero":case(1e-9)}
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            self.assertEqual(benchmark.compare_results(now, "baseline.json"), ["save/text/16", "zero"])
+            self.assertEqual(benchmark.compare_results(now, "baseline.json", threshold=.1), ["load/text/16", "save/text/16", "zero"])
+        self.assertIn("new", out.getvalue()) # Cases missing from the baseline are shown, never flagged
+
+if __name__ == "__main__":
+    unittest.main()
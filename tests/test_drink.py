@@ -0,0 +1,90 @@
+"""
+test_drink.py - Compact model objects, immutable recipes and exact drink aggregates
+
+@author: Brian Kachala - ECE 4900 Team 8
+@Last Edited: 10/18/2026
+"""
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import CapRock_backend_util as util
+import CapRock_drink as drink
+import CapRock_liquid as liquid
+import CapRock_user as user
+
+class DrinkModelTest(unittest.TestCase):
+
+    def setUp(self):
+        self.vodka = liquid.Liquid("Vodka", .4, .95, 16)
+        self.juice = liquid.Liquid("Juice", 0, 1.0, 16)
+        self.screw = drink.Drink("Screwdriver", (self.vodka, 1.5), [self.juice, 4])
+
+    def test_models_have_no_instance_dict(self):
+        ann = user.User("Ann", util.Sex.Female, 140.0, util.Experience.Regular)
+        for obj in (self.vodka, self.screw, ann):
+            with self.subTest(model=type(obj).__name__):
+                self.assertFalse(hasattr(obj, "__dict__"))
+                self.assertRaises(AttributeError, setattr, obj, "typo", 1)
+
+    def test_recipe_is_an_immutable_tuple(self):
+        recipe = self.screw.get_liquids_obj()
+        self.assertEqual(recipe, ((self.vodka, 1.5), (self.juice, 4))) # List part copied into a tuple
+        self.assertIs(self.screw.get_liquids_obj(), recipe) # Reads do not copy
+        self.screw.add_liquid((liquid.Liquid("Lime", 0, 1.0), .5))
+        self.screw.remove_liquid("vodka")
+        self.assertEqual(recipe, ((self.vodka, 1.5), (self.juice, 4))) # Callers holding the old one see no edits
+        self.assertEqual([liq.get_name() for liq, _ in self.screw.get_liquids_obj()], ["Juice", "Lime"])
+
+    def test_names_rebuilt_after_rename(self):
+        names = self.screw.get_liquids_name()
+        self.assertIs(self.screw.get_liquids_name(), names)
+        self.juice.change_name("Orange Juice")
+        self.assertEqual(self.screw.get_liquids_name(), (("Vodka", 1.5), ("Orange Juice", 4)))
+        self.assertEqual(names, (("Vodka", 1.5), ("Juice", 4)))
+
+def recompute(dr):
+    """ Returns (volume, ABV, grams of alcohol) of drink obj summed over its recipe """
+    volume = sum(oz for _, oz in dr.get_liquids_obj())
+    alcohol = sum(liq.get_abv() * oz for liq, oz in dr.get_liquids_obj())
+    return volume, alcohol / volume if volume else 0.0, util.ML_PER_OZ * alcohol * util.ETHANOL_DENSITY
+
+class DrinkAggregateTest(unittest.TestCase):
+
+    def test_aggregates_match_recompute(self):
+        rng = random.Random(6)
+        liqs = [liquid.Liquid("Liquid %d" % i, rng.choice((0, .05, .12, .4, .75)), 1.0, 16) for i in range(8)]
+        drinks = [drink.Drink("Drink %d" % i, (rng.choice(liqs), rng.randint(1, 8) / 4)) for i in range(5)]
+        for _ in range(500):
+            dr = rng.choice(drinks)
+            names = [liq.get_name() for liq, _ in dr.get_liquids_obj()]
+            op = rng.random()
+            if op < .4 and len(names) < util.MAX_LIQ_PER_DRINK:
+                dr.add_liquid((rng.choice([liq for liq in liqs if liq.get_name() not in names]), rng.choice((.1, 1/3, .5, 1.5, 2))))
+            elif op < .8 and len(names) > 1:
+                dr.remove_liquid(rng.choice(names))
+            else:
+                rng.choice(liqs).change_abv(rng.choice((0, .05, .1, .4, .6)))
+            for each in drinks:
+                volume, abv, grams = recompute(each)
+                self.assertAlmostEqual(each.get_volume(), volume, places=12)
+                self.assertAlmostEqual(each.get_abv(), abv, places=12)
+                self.assertAlmostEqual(each.get_alcohol_grams(), grams, places=9)
+
+    def test_add_then_remove_leaves_no_drift(self):
+        vodka = liquid.Liquid("Vodka", .4, .95, 16)
+        shot = drink.Drink("Shot", (vodka, 1.5))
+        before = (shot.get_volume(), shot.get_abv(), shot.get_alcohol_grams())
+        for i in range(200):
+            shot.add_liquid((liquid.Liquid("Mixer %d" % i, .1, 1.0), .1))
+            shot.remove_liquid("Mixer %d" % i)
+        self.assertEqual((shot.get_volume(), shot.get_abv(), shot.get_alcohol_grams()), before)
+        vodka.change_abv(.5)
+        self.assertEqual(shot.get_abv(), .5)
+        zero = drink.Drink("Garnish", (vodka, 0))
+        self.assertEqual((zero.get_volume(), zero.get_abv()), (0.0, 0.0))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+"""
+test_feasibility.py - Makeable drink index matches checking every recipe after each change
+
+@author: Brian Kachala - ECE 4900 Team 8
+@Last Edited: 10/18/2026
+"""
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import CapRock_backend_util as util
+import CapRock_drink as drink
+import CapRock_feasibility as feasibility
+import CapRock_liquid as liquid
+import CapRock_registry as registry
+
+def brute_force(reg):
+    """ Returns drinks whose every liquid is in a container with enough left, in catalog order """
+    return [dr for dr in reg.drinks
+            if all(liq.get_container() != util.Container.NA.name and liq.get_volume_left() >= oz
+                   for liq, oz in dr.get_liquids_obj())]
+
+class FeasibilityTest(unittest.TestCase):
+
+    def setUp(self):
+        self.rng = random.Random(9)
+        containers = [c for c in util.Container if c != util.Container.NA]
+        liqs = [liquid.Liquid("Liquid %d" % i, .4, 1.0, self.rng.randint(0, 16), self.rng.choice(containers + [util.Container.NA]))
+                for i in range(8)]
+        drinks = [drink.Drink("Drink %d" % i, *self.recipe(liqs)) for i in range(12)]
+        self.reg = registry.Registry(liqs, drinks)
+        self.index = feasibility.FeasibilityIndex(self.reg)
+        self.state = {dr:self.index.is_makeable(dr) for dr in drinks} # Kept only from events
+        self.index.subscribe(self.on_event)
+
+    def recipe(self, liqs):
+        return [(liq, self.rng.randint(1, 8) / 2) for liq in self.rng.sample(liqs, self.rng.randint(1, util.MAX_LIQ_PER_DRINK))]
+
+    def on_event(self, kind, action, index, dr):
+        self.assertIs(self.reg.drinks[index], dr)
+        self.assertNotEqual(self.state[dr], action == "available") # Only flips are sent
+        self.state[dr] = action == "available"
+
+    def check(self):
+        expected = brute_force(self.reg)
+        self.assertEqual(self.index.makeable_drinks(), expected)
+        self.assertEqual([dr for dr in self.reg.drinks if self.state[dr]], expected)
+
+    def test_matches_brute_force_after_every_change(self):
+        containers = list(util.Container)
+        for step in range(400):
+            op = self.rng.random()
+            liq = self.rng.choice(self.reg.liquids)
+            if op < .4:
+                liq.change_volume_left(self.rng.randint(0, 32) / 2)
+            elif op < .55:
+                liq.change_container(self.rng.choice(containers))
+            elif op < .6:
+                liq.remove_container()
+            elif op < .75:
+                dr = self.rng.choice(self.reg.drinks)
+                names = [l.get_name() for l, _ in dr.get_liquids_obj()]
+                if len(names) > 1 and self.rng.random() < .5:
+                    dr.remove_liquid(self.rng.choice(names))
+                elif len(names) < util.MAX_LIQ_PER_DRINK and liq.get_name() not in names:
+                    dr.add_liquid((liq, self.rng.randint(1, 8) / 2))
+                self.reg.reindex_drink(dr)
+            elif op < .85:
+                dr = drink.Drink("Added %d" % step, *self.recipe(self.reg.liquids))
+                self.reg.add_drink(dr)
+                self.state[dr] = self.index.is_makeable(dr)
+            elif op < .95 and len(self.reg.drinks) > 1:
+                self.reg.remove_drink(self.rng.choice(self.reg.drinks))
+            else:
+                new = liquid.Liquid("New %d" % step, .4, 1.0, 16, util.Container.FL)
+                self.reg.add_liquid(new)
+                unused = [l for l in self.reg.liquids if not self.reg.liquid_in_drink(l)]
+                self.reg.remove_liquid(self.rng.choice(unused)) # Freed bits get reused
+            self.check()
+
+    def test_exact_threshold_is_makeable(self):
+        liq = self.reg.liquids[0]
+        liq.change_container(util.Container.FL)
+        dr = drink.Drink("Exact", (liq, 3))
+        self.reg.add_drink(dr)
+        self.state[dr] = self.index.is_makeable(dr)
+        for volume in (3, 2.5, 3, 16, 0):
+            liq.change_volume_left(volume)
+            self.assertEqual(self.index.is_makeable(dr), volume >= 3)
+        self.check()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+"""
+test_gui_frames.py - Frames are built on first show and only the shown frame refreshes
+
+@author: Brian Kachala - ECE 4900 Team 8
+@Last Edited: 10/18/2026
+"""
+import os
+import re
+import sys
+import types
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import CapRock_gui_frames as gui_frames
+import CapRock_instrument as instrument
+
+class PlainFrame():
+    """ Stands in for a Tk frame without refresh loops, like MainMenu, records what the controller did with it """
+    built = []
+
+    def __init__(self, parent, controller):
+        self.calls = []
+        PlainFrame.built.append(self)
+
+    def grid(self, **kwargs):
+        self.calls.append("grid")
+
+    def tkraise(self):
+        self.calls.append("raise")
+
+class FakeFrame(PlainFrame):
+    """ Frame with refresh loops started and stopped on show and hide """
+
+    def on_show(self):
+        self.calls.append("show")
+
+    def on_hide(self):
+        self.calls.append("hide")
+
+class LazyFramesTest(unittest.TestCase):
+
+    def setUp(self):
+        PlainFrame.built = []
+        instrument.reset()
+        self.gui = types.SimpleNamespace(frames={}, _shown=None, _container=None)
+        self.gui.get_frame = lambda page: gui_frames.CapRockGUI.get_frame(self.gui, page)
+
+    def tearDown(self):
+        instrument.reset()
+
+    def show(self, page):
+        gui_frames.CapRockGUI.show_frame(self.gui, page)
+        return self.gui.frames[page]
+
+    def test_frames_built_once_on_first_show(self):
+        with mock.patch.dict(gui_frames.FRAMES, {"MainMenu":PlainFrame, "PourDrink":FakeFrame, "ChangeProfile":FakeFrame}, clear=True):
+            menu = self.show("MainMenu")
+            self.assertEqual(len(PlainFrame.built), 1) # Other pages wait until asked for
+            pour = self.show("PourDrink")
+            self.show("PourDrink") # Already shown, no second on_show
+            profiles = self.show("ChangeProfile")
+            self.assertIs(self.show("PourDrink"), pour)
+            self.show("MainMenu")
+            self.assertEqual(len(PlainFrame.built), 3)
+            self.assertEqual(menu.calls, ["grid", "raise", "raise"])
+            self.assertEqual(pour.calls, ["grid", "raise", "show", "raise", "hide", "raise", "show", "hide"])
+            self.assertEqual(profiles.calls, ["grid", "raise", "show", "hide"])
+            self.assertIs(gui_frames.CapRockGUI.get_frame(self.gui, "ChangeProfile"), profiles)
+        self.assertEqual(instrument.histogram("gui.build.PourDrink").get_count(), 1)
+
+    def test_every_page_shown_is_registered(self):
+        with open(gui_frames.__file__, "r") as f:
+            pages = set(re.findall(r'show_frame\("(\w+)"\)', f.read()))
+        self.assertTrue(pages)
+        self.assertLessEqual(pages, set(gui_frames.FRAMES))
+        self.assertTrue(all(isinstance(cls, type) for cls in gui_frames.FRAMES.values()))
+
+if __name__ == "__main__":
+    unittest.main()
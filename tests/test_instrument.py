@@ -0,0 +1,98 @@
+"""
+test_instrument.py - Latency histograms and the metrics dump of the kiosk
+
+@author: Brian Kachala - ECE 4900 Team 8
+@Last Edited: 10/18/2026
+"""
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import types
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import CapRock_instrument as instrument
+import CapRock_main as main
+
+class HistogramTest(unittest.TestCase):
+
+    def setUp(self):
+        instrument.reset()
+
+    def tearDown(self):
+        instrument.enable(True)
+        instrument.reset()
+
+    def test_buckets_cover_every_value(self):
+        rng = random.Random(1)
+        values = list(range(300)) + [rng.randrange(1 << rng.randint(8, 40)) for _ in range(5000)]
+        for nanos in values:
+            index = instrument._bucket_index(nanos)
+            low, high = instrument._bucket_low(index), instrument._bucket_high(index)
+            self.assertTrue(low <= nanos <= high, (nanos, low, high))
+            self.assertLessEqual(high - low, max(low, 1) >> instrument.SUB_BUCKET_BITS) # Within ~3%
+        for index in range(instrument._bucket_index(1 << 40)): # Buckets neither overlap nor leave gaps
+            self.assertEqual(instrument._bucket_high(index) + 1, instrument._bucket_low(index + 1))
+
+    def test_percentiles_within_bucket_of_exact(self):
+        rng = random.Random(2)
+        hist = instrument.Histogram("test")
+        samples = [rng.lognormvariate(-9, 1.5) for _ in range(20000)]
+        for seconds in samples:
+            hist.record(seconds)
+        ordered = sorted(samples)
+        for q in (1, 50, 90, 99, 99.9, 100):
+            exact = ordered[max(1, int(round(q / 100.0 * len(ordered)))) - 1]
+            got = hist.percentile(q)
+            self.assertGreaterEqual(got, exact - 1e-9) # Bucket top, nanoseconds are truncated
+            self.assertLessEqual(got, exact * (1 + 2.0 ** -instrument.SUB_BUCKET_BITS) + 1e-9)
+        self.assertEqual(hist.percentile(100), max(samples))
+        summary = hist.summary(buckets=True)
+        self.assertEqual(summary["count"], len(samples))
+        self.assertEqual(sum(summary["buckets"].values()), len(samples))
+        self.assertAlmostEqual(summary["p999_ms"], hist.percentile(99.9) * 1e3)
+        self.assertEqual(instrument.Histogram("empty").percentile(50), 0.0)
+
+    def test_timers_record_even_on_error(self):
+        @instrument.timed("test.fails")
+        def fails():
+            raise ValueError()
+        self.assertRaises(ValueError, fails)
+        with self.assertRaises(ValueError), instrument.timer("test.block"):
+            raise ValueError()
+        instrument.enable(False)
+        self.assertRaises(ValueError, fails)
+        instrument.record("test.off", 1.0)
+        self.assertEqual({name:res["count"] for name, res in instrument.snapshot().items()}, {"test.fails":1, "test.block":1})
+
+class MetricsDumpTest(unittest.TestCase):
+
+    def setUp(self):
+        self._cwd = os.getcwd()
+        self._folder = tempfile.mkdtemp()
+        os.chdir(self._folder)
+        instrument.reset()
+
+    def tearDown(self):
+        instrument.reset()
+        os.chdir(self._cwd)
+        shutil.rmtree(self._folder, ignore_errors=True)
+
+    def test_signal_handler_takes_no_locks(self):
+        instrument.record("service.pour", .001)
+        hist = instrument.histogram("service.pour")
+        with instrument._lock, hist._lock: # Main thread interrupted while recording
+            main.request_dump()
+        self.assertFalse(os.path.exists(instrument.METRICS_PATH))
+
+        scheduled = []
+        main.poll_dump(types.SimpleNamespace(after=lambda ms, func, arg: scheduled.append(func)))
+        self.assertEqual(scheduled, [main.poll_dump])
+        with open(instrument.METRICS_PATH, "r") as f:
+            self.assertEqual(json.load(f)["metrics"]["service.pour"]["count"], 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+"""
+test_journal.py - Journal replay after a crash between the storage save and the checkpoint
+
+@author: Brian Kachala - ECE 4900 Team 8
+@Last Edited: 10/18/2026
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import CapRock_backend_util as util
+import CapRock_drink as drink
+import CapRock_journal as journal
+import CapRock_liquid as liquid
+import CapRock_service as service
+import CapRock_storage as storage
+import CapRock_user as user
+
+class JournalReplayTest(unittest.TestCase):
+
+    def setUp(self):
+        self._cwd = os.getcwd()
+        self._folder = tempfile.mkdtemp()
+        self._backend = util.STORAGE_BACKEND
+        os.chdir(self._folder) # Storage and journal go to 'backend/' here
+
+    def tearDown(self):
+        for backend in storage._instances.values():
+            backend.close()
+        storage._instances.clear()
+        util.STORAGE_BACKEND = self._backend
+        os.chdir(self._cwd)
+        shutil.rmtree(self._folder, ignore_errors=True)
+
+    def crash_before_checkpoint(self):
+        """ Saves a catalog with guest and profile pours, crashes between snapshot and checkpoint, returns journal """
+        liq = liquid.Liquid("Vodka", .4, .95, 16, util.Container.FL)
+        dr = drink.Drink("Shot", (liq, 1.5))
+        person = user.User("Ann", util.Sex.Female, 140.0, util.Experience.Regular)
+        pour_journal = journal.PourJournal()
+        core = service.CapRockService([person], [dr], [liq], pour_journal)
+        core.pour(dr) # Guest
+        core.pour(dr, person)
+        pour_journal.checkpoint = lambda: None # Crash after the save, before the journal is emptied
+        self.assertTrue(core.snapshot())
+        core.pour(dr, durable=True) # Only in the journal
+        pour_journal.close()
+        storage._instances.clear()
+
+    def test_saved_pours_are_not_replayed(self):
+        for backend in ("text", "sharded", "sqlite"):
+            with self.subTest(backend=backend):
+                util.STORAGE_BACKEND = backend
+                self.crash_before_checkpoint()
+
+                users, drinks, liquids = util.load_storage()
+                pour_journal = journal.PourJournal()
+                try:
+                    self.assertEqual(len(pour_journal.pending_records()), 3)
+                    replayed = journal.apply_pours(pour_journal.pending_records(), users, drinks, liquids,
+                                                   util.stored_journal_seq())
+                finally:
+                    pour_journal.close()
+                self.assertEqual(replayed, 1) # Guest pour made after the save
+                self.assertAlmostEqual(liquids[0].get_volume_left(), 16 - 3 * 1.5)
+                self.assertEqual(len(users[0].get_current_drinks()), 1)
+
+                for backend_obj in storage._instances.values():
+                    backend_obj.close()
+                storage._instances.clear()
+                shutil.rmtree("backend")
+
+    def test_failing_fsync_fails_waiters(self):
+        pour_journal = journal.PourJournal()
+        fsync = mock.Mock(side_effect=OSError("disk gone"))
+        try:
+            with mock.patch.object(journal.os, "fsync", fsync), mock.patch.object(journal.log, "error") as error:
+                seq = pour_journal.record_pour(0, 1, [(1, 1.5)], 0.0)
+                self.assertRaises(util.CapRockError, pour_journal.wait_durable, seq, 5) # Not forever
+                time.sleep(.5)
+                self.assertRaises(util.CapRockError, pour_journal.wait_durable, seq, 5)
+            self.assertEqual(error.call_count, 1) # Once until a sync works
+            self.assertLessEqual(fsync.call_count, 6) # Backed off, not every 50 ms
+            with mock.patch.object(journal.log, "warning") as warning:
+                later = pour_journal.record_pour(0, 1, [(1, 1.5)], 0.0)
+                self.assertTrue(pour_journal.wait_durable(later, 10)) # Waits for the flusher's retry once the disk is back
+            warning.assert_called_once()
+            self.assertTrue(pour_journal.wait_durable(seq, 0))
+        finally:
+            pour_journal.close()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+"""
+test_logging.py - Queued JSON log is rotated, gzipped and filtered by module level
+
+@author: Brian Kachala - ECE 4900 Team 8
+@Last Edited: 10/18/2026
+"""
+import gzip
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import CapRock_backend_util as util
+
+class LoggingTest(unittest.TestCase):
+
+    def setUp(self):
+        self._folder = tempfile.mkdtemp()
+        self.path = os.path.join(self._folder, "logs", "caprock.jsonl")
+        root = logging.getLogger()
+        self._root = (list(root.handlers), root.level)
+
+    def tearDown(self):
+        util.stop_logging()
+        root = logging.getLogger()
+        root.handlers[:] = self._root[0]
+        root.setLevel(self._root[1])
+        for name in ("test.quiet", "test.loud"):
+            logging.getLogger(name).setLevel(logging.NOTSET)
+        shutil.rmtree(self._folder, ignore_errors=True)
+
+    def read(self, path):
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt") as f:
+            return [json.loads(line) for line in f]
+
+    def test_rotated_logs_are_gzipped(self):
+        with mock.patch.object(util, "LOG_MAX_BYTES", 4096), mock.patch.object(util, "LOG_BACKUPS", 2):
+            util.init_logging(path=self.path)
+        log = logging.getLogger("test.loud")
+        writers = [threading.Thread(target=lambda n=n: [log.info("writer %d line %d %s", n, i, "x" * 40) for i in range(100)])
+                   for n in range(4)]
+        for writer in writers:
+            writer.start()
+        for writer in writers:
+            writer.join()
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            log.exception("failed")
+        util.stop_logging()
+
+        files = sorted(os.listdir(os.path.dirname(self.path)))
+        self.assertEqual(files, ["caprock.jsonl", "caprock.jsonl.1.gz", "caprock.jsonl.2.gz"]) # Oldest dropped
+        entries = [entry for name in files for entry in self.read(os.path.join(os.path.dirname(self.path), name))]
+        self.assertTrue(all(entry["module"] == "test.loud" for entry in entries))
+        self.assertLessEqual(os.path.getsize(self.path), 4096)
+        last = self.read(self.path)[-1]
+        self.assertEqual((last["level"], last["msg"]), ("ERROR", "failed"))
+        self.assertIn("ValueError: boom", last["exc"])
+
+    def test_module_levels(self):
+        util.init_logging({"test.quiet":"warning", "test.loud":logging.DEBUG}, path=self.path)
+        logging.getLogger("test.quiet").info("skipped %s", "quiet")
+        logging.getLogger("test.quiet").warning("kept %s", "quiet")
+        logging.getLogger("test.loud").debug("kept %s", "loud")
+        logging.getLogger("test.other").debug("skipped other") # Root stays at INFO
+        util.stop_logging()
+        util.stop_logging() # Second stop is a no-op
+        self.assertEqual([entry["msg"] for entry in self.read(self.path)], ["kept quiet", "kept loud"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+"""
+test_optimizer.py - Container loading search finds the best loadings
+
+@author: Brian Kachala - ECE 4900 Team 8
+@Last Edited: 10/18/2026
+"""
+import itertools
+import os
+import random
+import sys
+import threading
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import CapRock_drink as drink
+import CapRock_liquid as liquid
+import CapRock_optimizer as optimizer
+
+def random_catalog(rng, liquids, drinks, max_lines=3):
+    """ Returns (drinks, liquids) of random recipes """
+    liqs = [liquid.Liquid("Liquid %d" % i, .4, .95, 16) for i in range(liquids)]
+    drs = [drink.Drink("Drink %d" % i, *[(liq, 1.0) for liq in rng.sample(liqs, rng.randint(1, max_lines))])
+           for i in range(drinks)]
+    return drs, liqs
+
+def brute_force(drs, liqs, slots, weights=None):
+    """ Returns sorted scores of every loading of slots liquids, best first """
+    scores = []
+    for combo in itertools.combinations(liqs, slots):
+        loaded = set(combo)
+        scores.append(sum(1.0 if weights is None else weights.get(dr, 0)
+                          for dr in drs if {liq for liq, _ in dr.get_liquids_obj()} <= loaded))
+    return sorted(scores, reverse=True)
+
+class OptimizerTest(unittest.TestCase):
+
+    def test_matches_brute_force(self):
+        rng = random.Random(7)
+        for trial in range(40):
+            count = rng.randint(1, 9)
+            drs, liqs = random_catalog(rng, count, rng.randint(0, 14), max_lines=rng.randint(1, min(count, 4)))
+            slots = rng.randint(1, optimizer.CONTAINER_SLOTS)
+            weights = None if trial % 2 else {dr:rng.randint(0, 5) for dr in drs}
+            k = rng.randint(1, 6)
+            with self.subTest(trial=trial):
+                found = optimizer.best_loadings(drs, liqs, k=k, weights=weights, slots=slots, workers=1)
+                expected = brute_force(drs, liqs, min(slots, len(liqs)), weights)[:k]
+                self.assertEqual([l.score for l in found], expected) # Ties may pick other liquids
+                for loading in found:
+                    loaded = set(loading.liquids)
+                    self.assertEqual(len(loaded), min(slots, len(liqs)))
+                    self.assertEqual(loading.drinks, [dr for dr in drs if {liq for liq, _ in dr.get_liquids_obj()} <= loaded])
+
+    def test_process_pool_matches_serial_search(self):
+        drs, liqs = random_catalog(random.Random(1), optimizer.PARALLEL_MIN_LIQUIDS + 4, 120)
+        serial = optimizer.best_loadings(drs, liqs, k=3, workers=1)
+        result = []
+        # Started off the main thread like the GUI's suggest loading worker
+        worker = threading.Thread(target=lambda: result.extend(optimizer.best_loadings(drs, liqs, k=3, workers=2)))
+        worker.start()
+        worker.join(60)
+        self.assertEqual([l.score for l in result], [l.score for l in serial]) # Ties may pick other liquids
+
+if __name__ == "__main__":
+    unittest.main()
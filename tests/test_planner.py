@@ -0,0 +1,106 @@
+"""
+test_planner.py - Servings left and pour plans match trying every count on small catalogs
+
+@author: Brian Kachala - ECE 4900 Team 8
+@Last Edited: 10/18/2026
+"""
+import itertools
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import CapRock_backend_util as util
+import CapRock_drink as drink
+import CapRock_liquid as liquid
+import CapRock_planner as planner
+import CapRock_registry as registry
+
+def needs_of(dr):
+    """ Returns {liquid_obj:total oz} of drink obj """
+    needs = {}
+    for liq, oz in dr.get_liquids_obj():
+        needs[liq] = needs.get(liq, 0) + oz
+    return needs
+
+def brute_force(drinks, volumes):
+    """ Returns most servings over every count of every drink that fits in volumes {liquid_obj:oz} """
+    drinks = [dr for dr in drinks if all(liq in volumes for liq in needs_of(dr))]
+    most = [min(int(volumes[liq] / oz + 1e-9) for liq, oz in needs_of(dr).items()) for dr in drinks]
+    best = 0
+    for counts in itertools.product(*[range(m + 1) for m in most]):
+        used = {}
+        for dr, count in zip(drinks, counts):
+            for liq, oz in needs_of(dr).items():
+                used[liq] = used.get(liq, 0) + oz * count
+        if all(oz <= volumes[liq] + 1e-9 for liq, oz in used.items()):
+            best = max(best, sum(counts))
+    return best
+
+class PlannerTest(unittest.TestCase):
+
+    def catalog(self, rng):
+        containers = [c for c in util.Container if c != util.Container.NA]
+        liqs = [liquid.Liquid("Liquid %d" % i, .4, 1.0, rng.randint(0, 12) / 2,
+                              rng.choice(containers) if rng.random() < .8 else util.Container.NA) for i in range(3)]
+        drinks = [drink.Drink("Drink %d" % i, *[(liq, rng.randint(1, 4) / 2) for liq in rng.sample(liqs, rng.randint(1, 2))])
+                  for i in range(rng.randint(1, 4))]
+        return registry.Registry(liqs, drinks)
+
+    def test_servings_left_follows_changes(self):
+        rng = random.Random(3)
+        reg = self.catalog(rng)
+        plans = planner.ServingsPlanner(reg)
+        for _ in range(200):
+            liq = rng.choice(reg.liquids)
+            if rng.random() < .7:
+                liq.change_volume_left(rng.randint(0, 16) / 2)
+            else:
+                liq.change_container(rng.choice(list(util.Container)))
+            for dr in reg.drinks:
+                needs = needs_of(dr)
+                expected = 0 if any(l.get_container() == util.Container.NA.name for l in needs) else \
+                    min(int(l.get_volume_left() / oz + 1e-9) for l, oz in needs.items())
+                self.assertEqual(plans.servings_left(dr), expected)
+        dr = reg.drinks[0]
+        plans.servings_left(dr)
+        lime = liquid.Liquid("Lime", 0, 1.0, 3, util.Container.FL)
+        reg.add_liquid(lime)
+        if len(dr.get_liquids_obj()) == util.MAX_LIQ_PER_DRINK:
+            dr.remove_liquid(dr.get_liquids_obj()[0][0].get_name())
+        dr.add_liquid((lime, 1.5)) # New recipe tuple, counted again
+        self.assertLessEqual(plans.servings_left(dr), 2)
+        lime.change_volume_left(1)
+        self.assertEqual(plans.servings_left(dr), 0)
+        self.assertEqual(plans.servings_left(drink.Drink("Unstored", (reg.liquids[0], 1))), 0)
+
+    def test_plan_matches_brute_force(self):
+        rng = random.Random(11)
+        for trial in range(60):
+            reg = self.catalog(rng)
+            with self.subTest(trial=trial):
+                result = planner.ServingsPlanner(reg).plan()
+                volumes = {liq:liq.get_volume_left() for liq in reg.liquids if liq.get_container() != util.Container.NA.name}
+                self.assertEqual(result.servings, brute_force(reg.drinks, volumes))
+                self.assertEqual(sum(result.counts.values()), result.servings)
+                used = {}
+                for dr, count in result.counts.items():
+                    for liq, oz in needs_of(dr).items():
+                        used[liq] = used.get(liq, 0) + oz * count
+                for liq, oz in used.items():
+                    self.assertLessEqual(oz, volumes[liq] + 1e-9)
+
+    def test_queue_is_poured_first(self):
+        vodka = liquid.Liquid("Vodka", .4, .95, 4, util.Container.FL)
+        juice = liquid.Liquid("Juice", 0, 1.0, 8, util.Container.BR)
+        shot = drink.Drink("Shot", (vodka, 1.5))
+        screw = drink.Drink("Screwdriver", (vodka, 1.5), (juice, 4))
+        reg = registry.Registry([vodka, juice], [shot, screw])
+        result = planner.ServingsPlanner(reg).plan([screw, screw, screw])
+        self.assertEqual(result.unserved, [screw]) # Third one is out of vodka
+        self.assertEqual((result.servings, result.counts), (0, {}))
+        self.assertEqual(planner.ServingsPlanner(reg).plan([screw]).counts, {shot:1})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+"""
+test_record_reader.py - Streaming reader parses what the old split reader did and points at bad lines
+
+@author: Brian Kachala - ECE 4900 Team 8
+@Last Edited: 10/18/2026
+"""
+import io
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import CapRock_backend_util as util
+import CapRock_benchmark as benchmark
+import CapRock_record_reader as reader
+
+class RecordReaderTest(unittest.TestCase):
+
+    def setUp(self):
+        self._folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self._folder, ignore_errors=True)
+
+    def write(self, text):
+        path = os.path.join(self._folder, "storage.txt")
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    def test_matches_legacy_split_read(self):
+        benchmark.write_synthetic_text_storage(self._folder, liquids=8, drinks=6, users=5, pours=40, seed=3)
+        path = os.path.join(self._folder, "user_storage.txt")
+        streamed = [(rec.name, rec.sex.name, rec.weight, rec.experience.name, rec.drinks)
+                    for rec in reader.read_records(path, "users")]
+        self.assertEqual(streamed, benchmark._legacy_split_read(path, "\n-----\n"))
+
+        with open(path, "r") as f:
+            whole = list(reader.iter_raw_records(f))
+        for chunk_size in (1, 3, 7, 64): # Separators straddle chunk ends
+            with open(path, "r") as f:
+                self.assertEqual(list(reader.iter_raw_records(f, chunk_size)), whole)
+
+    def test_blank_lines_and_ids(self):
+        path = self.write("#4\nVodka\n\n0.4\n0.95\n12.5\nFL\n-----\n\n-----\nRum\n0.35\n0.93\n0\nNA")
+        self.assertEqual(list(reader.read_records(path, "liquids")),
+                         [reader.LiquidRecord("Vodka", .4, .95, 12.5, util.Container.FL, 4),
+                          reader.LiquidRecord("Rum", .35, .93, 0, util.Container.NA, None)])
+
+    def test_malformed_records_report_line(self):
+        path = self.write("Shot\n1\nVodka\n1.5\n-----\nBad\n2\nVodka\n1.5\n-----\nSour\n1\nLemon\nlots\n-----\nTorn\n3\nVodka")
+        errors = []
+        self.assertEqual([rec.name for rec in reader.read_records(path, "drinks", errors)], ["Shot"])
+        self.assertEqual([e.line for e in errors], [9, 14, 18])
+        self.assertIn("'lots'", str(errors[1]))
+        self.assertRaises(reader.StorageParseError, list, reader.read_records(path, "drinks"))
+
+    def test_unknown_member_is_an_error(self):
+        path = self.write("Ann\nOther\n140\nRegular\n0\n")
+        self.assertRaises(reader.StorageParseError, list, reader.read_records(path, "users"))
+        with io.StringIO("Ann\nFemale\n140\nRegular\n0\n-----\n") as f:
+            self.assertEqual(list(reader.iter_raw_records(f)), [(0, ["", "Ann", "Female", "140", "Regular", "0"])]) # Virtual line 0, so "Ann" is line 1
+
+if __name__ == "__main__":
+    unittest.main()
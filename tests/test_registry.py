@@ -0,0 +1,103 @@
+"""
+test_registry.py - Catalog registry keeps name, ID and dependency lookups in sync
+
+@author: Brian Kachala - ECE 4900 Team 8
+@Last Edited: 10/18/2026
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import CapRock_backend_util as util
+import CapRock_drink as drink
+import CapRock_liquid as liquid
+import CapRock_registry as registry
+import CapRock_user as user
+
+class RegistryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.vodka = liquid.Liquid("Vodka", .4, .95, 16)
+        self.juice = liquid.Liquid("Juice", 0, 1.0, 16)
+        self.water = liquid.Liquid("Water", 0, 1.0, 16)
+        self.shot = drink.Drink("Shot", (self.vodka, 1.5))
+        self.screw = drink.Drink("Screwdriver", (self.vodka, 1.5), (self.juice, 4))
+        self.ann = user.User("Ann", util.Sex.Female, 140.0, util.Experience.Regular)
+        self.reg = registry.Registry([self.vodka, self.juice, self.water], [self.shot, self.screw], [self.ann])
+
+    def test_lookups_match_linear_scan(self):
+        for name in ("Vodka", "Juice", "Water", "Rum"):
+            i = util.findId(self.reg.liquids, name)
+            self.assertIs(self.reg.get_liquid(name), self.reg.liquids[i] if i >= 0 else None)
+        self.assertIs(self.reg.get_drink("Screwdriver"), self.screw)
+        self.assertIs(self.reg.get_user("Ann"), self.ann)
+        self.assertIs(self.reg.get_by_id("drinks", self.shot.get_id()), self.shot)
+        self.assertEqual(self.reg.drinks_using(self.vodka), {self.shot, self.screw})
+        self.assertEqual(self.reg.drinks_using(self.juice), {self.screw})
+        self.assertFalse(self.reg.liquid_in_drink(self.water))
+
+    def test_duplicates_and_used_liquids_are_refused(self):
+        self.assertRaises(util.CapRockError, self.reg.add_liquid, liquid.Liquid("Vodka", .4, .95))
+        self.assertRaises(util.CapRockError, self.reg.rename, self.juice, "Vodka")
+        self.assertRaises(util.CapRockError, self.reg.remove_liquid, self.juice)
+        self.reg.remove_drink(self.screw)
+        self.reg.remove_liquid(self.juice) # No drink uses it anymore
+        self.assertIsNone(self.reg.get_liquid("Juice"))
+        self.assertEqual(self.reg.drinks_using(self.vodka), {self.shot})
+
+    def test_rename_and_removal_keep_lookups(self):
+        self.reg.rename(self.vodka, "Gin")
+        self.assertIsNone(self.reg.get_liquid("Vodka"))
+        self.assertIs(self.reg.get_liquid("Gin"), self.vodka)
+        self.assertEqual(self.reg.position("liquids", self.water), 2)
+        self.reg.remove_liquid(self.water)
+        self.reg.add_liquid(self.water)
+        self.assertEqual([self.reg.position("liquids", liq) for liq in (self.vodka, self.juice, self.water)], [0, 1, 2])
+        self.reg.remove_drink(self.shot)
+        self.assertEqual(self.reg.position("drinks", self.screw), 0)
+        self.assertIsNone(self.reg.position("drinks", self.shot))
+
+    def test_reindex_after_recipe_edit(self):
+        self.shot.add_liquid((self.water, 1))
+        self.reg.reindex_drink(self.shot)
+        self.assertEqual(self.reg.drinks_using(self.water), {self.shot})
+        self.shot.remove_liquid("Vodka")
+        self.reg.reindex_drink(self.shot)
+        self.assertEqual(self.reg.drinks_using(self.vodka), {self.screw})
+
+class RegistryEventTest(unittest.TestCase):
+
+    def setUp(self):
+        self.vodka = liquid.Liquid("Vodka", .4, .95, 16)
+        self.juice = liquid.Liquid("Juice", 0, 1.0, 16)
+        self.shot = drink.Drink("Shot", (self.vodka, 1.5))
+        self.reg = registry.Registry([self.vodka, self.juice], [self.shot])
+        self.events = []
+        self.reg.subscribe(lambda kind, action, index, obj: self.events.append((kind, action, index, obj)))
+
+    def test_changes_send_events(self):
+        ann = user.User("Ann", util.Sex.Female, 140.0, util.Experience.Regular)
+        self.reg.add_user(ann)
+        self.juice.change_volume_left(8)
+        self.reg.rename(self.vodka, "Gin")
+        self.assertIs(self.reg.get_liquid("Gin"), self.vodka) # Index is right when the event goes out
+        ann.add_drink(self.shot)
+        self.reg.remove_liquid(self.juice)
+        self.juice.change_volume_left(4) # Removed objects send nothing
+        self.assertEqual(self.events, [("users", "add", 0, ann), ("liquids", "change", 1, self.juice),
+                                       ("liquids", "change", 0, self.vodka), ("users", "change", 0, ann),
+                                       ("liquids", "remove", 1, self.juice)])
+        self.assertEqual((self.reg.version("liquids"), self.reg.version("users")), (5, 2))
+
+    def test_unsubscribe_and_failed_rename(self):
+        self.reg.rename(self.shot, "Single")
+        self.assertRaises(util.CapRockError, self.reg.rename, self.shot, "x" * 100)
+        self.assertIs(self.reg.get_drink("Single"), self.shot)
+        self.assertEqual(len(self.events), 1)
+        self.reg.unsubscribe(self.reg._subscribers[0])
+        self.reg.remove_drink(self.shot)
+        self.assertEqual([event[:3] for event in self.events], [("drinks", "change", 0)])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+"""
+test_server.py - Ordering server answers bad orders with 400 instead of failing
+
+@author: Brian Kachala - ECE 4900 Team 8
+@Last Edited: 10/18/2026
+"""
+import http.client
+import json
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import CapRock_backend_util as util
+import CapRock_drink as drink
+import CapRock_liquid as liquid
+import CapRock_server as server
+import CapRock_service as service
+import CapRock_user as user
+
+class ServerTest(unittest.TestCase):
+
+    def setUp(self):
+        liq = liquid.Liquid("Vodka", .4, .95, 16, util.Container.FL)
+        dr = drink.Drink("Shot", (liq, 1.5))
+        person = user.User("Ann", util.Sex.Female, 140.0, util.Experience.Regular)
+        self.core = service.CapRockService([person], [dr], [liq])
+        self.server = server.CapRockServer(self.core, port=0)
+        self.server.start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def post(self, order):
+        """ Returns (status, decoded body) of POST /pour with order as JSON """
+        conn = http.client.HTTPConnection(self.server.host, self.server.port, timeout=5)
+        try:
+            conn.request("POST", "/pour", json.dumps(order), {"Content-Type":"application/json"})
+            response = conn.getresponse()
+            return response.status, json.loads(response.read())
+        finally:
+            conn.close()
+
+    def test_non_string_values_are_bad_requests(self):
+        for order in ({"drink":[]}, {"drink":{"name":"Shot"}}, {"drink":5}, {}, {"drink":"Shot", "profile":["Ann"]}):
+            status, body = self.post(order)
+            self.assertEqual(status, 400, order)
+            self.assertIn("error", body)
+        self.assertEqual(self.core.registry.get_user("Ann").get_current_drinks(), []) # Nothing was poured
+
+    def test_valid_order_pours(self):
+        status, body = self.post({"drink":"Shot", "profile":"Ann"})
+        self.assertEqual(status, 200)
+        self.assertEqual(body["profile"], "Ann")
+        self.assertGreater(body["bac"], 0)
+        status, body = self.post({"drink":"Shot", "profile":None}) # Guest
+        self.assertEqual((status, body["bac"]), (200, None))
+
+    def test_unknown_names_are_not_found(self):
+        for order in ({"drink":"Water"}, {"drink":"Shot", "profile":"Bob"}):
+            status, body = self.post(order)
+            self.assertEqual(status, 404, order)
+            self.assertIn("error", body)
+
+if __name__ == "__main__":
+    unittest.main()
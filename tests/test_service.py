@@ -0,0 +1,56 @@
+"""
+test_service.py - Headless core pours, journals and resolves names under one lock
+
+@author: Brian Kachala - ECE 4900 Team 8
+@Last Edited: 10/18/2026
+"""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import CapRock_backend_util as util
+import CapRock_drink as drink
+import CapRock_journal as journal
+import CapRock_liquid as liquid
+import CapRock_service as service
+import CapRock_user as user
+
+class ServiceTest(unittest.TestCase):
+
+    def setUp(self):
+        self._folder = tempfile.mkdtemp()
+        self.liq = liquid.Liquid("Vodka", .4, .95, 16, util.Container.FL)
+        self.dr = drink.Drink("Shot", (self.liq, 1.5))
+        self.ann = user.User("Ann", util.Sex.Female, 140.0, util.Experience.Regular)
+        self.journal = journal.PourJournal(os.path.join(self._folder, "journal.bin"), os.path.join(self._folder, "journal.ckpt"))
+        self.core = service.CapRockService([self.ann], [self.dr], [self.liq], self.journal)
+
+    def tearDown(self):
+        self.journal.close()
+        shutil.rmtree(self._folder, ignore_errors=True)
+
+    def test_failed_journal_pours_nothing(self):
+        self.journal.close() # Like a full disk, record_pour raises
+        for person in (self.ann, None):
+            self.assertRaises(util.CapRockError, self.core.pour, self.dr, person)
+        self.assertEqual(self.liq.get_volume_left(), 16)
+        self.assertEqual(self.ann.get_current_drinks(), [])
+
+    def test_pour_order_resolves_names(self):
+        pour, person, level = self.core.pour_order("Shot", "Ann", durable=True)
+        self.assertIs(person, self.ann)
+        self.assertAlmostEqual(level, self.ann.get_bac(), places=5)
+        self.assertEqual(self.ann.get_current_drinks(), [pour])
+        self.assertEqual(self.core.pour_order("Shot", service.GUEST_NAME)[1:], (None, None))
+        self.assertRaises(KeyError, self.core.pour_order, "Shot", "Bob")
+        self.assertRaises(KeyError, self.core.pour_order, "Water")
+        self.assertEqual(self.liq.get_volume_left(), 13)
+        self.journal.close()
+        self.journal = journal.PourJournal(os.path.join(self._folder, "journal.bin"), os.path.join(self._folder, "journal.ckpt"))
+        self.assertEqual([rec.user for rec in self.journal.pending_records()], [self.ann.get_id(), 0])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+"""
+test_simulator.py - Virtual clock and repeatable party simulations
+
+@author: Brian Kachala - ECE 4900 Team 8
+@Last Edited: 10/18/2026
+"""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import CapRock_backend_util as util
+import CapRock_clock as clock
+import CapRock_service as service
+import CapRock_simulator as simulator
+import CapRock_storage as storage
+
+START = 1700000000.0
+
+class VirtualClockTest(unittest.TestCase):
+
+    def test_only_moves_forward(self):
+        virtual = clock.VirtualClock(START)
+        virtual.advance(90)
+        virtual.set(START + 100)
+        self.assertEqual(virtual.now(), START + 100)
+        self.assertRaises(util.CapRockError, virtual.advance, -1)
+        self.assertRaises(util.CapRockError, virtual.set, START)
+        self.assertEqual(virtual.now(), START + 100)
+
+    def test_set_clock_returns_previous(self):
+        virtual = clock.VirtualClock(START)
+        previous = clock.set_clock(virtual)
+        try:
+            self.assertEqual(clock.now(), START)
+            self.assertIs(clock.get_clock(), virtual)
+        finally:
+            self.assertIs(clock.set_clock(previous), virtual)
+        self.assertIsInstance(clock.set_clock(None), clock.SystemClock) # None is the system clock
+        self.assertGreater(clock.now(), START)
+
+class PartySimulatorTest(unittest.TestCase):
+
+    def setUp(self):
+        self._cwd = os.getcwd()
+        self._folder = tempfile.mkdtemp()
+        os.chdir(self._folder) # Saves of the runs go here
+        storage._instances.clear()
+
+    def tearDown(self):
+        for backend in storage._instances.values():
+            backend.close()
+        storage._instances.clear()
+        os.chdir(self._cwd)
+        shutil.rmtree(self._folder, ignore_errors=True)
+
+    def party(self, seed):
+        """ Returns (report, core) of a short party on a synthetic catalog """
+        core = service.CapRockService(*simulator.synthetic_catalog(drinks=6, seed=seed))
+        sim = simulator.PartySimulator(core, guests=25, hours=3, arrival="burst", order_minutes=10, save_minutes=30,
+                                       refill_minutes=10, seed=seed, start=START)
+        return sim.run(), core
+
+    def test_same_seed_same_party(self):
+        system = clock.get_clock()
+        first, core = self.party(3)
+        self.assertIs(clock.get_clock(), system) # Restored after the run
+        second, _ = self.party(3)
+        for report in (first, second):
+            del report["wall_seconds"], report["speedup"], report["latency"]
+        self.assertEqual(first, second)
+        self.assertEqual(first["hours"], 3)
+        self.assertEqual(first["counts"]["saves"], 6)
+
+        counts = first["counts"]
+        self.assertGreater(counts["pours"], 0)
+        self.assertEqual(sum(len(guest.get_current_drinks()) for guest in core.registry.users), counts["pours"])
+        self.assertEqual(len(core.registry.users), 25)
+        for guest in core.registry.users: # Pour times come from the virtual clock
+            self.assertTrue(all(START <= pour.time <= START + 3 * simulator.HOUR for pour in guest.get_current_drinks()))
+        self.assertTrue(all(liq.get_volume_left() >= 0 for liq in core.registry.liquids))
+
+    def test_unknown_arrival(self):
+        core = service.CapRockService(*simulator.synthetic_catalog())
+        self.assertRaises(util.CapRockError, simulator.PartySimulator, core, arrival="trickle")
+        self.assertEqual(simulator.percentiles([]), None)
+        self.assertEqual(simulator.percentiles([3, 1, 2, 4])["p50"], 3)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+"""
+test_startup.py - Startup keeps pours that expired while the kiosk was off
+
+@author: Brian Kachala - ECE 4900 Team 8
+@Last Edited: 10/18/2026
+"""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import CapRock_backend_util as util
+import CapRock_clock as clock
+import CapRock_drink as drink
+import CapRock_liquid as liquid
+import CapRock_main as main
+import CapRock_storage as storage
+import CapRock_user as user
+
+class StartupTest(unittest.TestCase):
+
+    def setUp(self):
+        self._cwd = os.getcwd()
+        self._folder = tempfile.mkdtemp()
+        os.chdir(self._folder) # Storage, journal, archive and logs go to 'backend/' and 'logs/' here
+        storage._instances.clear()
+
+    def tearDown(self):
+        for backend in storage._instances.values():
+            backend.close()
+        storage._instances.clear()
+        user.set_expired_sink(None)
+        util.configure_scale("kiosk")
+        os.chdir(self._cwd)
+        shutil.rmtree(self._folder, ignore_errors=True)
+
+    def test_stale_pour_is_archived_on_restart(self):
+        liq = liquid.Liquid("Vodka", .4, .95, 16, util.Container.FL)
+        dr = drink.Drink("Shot", (liq, 1.5))
+        person = user.User("Ann", util.Sex.Female, 140.0, util.Experience.Regular)
+        person.add_drink(dr, time=float(int(clock.now())) - 10*60*60) # Worn off and past SESSION_TIME
+        self.assertTrue(util.save_storage([person], [dr], [liq]))
+        storage._instances.clear() # Restart reads from disk
+
+        core, order_server = main.startup("kiosk")
+        try:
+            ann = core.registry.get_user("Ann")
+            self.assertEqual(ann.get_current_drinks(), [])
+            self.assertEqual(core.usage("user"), {"Ann":1})
+        finally:
+            main.cleanup(core, order_server)
+
+        storage._instances.clear()
+        users, _, _ = util.load_storage()
+        self.assertEqual([len(u.get_current_drinks()) for u in users], [0]) # Saved without it, not lost
+
+    def test_venue_start_copies_kiosk_catalog_once(self):
+        liqs = [liquid.Liquid("Liquid %d" % i, .4, .95, 16, container)
+                for i, container in enumerate((util.Container.FL, util.Container.FR, util.Container.BL))]
+        drinks = [drink.Drink("Drink %d" % i, (liqs[i % 3], 1.5)) for i in range(util.MAX_DRINKS_STORED + 4)]
+        users = [user.User("User %d" % i, util.Sex.Male, 180.0, util.Experience.Light) for i in range(util.MAX_USERS + 4)]
+        self.assertTrue(util.save_storage(users, drinks, liqs)) # Kiosk shards, more than kiosk limits
+        storage._instances.clear()
+
+        core, order_server = main.startup("venue")
+        try:
+            self.assertEqual((util.SCALE_MODE, util.STORAGE_BACKEND), ("venue", "sqlite"))
+            self.assertGreaterEqual(util.MAX_USERS, 20000)
+            self.assertEqual([len(core.registry.users), len(core.registry.drinks)], [len(users), len(drinks)])
+            core.pour_order("Drink 0", "User 0", durable=True)
+        finally:
+            main.cleanup(core, order_server)
+        storage._instances.clear()
+
+        core, order_server = main.startup("venue") # Database holds the catalog, shards are not copied again
+        try:
+            self.assertEqual(core.registry.get_liquid("Liquid 0").get_volume_left(), 14.5)
+            self.assertEqual(len(core.registry.get_user("User 0").get_current_drinks()), 1)
+        finally:
+            main.cleanup(core, order_server)
+        self.assertTrue(os.path.exists(storage.SQLITE_PATH))
+
+    def test_configure_scale(self):
+        util.configure_scale("venue")
+        self.assertEqual(util.STORAGE_BACKEND, "sqlite")
+        self.assertRaises(util.CapRockError, util.configure_scale, "stadium")
+        self.assertEqual(util.SCALE_MODE, "venue") # Unknown mode changes nothing
+        util.configure_scale("kiosk")
+        self.assertEqual((util.MAX_LIQUIDS_STORED, util.MAX_DRINKS_STORED, util.MAX_USERS, util.STORAGE_BACKEND),
+                         (64, 16, 8, "sharded"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,241 @@
+"""
+test_storage.py - Storage backends save what changed and load it back
+
+@author: Brian Kachala - ECE 4900 Team 8
+@Last Edited: 10/18/2026
+"""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from datetime import datetime
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import CapRock_backend_util as util
+import CapRock_benchmark as benchmark
+import CapRock_clock as clock
+import CapRock_drink as drink
+import CapRock_journal as journal
+import CapRock_liquid as liquid
+import CapRock_service as service
+import CapRock_storage as storage
+import CapRock_user as user
+
+class StorageTest(unittest.TestCase):
+
+    def setUp(self):
+        self._cwd = os.getcwd()
+        self._folder = tempfile.mkdtemp()
+        os.chdir(self._folder) # Storage and journal go to 'backend/' here
+        storage._instances.clear()
+
+    def tearDown(self):
+        for backend in storage._instances.values():
+            backend.close()
+        storage._instances.clear()
+        os.chdir(self._cwd)
+        shutil.rmtree(self._folder, ignore_errors=True)
+
+    def restart(self):
+        """ Returns (users, drinks, liquids) read back from disk """
+        for backend in storage._instances.values():
+            backend.close()
+        storage._instances.clear()
+        return util.load_storage()
+
+    def test_replayed_pours_saved_after_failed_startup_save(self):
+        liq = liquid.Liquid("Vodka", .4, .95, 16, util.Container.FL)
+        dr = drink.Drink("Shot", (liq, 1.5))
+        self.assertTrue(util.save_storage([user.User("Ann", util.Sex.Female, 140.0, util.Experience.Regular)], [dr], [liq]))
+        pour_journal = journal.PourJournal()
+        users, drinks, liquids = util.load_storage()
+        service.CapRockService(users, drinks, liquids, pour_journal).pour(drinks[0], durable=True) # Guest, then power loss
+        pour_journal.close()
+
+        users, drinks, liquids = self.restart()
+        pour_journal = journal.PourJournal()
+        try:
+            self.assertEqual(journal.apply_pours(pour_journal.pending_records(), users, drinks, liquids,
+                                                 util.stored_journal_seq()), 1)
+            backend = storage.get_backend()
+            backend.save = lambda *args: (_ for _ in ()).throw(util.CapRockError("Disk full"))
+            self.assertFalse(util.save_storage(users, drinks, liquids, journal_seq=pour_journal.last_seq()))
+            del backend.save
+
+            core = service.CapRockService(users, drinks, liquids, pour_journal)
+            self.assertTrue(core.snapshot())
+        finally:
+            pour_journal.close()
+        _, _, liquids = self.restart()
+        self.assertEqual(liquids[0].get_volume_left(), 14.5)
+
+    def test_untracked_dirty_object_is_saved(self):
+        liqs = [liquid.Liquid("Liquid %d" % i, .4, .95, 16) for i in range(3)]
+        backend = storage.get_backend()
+        backend.save([], [], liqs)
+        liqs[1].change_volume_left(10) # Changed behind the caller's tracking
+        backend.save([], [], liqs, {"liquids":set(), "drinks":set(), "users":set()})
+        _, _, liquids = self.restart()
+        self.assertEqual([liq.get_volume_left() for liq in liquids], [16, 10, 16])
+
+    def test_sharded_saves_only_dirty_shards(self):
+        users, drinks, liquids = catalog()
+        backend = storage.ShardedTextStorage()
+        backend.save(users, drinks, liquids)
+        with mock.patch.object(util, "write_atomic", wraps=util.write_atomic) as write:
+            backend.save(users, drinks, liquids)
+            self.assertEqual(write.call_count, 0) # Idle save does no I/O
+            liquids[1].change_name("Pineapple Juice")
+            backend.save(users, drinks, liquids, {"liquids":{liquids[1]}, "drinks":set(), "users":set()})
+            self.assertEqual([call.args[0] for call in write.call_args_list],
+                             [backend._shard_path("liquids", liquids[1].get_id())])
+        removed = drink.Drink("Rum Shot", (liquids[2], 1.5))
+        backend.save(users, drinks + [removed], liquids)
+        self.assertTrue(os.path.exists(backend._shard_path("drinks", removed.get_id())))
+        backend.save(users, drinks, liquids)
+        self.assertFalse(os.path.exists(backend._shard_path("drinks", removed.get_id())))
+        self.assertEqual(describe(*storage.ShardedTextStorage().load()), describe(users, drinks, liquids))
+
+    def test_sqlite_idle_save_writes_nothing(self):
+        users, drinks, liquids = catalog()
+        backend = storage.SQLiteStorage()
+        try:
+            backend.save(users, drinks, liquids)
+            before = backend._db.total_changes
+            backend.save(users, drinks, liquids)
+            self.assertEqual(backend._db.total_changes, before)
+            liquids[0].change_volume_left(3)
+            backend.save(users, drinks, liquids, {"liquids":{liquids[0]}, "drinks":set(), "users":set()})
+            self.assertEqual(backend._db.total_changes, before + 1)
+        finally:
+            backend.close()
+
+    def test_catalog_is_synced_before_journal_seq(self):
+        liq = liquid.Liquid("Vodka", .4, .95, 16, util.Container.FL)
+        dr = drink.Drink("Shot", (liq, 1.5))
+        person = user.User("Ann", util.Sex.Female, 140.0, util.Experience.Regular)
+        for backend in ("text", "sharded"):
+            with self.subTest(backend=backend):
+                events = []
+                real_fsync, real_replace = os.fsync, os.replace
+                with mock.patch("os.fsync", lambda fd: (events.append("fsync"), real_fsync(fd))), \
+                     mock.patch("os.replace", lambda src, dst: (events.append(os.path.basename(dst)), real_replace(src, dst))):
+                    liq.change_volume_left(liq.get_volume_left() - 1) # Dirty for the second backend too
+                    self.assertTrue(util.save_storage([person], [dr], [liq], backend, journal_seq=len(events) + 1))
+                self.assertEqual(events[-2:], [os.path.basename(util.JOURNAL_SEQ_PATH), "fsync"])
+                for i, event in enumerate(events[:-2]):
+                    if event != "fsync": # Every file is fsynced before its rename and its folder after
+                        self.assertEqual((events[i - 1], events[i + 1]), ("fsync", "fsync"), events)
+
+    def test_baseline_text_files_get_ids(self):
+        os.mkdir("backend")
+        benchmark.write_synthetic_text_storage("backend", liquids=4, drinks=5, users=3, pours=9)
+        users, drinks, liquids = util.load_storage() # No shards yet, read from the text files
+        before = [(liq.get_id(), liq.get_name()) for liq in liquids]
+        pours = [[(pour.time, pour.drink.get_name()) for pour in person.get_current_drinks()] for person in users]
+        self.assertEqual(sum(len(p) for p in pours), 9)
+        self.assertEqual(len(set(before)), 4)
+        self.assertTrue(util.save_storage(users, drinks, liquids))
+
+        users, drinks, liquids = self.restart()
+        self.assertEqual([(liq.get_id(), liq.get_name()) for liq in liquids], before)
+        self.assertEqual([[(pour.time, pour.drink.get_name()) for pour in person.get_current_drinks()] for person in users], pours)
+
+def catalog():
+    """ Returns (users, drinks, liquids) using every stored field """
+    vodka = liquid.Liquid("Vodka", .4, .95, 12.5, util.Container.FL)
+    juice = liquid.Liquid("Orange Juice", 0, 1.04, 15.75, util.Container.BR)
+    rum = liquid.Liquid("Rum", .35, .93)
+    shot = drink.Drink("Shot", (vodka, 1.5))
+    screw = drink.Drink("Screwdriver", (vodka, 1.5), (juice, 4.25))
+    ann = user.User("Ann", util.Sex.Female, 140.5, util.Experience.Heavy)
+    bob = user.User("Bob", util.Sex.Male, 200.0, util.Experience.Light)
+    ann.add_drink(shot, time=1700000000.0)
+    ann.add_drink(screw, time=1700000600.0)
+    return [ann, bob], [shot, screw], [vodka, juice, rum]
+
+def describe(users, drinks, liquids):
+    """ Returns every stored field of a catalog as plain values """
+    return ([(u.get_id(), u.get_name(), u.get_sex(), u.get_weight(), u.get_experience(),
+              [(p.time, p.drink.get_id()) for p in u.get_current_drinks()]) for u in users],
+            [(d.get_id(), d.get_name(), [(liq.get_id(), oz) for liq, oz in d.get_liquids_obj()]) for d in drinks],
+            [(liq.get_id(), liq.get_liquid_info()) for liq in liquids])
+
+class BackendRoundTripTest(unittest.TestCase):
+
+    def setUp(self):
+        self._cwd = os.getcwd()
+        self._folder = tempfile.mkdtemp()
+        os.chdir(self._folder)
+
+    def tearDown(self):
+        os.chdir(self._cwd)
+        shutil.rmtree(self._folder, ignore_errors=True)
+
+    def test_every_backend_loads_what_it_saved(self):
+        saved = catalog()
+        expected = describe(*saved)
+        for name, backend_class in storage.BACKENDS.items():
+            with self.subTest(backend=name):
+                backend = backend_class()
+                backend.save(*saved)
+                backend.close()
+                backend = backend_class()
+                try:
+                    self.assertEqual(describe(*backend.load()), expected)
+                finally:
+                    backend.close()
+
+    def test_pour_times_are_epoch_seconds(self):
+        os.mkdir("backend")
+        with open("backend/liquid_storage.txt", "w") as f:
+            f.write("Vodka\n0.4\n0.95\n16\nFL\n-----\n")
+        with open("backend/drink_storage.txt", "w") as f:
+            f.write("Shot\n1\nVodka\n1.5\n-----\n")
+        with open("backend/user_storage.txt", "w") as f: # Names and TIME_FORMAT strings from before IDs
+            f.write("Ann\nFemale\n140\nRegular\n2\n10-18-26 21:05:00\nShot\n10-18-26 21:35:30\nShot\n-----\n")
+        expected = [datetime(2026, 10, 18, 21, 5).timestamp(), datetime(2026, 10, 18, 21, 35, 30).timestamp()]
+        users, drinks, liquids = storage.TextStorage().load()
+        self.assertEqual([pour.time for pour in users[0].get_current_drinks()], expected)
+        self.assertEqual(util.parse_pour_time(util.format_pour_time(expected[1])), expected[1])
+
+        backend = storage.SQLiteStorage()
+        try:
+            backend.save(users, drinks, liquids)
+            backend._db.execute("UPDATE pours SET time=?", ("10-18-26 21:05:00",)) # Text times of older databases
+            backend._db.commit()
+        finally:
+            backend.close()
+        backend = storage.SQLiteStorage()
+        try:
+            self.assertEqual([pour.time for pour in backend.load()[0][0].get_current_drinks()], [expected[0]] * 2)
+        finally:
+            backend.close()
+
+    def test_default_pour_time_is_taken_at_call(self):
+        users, drinks, _ = catalog()
+        previous = clock.set_clock(clock.VirtualClock(1700003600.5))
+        try:
+            first = users[1].add_drink(drinks[0])
+            clock.get_clock().advance(90)
+            second = users[1].add_drink(drinks[0])
+        finally:
+            clock.set_clock(previous)
+        self.assertEqual((first.time, second.time), (1700003600.0, 1700003690.0)) # Whole seconds like storage
+        self.assertRaises(util.CapRockError, users[1].add_drink, drinks[0], "10-18-26 21:05:00")
+
+    def test_text_migrates_to_sqlite_once(self):
+        saved = catalog()
+        storage.TextStorage().save(*saved)
+        self.assertTrue(storage.migrate_text_to_sqlite())
+        self.assertFalse(storage.migrate_text_to_sqlite()) # Database already holds the catalog
+        backend = storage.SQLiteStorage()
+        try:
+            self.assertEqual(describe(*backend.load()), describe(*saved))
+        finally:
+            backend.close()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+"""
+test_user.py - Running BAC sums of a profile match a full recompute over its pours
+
+@author: Brian Kachala - ECE 4900 Team 8
+@Last Edited: 10/18/2026
+"""
+import os
+import random
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import CapRock_backend_util as util
+import CapRock_clock as clock
+import CapRock_drink as drink
+import CapRock_liquid as liquid
+import CapRock_user as user
+
+START = 1700000000.0
+
+def full_bac(person, now):
+    """ Returns BAC of person at now summed over every pour made by then, like before the running sums """
+    total = 0.0
+    for pour in person.get_current_drinks():
+        if pour.time > now:
+            continue
+        init = pour.grams / person.get_body_water() * util.BLOOD_WATER_FRACTION * 100
+        total = total + max(init - person.get_elimination_rate() * (now - pour.time) / (60*60), 0.0)
+    return total
+
+class UserBACTest(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = clock.VirtualClock(START)
+        self._previous = clock.set_clock(self.clock)
+        vodka = liquid.Liquid("Vodka", .4, .95, 16)
+        self.drinks = [drink.Drink("Shot", (vodka, 1.5)), drink.Drink("Double", (vodka, 3)),
+                       drink.Drink("Beer", (liquid.Liquid("Beer", .05, 1.0, 16), 12))]
+        self.ann = user.User("Ann", util.Sex.Female, 140.0, util.Experience.Regular)
+
+    def tearDown(self):
+        clock.set_clock(self._previous)
+
+    def test_running_sums_match_full_recompute(self):
+        rng = random.Random(2)
+        for _ in range(300):
+            self.clock.advance(rng.randint(0, 15 * 60))
+            if rng.random() < .4:
+                self.ann.add_drink(rng.choice(self.drinks))
+            if rng.random() < .05:
+                self.ann.change_weight(rng.randint(100, 250))
+            if rng.random() < .05:
+                self.ann.change_experience(rng.choice(list(util.Experience)))
+            if rng.random() < .1:
+                self.ann.expire()
+            self.assertAlmostEqual(self.ann.get_bac(), full_bac(self.ann, self.clock.now()), places=9)
+
+    def test_expire_keeps_drinks_still_adding_bac(self):
+        self.ann.add_drink(self.drinks[0])
+        self.clock.advance(util.SESSION_TIME * 60 * 60 + 120) # Both early pours are past the session and worn off
+        self.ann.add_drink(self.drinks[1])
+        self.ann.add_drink(self.drinks[1], START + 60) # Late entry lands in time order
+        self.assertEqual([pour.time for pour in self.ann.get_current_drinks()][:2], [START, START + 60])
+        level = self.ann.get_bac()
+        self.assertEqual(self.ann.expire(), 2)
+        self.assertEqual(self.ann.expire(), 0) # Last pour is recent
+        self.assertEqual(self.ann.get_bac(), level)
+        self.assertAlmostEqual(level, full_bac(self.ann, self.clock.now()), places=9)
+        self.clock.advance(24 * 60 * 60)
+        self.assertEqual(self.ann.get_bac(), 0.0)
+        self.assertEqual(self.ann.expire(), 1)
+
+class BACProjectionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = clock.VirtualClock(START)
+        self._previous = clock.set_clock(self.clock)
+        vodka = liquid.Liquid("Vodka", .4, .95, 16)
+        self.shot = drink.Drink("Shot", (vodka, 1.5))
+        self.double = drink.Drink("Double", (vodka, 3))
+        self.bob = user.User("Bob", util.Sex.Male, 180.0, util.Experience.Light)
+
+    def tearDown(self):
+        clock.set_clock(self._previous)
+
+    def test_curve_matches_get_bac(self):
+        for offset, dr in ((0, self.double), (20, self.shot), (45, self.double), (50, self.shot)):
+            self.bob.add_drink(dr, START + offset * 60)
+        self.clock.set(START + 60 * 60)
+        now = self.clock.now()
+        for use_numpy in (True, False):
+            with self.subTest(numpy=use_numpy), mock.patch.object(user, "np", user.np if use_numpy else None):
+                times, bacs = self.bob.bac_curve(START - 600, now, 300)
+                self.assertEqual(times[0], START - 600)
+                self.assertEqual(times[-1], now)
+                self.assertEqual(bacs[0], 0.0) # Before the first pour
+                self.assertAlmostEqual(bacs[-1], self.bob.get_bac(), places=9)
+                for t, level in zip(times, bacs):
+                    self.assertAlmostEqual(level, full_bac(self.bob, t), places=9)
+        self.assertRaises(util.CapRockError, self.bob.bac_curve, START, now, 0)
+
+    def test_time_until_matches_sampled_curve(self):
+        rng = random.Random(4)
+        for _ in range(12):
+            self.bob.add_drink(rng.choice((self.shot, self.double)))
+            self.clock.advance(rng.randint(0, 20 * 60))
+        now = self.clock.now()
+        for threshold in (util.LEGAL_BAC_LIMIT, .05, .01, 0.0):
+            with self.subTest(threshold=threshold):
+                wait = self.bob.time_until(threshold)
+                self.assertGreater(wait, 0)
+                times, bacs = self.bob.bac_curve(now, now + 24 * 60 * 60, 1)
+                first = next(t for t, level in zip(times, bacs) if level <= threshold + 1e-12)
+                self.assertLessEqual(abs((now + wait) - first), 1.0) # Within one sample
+        self.assertEqual(self.bob.time_until(1.0), 0.0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+"""
+test_widgets.py - Catalog search matches a scan of every name and lists only draw visible rows
+
+@author: Brian Kachala - ECE 4900 Team 8
+@Last Edited: 10/18/2026
+"""
+import os
+import random
+import sys
+import tkinter as tk
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import CapRock_widgets as widgets
+
+def scan(items, query):
+    """ Returns items matching query like the lists did before the index, in order """
+    query = query.lower()
+    if len(query) < 3:
+        return [item for item in items if item.name.lower().startswith(query)]
+    return [item for item in items if query in item.name.lower()]
+
+class Item():
+    """ Catalog object stand-in with a name that can change """
+
+    def __init__(self, name):
+        self.name = name
+
+def display():
+    """ Returns a Tk root, None without a display """
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        return None
+    root.withdraw()
+    return root
+
+def has_display():
+    """ Returns True if Tk can open a window """
+    root = display()
+    if root is None:
+        return False
+    root.destroy()
+    return True
+
+class SearchIndexTest(unittest.TestCase):
+
+    def test_matches_scan_after_edits(self):
+        rng = random.Random(12)
+        words = ["Vodka", "Rum", "Gin", "Lime", "Orange", "Sour", "Tonic", "Cola", "Mule", "Ice", "Tea"]
+        make = lambda: Item(" ".join(rng.sample(words, rng.randint(1, 3))) + " %d" % rng.randint(0, 99))
+        items = [make() for _ in range(60)]
+        index = widgets.SearchIndex(items, key=lambda item: item.name)
+        queries = ["", "v", "VO", "gin", "ime o", "a", "ola 1", "zzz", "tea", " 4", "mule tea"]
+        for _ in range(150):
+            op = rng.random()
+            if op < .3:
+                item = make()
+                items.append(item)
+                index.add(item)
+            elif op < .5 and items:
+                item = items.pop(rng.randrange(len(items)))
+                index.remove(item)
+            else:
+                item = rng.choice(items)
+                old = item.name
+                item.name = make().name
+                self.assertEqual(index.update(item), item.name.lower() != old.lower())
+            self.assertEqual(len(index), len(items))
+            for query in queries:
+                self.assertEqual(index.search(query), scan(items, query), query)
+        index.remove(Item("Not indexed"))
+        self.assertFalse(index.update(Item("Not indexed")))
+
+@unittest.skipUnless(has_display(), "Tk needs a display")
+class VirtualListTest(unittest.TestCase):
+
+    def setUp(self):
+        self.root = display()
+        self.items = [Item("Drink %d" % i) for i in range(1000)]
+        self.index = widgets.SearchIndex(self.items, key=lambda item: item.name)
+        self.view = widgets.VirtualList(self.root, lambda: self.items, lambda item: item.name, self.index, height=5,
+                                        extra=["No Drink"])
+
+    def tearDown(self):
+        self.root.destroy()
+
+    def rows(self):
+        return list(self.view._list.get(0, tk.END))
+
+    def test_only_visible_rows_are_drawn(self):
+        self.assertEqual(self.rows(), ["Drink %d" % i for i in range(5)])
+        self.view._yview("moveto", "1.0")
+        self.assertEqual(self.rows(), ["Drink 996", "Drink 997", "Drink 998", "Drink 999", "No Drink"])
+        self.view.select(self.items[998])
+        self.view.searchText.set("rink 99")
+        self.assertEqual(self.rows(), ["Drink 99", "Drink 990", "Drink 991", "Drink 992", "Drink 993"])
+        self.assertIs(self.view.selected(), self.items[998]) # Kept while searching
+        removed = self.items.pop(998)
+        self.index.remove(removed)
+        self.view.apply_event("remove", 998, removed)
+        self.assertIsNone(self.view.selected())
+
+if __name__ == "__main__":
+    unittest.main()